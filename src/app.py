@@ -6,13 +6,32 @@ including request processing, system health monitoring, and CORS configuration
 for web-based frontends.
 """
 
-from typing import Optional
-from fastapi import FastAPI, HTTPException
+import hmac
+import json
+import time
+from typing import List, Optional
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from pydantic import BaseModel
 
-from .models import HelpDeskRequest, HelpDeskResponse, SystemHealth
+from .models import (
+    BatchProcessResponse,
+    HelpDeskRequest,
+    HelpDeskResponse,
+    KnowledgeItem,
+    SystemHealth,
+)
+from .config import Config
 from .help_desk_system import IntelligentHelpDeskSystem
+from .logging_config import configure_logging
+from .metrics import (
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS,
+    REQUESTS_IN_PROGRESS,
+    register_system,
+)
 
 
 # Initialize FastAPI app
@@ -34,18 +53,78 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Write logs from a background thread before the system starts logging
+configure_logging()
+
 # Initialize the help desk system
 help_desk_system = IntelligentHelpDeskSystem()
+register_system(help_desk_system)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Count requests in flight and record their status and latency"""
+    REQUESTS_IN_PROGRESS.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        REQUESTS_IN_PROGRESS.dec()
+        # Label by route template so path parameters do not create new series
+        route = request.scope.get("route")
+        route = route.path if route is not None else "unmatched"
+        HTTP_REQUEST_DURATION.labels(route=route, method=request.method).observe(
+            time.perf_counter() - start
+        )
+        HTTP_REQUESTS.labels(
+            route=route, method=request.method, status=str(status)
+        ).inc()
 
 
 class ProcessRequestRequest(BaseModel):
     """Request model for processing help desk requests"""
 
     user_message: str
+    request_id: Optional[str] = None
     user_id: Optional[str] = None
     timestamp: Optional[str] = None
 
 
+class BatchProcessRequest(BaseModel):
+    """Request model for processing a batch of help desk requests"""
+
+    requests: List[ProcessRequestRequest]
+
+
+class KnowledgeItemRequest(BaseModel):
+    """Request model for adding or updating knowledge base items"""
+
+    content: str
+    source: str = "Help Desk Admin"
+    category: Optional[str] = None
+
+
+def require_admin_token(authorization: Optional[str] = Header(None)):
+    """Reject admin calls unless ADMIN_API_TOKEN is set and sent as a bearer token"""
+    if not Config.ADMIN_API_TOKEN:
+        raise HTTPException(
+            status_code=403,
+            detail="Admin API is disabled; set ADMIN_API_TOKEN to enable it",
+        )
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(
+        token.encode("utf-8"), Config.ADMIN_API_TOKEN.encode("utf-8")
+    ):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid admin token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
 @app.get("/")
 async def root():
     """Root endpoint with system information"""
@@ -55,7 +134,11 @@ async def root():
         "status": "running",
         "endpoints": {
             "process_request": "/process-request",
+            "process_requests": "/process-requests",
+            "process_request_stream": "/process-request/stream",
             "system_health": "/health",
+            "metrics": "/metrics",
+            "knowledge_items": "/admin/knowledge-items",
         },
     }
 
@@ -67,12 +150,13 @@ async def process_request(request: ProcessRequestRequest):
         # Create help desk request
         help_desk_request = HelpDeskRequest(
             user_message=request.user_message,
+            request_id=request.request_id,
             user_id=request.user_id,
             timestamp=request.timestamp,
         )
 
-        # Process the request
-        response = help_desk_system.process_request(help_desk_request)
+        # Process the request without blocking the event loop
+        response = await help_desk_system.process_request_async(help_desk_request)
 
         return response
 
@@ -82,7 +166,122 @@ async def process_request(request: ProcessRequestRequest):
         ) from e
 
 
+@app.post("/process-request/stream")
+async def process_request_stream(request: ProcessRequestRequest):
+    """Stream the classification and response tokens as Server-Sent Events"""
+    help_desk_request = HelpDeskRequest(
+        user_message=request.user_message,
+        request_id=request.request_id,
+        user_id=request.user_id,
+        timestamp=request.timestamp,
+    )
+
+    async def event_stream():
+        try:
+            async for event, data in help_desk_system.stream_request_async(
+                help_desk_request
+            ):
+                payload = data if isinstance(data, str) else data.model_dump()
+                yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+        except Exception as e:
+            error = {"detail": f"Error processing request: {str(e)}"}
+            yield f"event: error\ndata: {json.dumps(error)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/process-requests", response_model=BatchProcessResponse)
+async def process_requests(batch: BatchProcessRequest):
+    """Process a batch of help desk requests, returning results in order"""
+    if len(batch.requests) > Config.BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds {Config.BATCH_MAX_REQUESTS} requests",
+        )
+
+    help_desk_requests = [
+        HelpDeskRequest(
+            user_message=request.user_message,
+            request_id=request.request_id,
+            user_id=request.user_id,
+            timestamp=request.timestamp,
+        )
+        for request in batch.requests
+    ]
+    results = await help_desk_system.process_requests_async(help_desk_requests)
+    return BatchProcessResponse(results=results)
+
+
 @app.get("/health", response_model=SystemHealth)
 async def get_system_health():
     """Get system health status"""
     return help_desk_system.get_system_health()
+
+
+@app.get("/metrics")
+def get_metrics():
+    """Expose Prometheus metrics"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+# Knowledge base administration. These are sync endpoints so FastAPI runs the
+# embedding call for new content in its threadpool instead of the event loop.
+@app.post(
+    "/admin/knowledge-items",
+    response_model=KnowledgeItem,
+    dependencies=[Depends(require_admin_token)],
+)
+def add_knowledge_item(request: KnowledgeItemRequest):
+    """Add a knowledge item to the live index"""
+    try:
+        return help_desk_system.knowledge_base.add_knowledge_item(
+            request.content, request.source, request.category
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error adding knowledge item: {str(e)}"
+        ) from e
+
+
+@app.put(
+    "/admin/knowledge-items/{item_id}",
+    response_model=KnowledgeItem,
+    dependencies=[Depends(require_admin_token)],
+)
+def update_knowledge_item(item_id: int, request: KnowledgeItemRequest):
+    """Replace a knowledge item in the live index, keeping its ID"""
+    try:
+        return help_desk_system.knowledge_base.update_knowledge_item(
+            item_id, request.content, request.source, request.category
+        )
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0])) from e
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error updating knowledge item: {str(e)}"
+        ) from e
+
+
+@app.delete(
+    "/admin/knowledge-items/{item_id}", dependencies=[Depends(require_admin_token)]
+)
+def delete_knowledge_item(item_id: int):
+    """Remove a knowledge item from the live index"""
+    try:
+        help_desk_system.knowledge_base.delete_knowledge_item(item_id)
+        return {"deleted": item_id}
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0])) from e
+
+
+@app.post(
+    "/admin/knowledge-base/snapshot", dependencies=[Depends(require_admin_token)]
+)
+def snapshot_knowledge_base():
+    """Write a full snapshot of the knowledge base and clear the change log"""
+    help_desk_system.knowledge_base.save_knowledge_base()
+    return {"status": "saved"}
@@ -0,0 +1,157 @@
+"""
+In-memory BM25 inverted index for lexical knowledge retrieval.
+
+Posting lists over knowledge item content score exact-token matches for fusion
+with the vector results.
+"""
+
+import heapq
+import math
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by can do does for from have how i if in is it "
+    "me my no not of on or our so that the their this to was we what when "
+    "where which who why will with you your".split()
+)
+
+
+class BM25Index:
+    """Okapi BM25 over documents identified by knowledge item ID
+
+    Each document can belong to a group (its request category or "general") so
+    searches can be restricted the same way as the vector index.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self._doc_terms: Dict[int, Dict[str, int]] = {}
+        self._doc_groups: Dict[int, Optional[str]] = {}
+        self._doc_lengths: Dict[int, int] = {}
+        self._total_length = 0
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        """Split text into lowercase alphanumeric tokens without stopwords"""
+        return [
+            token
+            for token in TOKEN_PATTERN.findall(text.lower())
+            if token not in STOPWORDS
+        ]
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def add(self, doc_id: int, text: str, group: str = None):
+        """Index a document, replacing any previous version with the same ID"""
+        self.remove(doc_id)
+        term_counts: Dict[str, int] = defaultdict(int)
+        for token in self.tokenize(text):
+            term_counts[token] += 1
+        for term, count in term_counts.items():
+            self._postings[term][doc_id] = count
+        self._doc_terms[doc_id] = dict(term_counts)
+        self._doc_groups[doc_id] = group
+        self._doc_lengths[doc_id] = sum(term_counts.values())
+        self._total_length += self._doc_lengths[doc_id]
+
+    def remove(self, doc_id: int):
+        """Remove a document from the index if present"""
+        term_counts = self._doc_terms.pop(doc_id, None)
+        if term_counts is None:
+            return
+        for term in term_counts:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+        del self._doc_groups[doc_id]
+        self._total_length -= self._doc_lengths.pop(doc_id)
+
+    def _idf(self, document_frequency: int) -> float:
+        """Inverse document frequency, always positive"""
+        num_docs = len(self._doc_terms)
+        return math.log(
+            1 + (num_docs - document_frequency + 0.5) / (document_frequency + 0.5)
+        )
+
+    def search(
+        self, query: str, top_k: int, groups: Iterable[str] = None
+    ) -> List[Tuple[int, float]]:
+        """Return up to top_k (doc_id, score) pairs, best first
+
+        Scores are normalized by the sum of the query terms' IDF, which is what
+        a document of average length containing each query term once would
+        score, and capped at 1.0. A query term missing from every document
+        still counts towards that total, so it lowers the confidence.
+        """
+        terms = set(self.tokenize(query))
+        if not terms or not self._doc_terms:
+            return []
+
+        allowed = set(groups) if groups is not None else None
+        scores: Dict[int, float] = defaultdict(float)
+        max_score = 0.0
+        for term in terms:
+            max_score += self._score_term(term, allowed, scores)
+
+        best = heapq.nlargest(top_k, scores.items(), key=lambda entry: entry[1])
+        return [(doc_id, min(1.0, score / max_score)) for doc_id, score in best]
+
+    def _score_term(
+        self, term: str, allowed: Optional[Set[str]], scores: Dict[int, float]
+    ) -> float:
+        """Add a query term's BM25 contribution to scores and return its IDF"""
+        postings = self._postings.get(term, {})
+        idf = self._idf(len(postings))
+        average_length = self._total_length / len(self._doc_terms) or 1.0
+        for doc_id, count in postings.items():
+            if allowed is not None and self._doc_groups[doc_id] not in allowed:
+                continue
+            length = self._doc_lengths[doc_id]
+            scores[doc_id] += (
+                idf
+                * count
+                * (self.k1 + 1)
+                / (
+                    count
+                    + self.k1 * (1 - self.b + self.b * length / average_length)
+                )
+            )
+        return idf
+
+
+def fuse_scores(
+    vector_results: List[Tuple[int, float]],
+    lexical_results: List[Tuple[int, float]],
+    method: str,
+    rrf_k: int = 60,
+    lexical_weight: float = 0.3,
+) -> List[Tuple[int, float]]:
+    """Combine two ranked (doc_id, score) lists into one, best first
+
+    "rrf" (reciprocal rank fusion) only uses ranks, so it needs no score
+    calibration; "weighted" mixes the cosine similarity with the normalized
+    BM25 score, counting a missing score as 0.
+    """
+    fused: Dict[int, float] = defaultdict(float)
+    if method == "rrf":
+        for results in (vector_results, lexical_results):
+            for rank, (doc_id, _) in enumerate(results, 1):
+                fused[doc_id] += 1.0 / (rrf_k + rank)
+    elif method == "weighted":
+        for doc_id, score in vector_results:
+            fused[doc_id] += (1 - lexical_weight) * score
+        for doc_id, score in lexical_results:
+            fused[doc_id] += lexical_weight * score
+    else:
+        raise ValueError(
+            f"Unknown fusion method '{method}', expected rrf or weighted"
+        )
+    return sorted(fused.items(), key=lambda entry: entry[1], reverse=True)
@@ -0,0 +1,123 @@
+"""
+Shared registry of request category definitions, reloaded when the file changes.
+"""
+
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class CategorySnapshot:
+    """Parsed categories of one version of the file with their prompt fragments"""
+
+    def __init__(self, categories: Dict[str, Dict[str, Any]], mtime_ns: int):
+        self.categories = categories
+        self.mtime_ns = mtime_ns
+        self.classification_text = "".join(
+            f"- {name}: {info['description']}{self._triggers_text(info)}\n"
+            for name, info in categories.items()
+        )
+        self._category_info = {
+            name: self._format_category_info(info)
+            for name, info in categories.items()
+        }
+
+    @staticmethod
+    def _triggers_text(info: Dict[str, Any]) -> str:
+        """Describe a category's escalation triggers for the classifier"""
+        triggers = info.get("escalation_triggers", [])
+        if not triggers:
+            return ""
+        return f" (Escalation triggers: {', '.join(triggers)})"
+
+    @staticmethod
+    def _format_category_info(info: Dict[str, Any]) -> str:
+        """Describe a category for the response prompt"""
+        return (
+            f"Description: {info.get('description', 'N/A')}\n"
+            f"Typical Resolution Time: {info.get('typical_resolution_time', 'N/A')}"
+        )
+
+    def category_info(self, category: str) -> str:
+        """Return the response prompt description of a category"""
+        info = self._category_info.get(category)
+        if info is None:
+            return self._format_category_info({})
+        return info
+
+
+class CategoryRegistry:
+    """Category definitions loaded on first use and reloaded when the file changes"""
+
+    def __init__(self, path: str, check_interval: float = 0.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._snapshot: Optional[CategorySnapshot] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> CategorySnapshot:
+        """Return the current snapshot, loading or reloading the file if due
+
+        Raises if the file has never been loaded successfully.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() < self._next_check:
+            return snapshot
+
+        with self._lock:
+            now = time.monotonic()
+            if self._snapshot is not None and now < self._next_check:
+                return self._snapshot
+            self._next_check = now + self.check_interval
+            try:
+                mtime_ns = os.stat(self.path).st_mtime_ns
+                if self._snapshot is None or mtime_ns != self._snapshot.mtime_ns:
+                    self._snapshot = self._load(mtime_ns)
+            except Exception as e:
+                if self._snapshot is None:
+                    raise
+                logger.warning(
+                    "Could not reload categories from %s, keeping the "
+                    "previous definitions: %s",
+                    self.path,
+                    e,
+                )
+            return self._snapshot
+
+    def _load(self, mtime_ns: int) -> CategorySnapshot:
+        """Parse the categories file into a new snapshot"""
+        with open(self.path, "r", encoding="utf-8") as f:
+            categories = json.load(f)["categories"]
+        logger.info("Loaded %d categories from %s", len(categories), self.path)
+        return CategorySnapshot(categories, mtime_ns)
+
+    @property
+    def categories(self) -> Dict[str, Dict[str, Any]]:
+        """Category definitions by name"""
+        return self.snapshot().categories
+
+    @property
+    def classification_text(self) -> str:
+        """The category list of the classification prompt"""
+        return self.snapshot().classification_text
+
+    def category_info(self, category: str) -> str:
+        """The description of a category for the response prompt"""
+        return self.snapshot().category_info(category)
+
+
+@functools.lru_cache(maxsize=None)
+def get_category_registry() -> CategoryRegistry:
+    """Return the process-wide registry for Config.CATEGORIES_PATH"""
+    return CategoryRegistry(
+        Config.CATEGORIES_PATH, Config.CATEGORY_RELOAD_INTERVAL
+    )
@@ -6,21 +6,52 @@ using OpenAI's LLM API to categorize requests and determine escalation requireme
 """
 
 import json
+import logging
 from typing import Dict, Any
-import openai
 from .models import ClassificationResult, RequestCategory
+from .category_registry import get_category_registry
 from .config import Config
+from .metrics import record_token_usage
+from .openai_client import get_async_openai_client, get_openai_client
+
+logger = logging.getLogger(__name__)
+
+# The parts that are the same for every request come first and the user request
+# last. Provider prompt caching needs a shared prefix of about 1024 tokens, which
+# this prompt does not reach yet; the order keeps it eligible as it grows.
+CLASSIFICATION_INSTRUCTIONS = (
+    "Please classify the IT help desk request at the end of this message "
+    "into one of these categories:\n\n"
+)
+
+CLASSIFICATION_FORMAT = """
+Please respond in the following JSON format:
+{
+    "category": "category_name",
+    "confidence": 0.95,
+    "reasoning": "Brief explanation of why this category was chosen",
+    "escalate": true/false,
+    "escalation_reason": "If escalation is needed, explain why; otherwise null or empty"
+}
+
+Only use the exact category names listed above. Confidence should be between 0.0 and 1.0.
+
+"""
 
 
 class RequestClassifier:
     """Classifies incoming help desk requests using LLM for escalation only"""
 
     def __init__(self):
-        self.client = openai.OpenAI(api_key=Config.OPENAI_API_KEY)
-        """Load category definitions"""
-        with open(Config.CATEGORIES_PATH, "r", encoding="utf-8") as f:
-            categories = json.load(f)["categories"]
-        self.categories = categories
+        self.client = get_openai_client()
+        self.async_client = get_async_openai_client()
+        # Category definitions are loaded on first use and reloaded on change
+        self.category_registry = get_category_registry()
+
+    @property
+    def categories(self) -> Dict[str, Any]:
+        """Category definitions by name"""
+        return self.category_registry.categories
 
     def classify_request(self, user_message: str) -> ClassificationResult:
         """Classify a user request into predefined categories, using LLM for escalation only"""
@@ -31,89 +62,101 @@ class RequestClassifier:
         try:
             # Call OpenAI API for classification
             response = self.client.chat.completions.create(
-                model=Config.OPENAI_MODEL,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are an expert IT help desk classifier. Your job is to "
-                            "categorize user requests accurately and determine if "
-                            "escalation to a human is needed."
-                        ),
-                    },
-                    {"role": "user", "content": classification_prompt},
-                ],
-                temperature=0.1,
-                max_tokens=300,
+                **self._create_completion_kwargs(classification_prompt)
             )
+            return self._build_classification_result(response)
 
-            # Parse the response
-            classification_text = response.choices[0].message.content.strip()
-            classification_data = self._parse_classification_response(
-                classification_text
-            )
-            escalation_required = classification_data.get("escalate", False)
-            escalation_reason = classification_data.get("escalation_reason", None)
-
-            # Check confidence threshold and escalates if too low
-            confidence = classification_data.get("confidence", 0.5)
-            if confidence < Config.CLASSIFICATION_CONFIDENCE_THRESHOLD:
-                escalation_required = True
-                escalation_reason = (
-                    f"Low classification confidence ({confidence:.2f}) - "
-                    f"manual review required"
-                )
-            return ClassificationResult(
-                category=RequestCategory(classification_data["category"]),
-                reasoning=classification_data["reasoning"],
-                escalation_required=escalation_required,
-                escalation_reason=escalation_reason,
+        except Exception as e:
+            return self._create_error_result(e)
+
+    async def classify_request_async(
+        self, user_message: str
+    ) -> ClassificationResult:
+        """Classify a user request without blocking the event loop"""
+
+        classification_prompt = self.create_classification_prompt(user_message)
+
+        try:
+            response = await self.async_client.chat.completions.create(
+                **self._create_completion_kwargs(classification_prompt)
             )
+            return self._build_classification_result(response)
 
         except Exception as e:
-            print(f"Classification error: {e}")
-            # If LLM fails, return a minimal ClassificationResult
-            return ClassificationResult(
-                category=RequestCategory.POLICY_QUESTION,
-                reasoning=f"LLM error: {str(e)}",
-                escalation_required=False,
-                escalation_reason="LLM unavailable or error",
+            return self._create_error_result(e)
+
+    def _create_completion_kwargs(
+        self, classification_prompt: str
+    ) -> Dict[str, Any]:
+        """Create the chat completion arguments shared by the sync and async paths"""
+        return {
+            "model": Config.OPENAI_MODEL,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": (
+                        "You are an expert IT help desk classifier. Your job is to "
+                        "categorize user requests accurately and determine if "
+                        "escalation to a human is needed."
+                    ),
+                },
+                {"role": "user", "content": classification_prompt},
+            ],
+            "temperature": 0.1,
+            "max_tokens": 300,
+        }
+
+    def _build_classification_result(self, response) -> ClassificationResult:
+        """Build a ClassificationResult from a chat completion response"""
+
+        record_token_usage("classification", response.usage)
+
+        # Parse the response
+        classification_text = response.choices[0].message.content.strip()
+        classification_data = self._parse_classification_response(
+            classification_text
+        )
+        escalation_required = classification_data.get("escalate", False)
+        escalation_reason = classification_data.get("escalation_reason", None)
+
+        # Check confidence threshold and escalates if too low
+        confidence = classification_data.get("confidence", 0.5)
+        if confidence < Config.CLASSIFICATION_CONFIDENCE_THRESHOLD:
+            escalation_required = True
+            escalation_reason = (
+                f"Low classification confidence ({confidence:.2f}) - "
+                f"manual review required"
             )
+        return ClassificationResult(
+            category=RequestCategory(classification_data["category"]),
+            reasoning=classification_data["reasoning"],
+            escalation_required=escalation_required,
+            escalation_reason=escalation_reason,
+        )
+
+    def _create_error_result(self, error: Exception) -> ClassificationResult:
+        """Create a minimal ClassificationResult when the LLM fails"""
+        logger.warning("Classification error: %s", error)
+        return ClassificationResult(
+            category=RequestCategory.POLICY_QUESTION,
+            reasoning=f"LLM error: {str(error)}",
+            escalation_required=False,
+            escalation_reason="LLM unavailable or error",
+        )
+
+    def create_classification_prefix(self) -> str:
+        """Create the part of the classification prompt shared by all requests"""
+        return (
+            CLASSIFICATION_INSTRUCTIONS
+            + self.category_registry.classification_text
+            + CLASSIFICATION_FORMAT
+        )
 
     def create_classification_prompt(self, user_message: str) -> str:
         """Create the classification prompt for the LLM (ask for escalation info)"""
-
-        categories_text = ""
-        for category, info in self.categories.items():
-            triggers = info.get("escalation_triggers", [])
-            triggers_text = (
-                f" (Escalation triggers: {', '.join(triggers)})"
-                if triggers
-                else ""
-            )
-            categories_text += (
-                f"- {category}: {info['description']}{triggers_text}\n"
-            )
-
-        prompt = f"""
-            Please classify the following IT help desk request into one of these categories:
-
-            {categories_text}
-
-            User Request: "{user_message}"
-
-            Please respond in the following JSON format:
-            {{
-                "category": "category_name",
-                "confidence": 0.95,
-                "reasoning": "Brief explanation of why this category was chosen",
-                "escalate": true/false,
-                "escalation_reason": "If escalation is needed, explain why; otherwise null or empty"
-            }}
-
-            Only use the exact category names listed above. Confidence should be between 0.0 and 1.0.
-        """
-        return prompt
+        return (
+            f'{self.create_classification_prefix()}User Request: "{user_message}"'
+        )
 
     def _parse_classification_response(self, response_text: str) -> Dict[str, Any]:
         """Parse the LLM classification response (with escalation info)"""
@@ -135,7 +178,7 @@ class RequestClassifier:
             raise ValueError("No JSON found in response")
 
         except Exception as e:
-            print(f"Error parsing classification response: {e}")
+            logger.warning("Error parsing classification response: %s", e)
             return {
                 "category": "general",
                 "confidence": 0.5,
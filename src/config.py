@@ -20,17 +20,127 @@ class Config:
     )
     OPENAI_EMBEDDING_DIMENSION = int(os.getenv("VECTOR_DIMENSION", "1536"))
 
+    # OpenAI HTTP Client Configuration (one pooled client per process)
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+    OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(
+        os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20")
+    )
+    OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30"))
+    OPENAI_HTTP2 = os.getenv("OPENAI_HTTP2", "false").lower() == "true"
+    OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "30"))
+    OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+    OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+
     # Classification Configuration
     CLASSIFICATION_CONFIDENCE_THRESHOLD = float(
         os.getenv("CLASSIFICATION_CONFIDENCE_THRESHOLD", "0.8")
     )
 
+    # Local Classifier: a nearest-centroid model over query embeddings answers
+    # confident requests without an LLM call. Training examples use the
+    # test_requests.json format; the temperature scales the softmax confidence.
+    LOCAL_CLASSIFIER_ENABLED = (
+        os.getenv("LOCAL_CLASSIFIER_ENABLED", "false").lower() == "true"
+    )
+    LOCAL_CLASSIFIER_THRESHOLD = float(
+        os.getenv("LOCAL_CLASSIFIER_THRESHOLD", "0.9")
+    )
+    LOCAL_CLASSIFIER_TEMPERATURE = float(
+        os.getenv("LOCAL_CLASSIFIER_TEMPERATURE", "0.02")
+    )
+
     # Vector Search Configuration
     SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.7"))
+    # Vector index type: flat (exact), ivf, hnsw or ivfpq
+    VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "flat")
+    IVF_NLIST = int(os.getenv("IVF_NLIST", "0"))  # 0 picks 4 * sqrt(n)
+    IVF_NPROBE = int(os.getenv("IVF_NPROBE", "8"))
+    HNSW_M = int(os.getenv("HNSW_M", "32"))
+    HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "40"))
+    HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))
+    PQ_M = int(os.getenv("PQ_M", "64"))
+    PQ_NBITS = int(os.getenv("PQ_NBITS", "8"))
+    # Memory-map the saved index instead of reading it into RAM
+    MMAP_INDEX = os.getenv("MMAP_INDEX", "true").lower() == "true"
+    # Only search the classified category plus the shared "general" pool
+    CATEGORY_FILTERING = os.getenv("CATEGORY_FILTERING", "true").lower() == "true"
+
+    # Hybrid Retrieval: fuse BM25 keyword matches with the vector results using
+    # reciprocal rank fusion (rrf) or a weighted sum of scores (weighted).
+    # Lexical scores are normalized to [0, 1]; LEXICAL_SHORTCUT answers matches
+    # above LEXICAL_SHORTCUT_THRESHOLD without calling the embeddings API.
+    HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "false").lower() == "true"
+    HYBRID_FUSION = os.getenv("HYBRID_FUSION", "rrf")
+    HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+    HYBRID_LEXICAL_WEIGHT = float(os.getenv("HYBRID_LEXICAL_WEIGHT", "0.3"))
+    LEXICAL_MIN_SCORE = float(os.getenv("LEXICAL_MIN_SCORE", "0.3"))
+    LEXICAL_SHORTCUT = os.getenv("LEXICAL_SHORTCUT", "false").lower() == "true"
+    LEXICAL_SHORTCUT_THRESHOLD = float(
+        os.getenv("LEXICAL_SHORTCUT_THRESHOLD", "0.8")
+    )
+
+    # Index Build Configuration: embeddings batches are sent from a thread pool
+    # within the account's request and token budgets (0 disables a budget)
+    EMBEDDING_BUILD_CONCURRENCY = int(
+        os.getenv("EMBEDDING_BUILD_CONCURRENCY", "8")
+    )
+    EMBEDDING_REQUESTS_PER_MINUTE = float(
+        os.getenv("EMBEDDING_REQUESTS_PER_MINUTE", "3000")
+    )
+    EMBEDDING_TOKENS_PER_MINUTE = float(
+        os.getenv("EMBEDDING_TOKENS_PER_MINUTE", "1000000")
+    )
+    EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "6"))
+    # Texts embedded between commits to the embedding store during a build
+    EMBEDDING_CHECKPOINT_SIZE = int(os.getenv("EMBEDDING_CHECKPOINT_SIZE", "2000"))
+
+    # Query Embedding Cache Configuration (size 0 disables the cache)
+    EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+    EMBEDDING_CACHE_TTL = float(os.getenv("EMBEDDING_CACHE_TTL", "3600"))
+
+    # Semantic Response Cache: reuse a response generated for a near-identical
+    # query in the same category (distance is cosine distance, 1 - similarity)
+    RESPONSE_CACHE_ENABLED = (
+        os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() == "true"
+    )
+    RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1000"))
+    RESPONSE_CACHE_MAX_DISTANCE = float(
+        os.getenv("RESPONSE_CACHE_MAX_DISTANCE", "0.05")
+    )
+
+    # Micro-batch query embeddings from concurrent requests into one API call,
+    # waiting at most the window or until the batch size is reached
+    EMBEDDING_BATCHING = os.getenv("EMBEDDING_BATCHING", "true").lower() == "true"
+    EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5"))
+    EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "50"))
+
+    # Run query embedding concurrently with classification
+    PARALLEL_RETRIEVAL = os.getenv("PARALLEL_RETRIEVAL", "true").lower() == "true"
 
     # Response Configuration
     MAX_RESPONSE_LENGTH = os.getenv("MAX_RESPONSE_LENGTH", "500")
     MAX_RETRIEVAL_RESULTS = os.getenv("MAX_RETRIEVAL_RESULTS", "3")
+    # Tokens of retrieved knowledge per prompt; an item that does not fit is
+    # truncated if at least CONTEXT_MIN_ITEM_TOKENS of its content would remain
+    CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+    CONTEXT_MIN_ITEM_TOKENS = int(os.getenv("CONTEXT_MIN_ITEM_TOKENS", "50"))
+    # Completion token limit as a multiple of MAX_RESPONSE_LENGTH in tokens
+    RESPONSE_TOKEN_HEADROOM = float(os.getenv("RESPONSE_TOKEN_HEADROOM", "1.5"))
+
+    # Bearer token for the /admin endpoints, which are disabled while it is unset
+    ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN", "")
+
+    # Batch Processing Configuration
+    BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "100"))
+    BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+
+    # Logging Configuration: records are written by a background thread as
+    # JSON (or text); LOG_SAMPLE_RATE keeps all records of that fraction of
+    # requests, warnings and errors are always kept
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+    LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
 
     # Knowledge Base Directory
     DOCS = os.getenv("DOCS", "docs")
@@ -38,7 +148,14 @@ class Config:
 
     # File Paths (all relative to project root)
     CATEGORIES_PATH = os.path.join(PROJECT_ROOT, DOCS, "categories.json")
+    # Seconds between checks of categories.json for edits (0 checks every use)
+    CATEGORY_RELOAD_INTERVAL = float(os.getenv("CATEGORY_RELOAD_INTERVAL", "5"))
     TEST_REQUESTS_PATH = os.path.join(PROJECT_ROOT, DOCS, "test_requests.json")
+    # Kept apart from the test requests, which evaluation replays
+    LOCAL_CLASSIFIER_TRAINING_PATH = os.getenv(
+        "LOCAL_CLASSIFIER_TRAINING_PATH",
+        os.path.join(PROJECT_ROOT, DOCS, "training_requests.json"),
+    )
     POLICIES_PATH = os.path.join(
         PROJECT_ROOT, KNOWLEDGE_BASE_DIR, "company_it_policies.md"
     )
@@ -0,0 +1,152 @@
+"""
+Token-budgeted knowledge context for response generation.
+"""
+
+import functools
+import logging
+import math
+import re
+from typing import List
+
+from .config import Config
+from .models import KnowledgeItem
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = "..."
+# Everything up to the last sentence end that is followed by whitespace
+SENTENCE_PATTERN = re.compile(r".*[.!?](?=\s|$)", re.DOTALL)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_encoding(model: str):
+    """Return the tiktoken encoding of a model, or None to estimate instead"""
+    try:
+        import tiktoken
+    except ImportError:
+        logger.info("tiktoken is not installed, estimating token counts")
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:  # e.g. the encoding file could not be downloaded
+        logger.warning("Could not load a tokenizer, estimating tokens: %s", e)
+        return None
+
+
+def count_tokens(text: str, model: str = Config.OPENAI_MODEL) -> int:
+    """Count the tokens of a text for a model"""
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text))
+
+
+def truncate_to_tokens(
+    text: str, max_tokens: int, model: str = Config.OPENAI_MODEL
+) -> str:
+    """Cut a text to at most max_tokens tokens, ending on a word boundary"""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    budget = max(max_tokens - count_tokens(TRUNCATION_MARKER, model), 0)
+    encoding = _get_encoding(model)
+    if encoding is None:
+        truncated = text[: budget * CHARS_PER_TOKEN]
+    else:
+        truncated = encoding.decode(encoding.encode(text)[:budget])
+    # Drop the partial word the cut may have left
+    head, space, _ = truncated.rpartition(" ")
+    if space and head:
+        truncated = head
+    return truncated.rstrip() + TRUNCATION_MARKER
+
+
+def trim_to_last_sentence(text: str) -> str:
+    """Drop the unfinished sentence a cut-off text ends with, if any is complete"""
+    match = SENTENCE_PATTERN.match(text)
+    return match.group(0) if match else text
+
+
+def response_max_tokens(
+    max_response_chars: int = int(Config.MAX_RESPONSE_LENGTH),
+    headroom: float = Config.RESPONSE_TOKEN_HEADROOM,
+) -> int:
+    """Derive the completion token limit from the response length budget
+
+    The prompt asks for a response under max_response_chars characters; the
+    headroom lets the model finish its last sentence instead of being cut off.
+    """
+    return max(1, math.ceil(max_response_chars / CHARS_PER_TOKEN * headroom))
+
+
+class ContextBuilder:
+    """Fits retrieved knowledge items into an input token budget"""
+
+    def __init__(
+        self,
+        token_budget: int = Config.CONTEXT_TOKEN_BUDGET,
+        min_item_tokens: int = Config.CONTEXT_MIN_ITEM_TOKENS,
+        max_items: int = 5,
+        model: str = Config.OPENAI_MODEL,
+    ):
+        self.token_budget = token_budget
+        self.min_item_tokens = min_item_tokens
+        self.max_items = max_items
+        self.model = model
+        # Load the tokenizer now instead of on the first request
+        _get_encoding(model)
+
+    def select(self, knowledge_items: List[KnowledgeItem]) -> List[KnowledgeItem]:
+        """Return the most relevant items that fit the budget, the last truncated"""
+        ranked = sorted(
+            knowledge_items, key=lambda item: item.relevance_score, reverse=True
+        )
+        selected = []
+        remaining = self.token_budget
+        for item in ranked[: self.max_items]:
+            tokens = self.count_item_tokens(item, len(selected) + 1)
+            if tokens <= remaining:
+                selected.append(item)
+                remaining -= tokens
+                continue
+            # Only the content is cut; the numbering and source still count
+            overhead = tokens - count_tokens(item.content, self.model)
+            content_budget = remaining - overhead
+            if content_budget >= self.min_item_tokens:
+                selected.append(
+                    item.model_copy(
+                        update={
+                            "content": truncate_to_tokens(
+                                item.content, content_budget, self.model
+                            )
+                        }
+                    )
+                )
+            break
+
+        if len(selected) < len(knowledge_items):
+            logger.debug(
+                "Context kept %d of %d knowledge items within %d tokens",
+                len(selected),
+                len(knowledge_items),
+                self.token_budget,
+            )
+        return selected
+
+    def count_item_tokens(self, item: KnowledgeItem, position: int) -> int:
+        """Count the tokens an item takes in the context"""
+        return count_tokens(self.format_item(item, position), self.model)
+
+    @staticmethod
+    def format_item(item: KnowledgeItem, position: int) -> str:
+        """Format an item as one numbered line of the context"""
+        return f"{position}. {item.content} (Source: {item.source})"
+
+    def build(self, knowledge_items: List[KnowledgeItem]) -> str:
+        """Return the knowledge context for the response prompt"""
+        return "\n".join(
+            self.format_item(item, position)
+            for position, item in enumerate(self.select(knowledge_items), 1)
+        )
@@ -0,0 +1,78 @@
+"""
+Micro-batching of embeddings calls across concurrent requests.
+
+Texts queued within a short window are sent in one call and each caller gets
+back its own vectors.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, List, Set, Tuple
+
+
+class EmbeddingBatcher:
+    """Collects concurrent embedding requests on an event loop into batches"""
+
+    def __init__(
+        self,
+        embed_fn: Callable[[List[str]], Awaitable[List[List[float]]]],
+        max_batch_size: int,
+        max_wait_ms: float,
+    ):
+        self.embed_fn = embed_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.batches_sent = 0
+        self._pending: List[Tuple[List[str], asyncio.Future]] = []
+        self._pending_count = 0
+        self._flush_handle = None
+        self._loop = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts as part of the next batch and return their vectors"""
+        if not texts:
+            return []
+
+        loop = asyncio.get_running_loop()
+        if self._loop is not None and self._loop.is_closed():
+            # The previous loop closed before its flush ran; its callers are gone
+            self._flush_handle = None
+            self._pending, self._pending_count = [], 0
+        self._loop = loop
+        future = loop.create_future()
+        self._pending.append((texts, future))
+        self._pending_count += len(texts)
+        if self._pending_count >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(
+                self.max_wait_ms / 1000, self._flush
+            )
+        return await future
+
+    def _flush(self):
+        """Send everything queued so far as one batch"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending, self._pending_count = self._pending, [], 0
+        if batch:
+            task = asyncio.ensure_future(self._send(batch))
+            # Keep a reference so the task is not garbage collected mid-flight
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: List[Tuple[List[str], asyncio.Future]]):
+        """Embed the unique texts of a batch and resolve each caller's future"""
+        texts = list(dict.fromkeys(text for texts, _ in batch for text in texts))
+        self.batches_sent += 1
+        try:
+            embeddings = dict(zip(texts, await self.embed_fn(texts)))
+            for caller_texts, future in batch:
+                # Callers may have been cancelled while the call was in flight
+                if not future.done():
+                    future.set_result([embeddings[text] for text in caller_texts])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
@@ -0,0 +1,234 @@
+"""
+Embedding of knowledge item content for index builds.
+
+Only content missing from the persistent EmbeddingStore is sent to the
+embeddings API, in checkpointed chunks embedded within the rate limits.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional
+
+import numpy as np
+import openai
+
+from .config import Config
+from .embedding_store import EmbeddingStore
+from .metrics import record_token_usage
+from .rate_limiter import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBuilder:
+    """Embeds texts through the persistent embedding store and the OpenAI API"""
+
+    def __init__(
+        self,
+        client: openai.OpenAI,
+        model: str,
+        embedding_store: EmbeddingStore,
+        checkpoint_path: str,
+    ):
+        self.client = client
+        self.model = model
+        self.embedding_store = embedding_store
+        self.checkpoint_path = checkpoint_path
+
+    def get_embeddings(
+        self, texts: List[str], checkpoint: bool = False
+    ) -> np.ndarray:
+        """Get embeddings from the persistent store, only embedding new content
+
+        Missing embeddings are fetched and stored EMBEDDING_CHECKPOINT_SIZE texts
+        at a time. With checkpoint=True, progress is also recorded in the build
+        checkpoint file when more than one chunk is needed.
+        """
+        embeddings = self.embedding_store.get_many(texts, self.model)
+        missing = sorted(
+            {text for text, emb in zip(texts, embeddings) if emb is None}
+        )
+        logger.info(
+            "Embedding store hits: %d, to embed: %d",
+            len(texts) - len(missing),
+            len(missing),
+        )
+        if not missing:
+            return np.array(embeddings, dtype="float32")
+
+        chunk_size = max(1, Config.EMBEDDING_CHECKPOINT_SIZE)
+        checkpoint = checkpoint and len(missing) > chunk_size
+        if checkpoint:
+            unique_texts = set(texts)
+            fingerprint = self._get_fingerprint(unique_texts)
+            self._resume_checkpoint(fingerprint)
+
+        by_text = {}
+        for i in range(0, len(missing), chunk_size):
+            chunk = missing[i : i + chunk_size]
+            fetched = self.fetch_embeddings(chunk)
+            self.embedding_store.put_many(chunk, fetched, self.model)
+            by_text.update(zip(chunk, fetched))
+            if checkpoint:
+                self._write_checkpoint(
+                    fingerprint,
+                    len(unique_texts),
+                    len(unique_texts) - len(missing) + len(by_text),
+                )
+
+        embeddings = [
+            by_text[text] if emb is None else emb
+            for text, emb in zip(texts, embeddings)
+        ]
+        return np.array(embeddings, dtype="float32")
+
+    def _get_fingerprint(self, texts) -> str:
+        """Identify a build by its embedding model and the content it embeds"""
+        digest = hashlib.sha256(self.model.encode("utf-8"))
+        for text in sorted(texts):
+            digest.update(b"\0" + text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _resume_checkpoint(self, fingerprint: str):
+        """Report where an interrupted build of the same content left off"""
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return
+        if (
+            isinstance(checkpoint, dict)
+            and checkpoint.get("fingerprint") == fingerprint
+        ):
+            logger.info(
+                "Resuming interrupted knowledge base build: %s/%s texts were "
+                "already embedded",
+                checkpoint.get("embedded"),
+                checkpoint.get("total"),
+            )
+        else:
+            logger.info(
+                "Ignoring build checkpoint for different knowledge base content"
+            )
+
+    def _write_checkpoint(self, fingerprint: str, total: int, embedded: int):
+        """Atomically record how many of a build's texts are stored"""
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "fingerprint": fingerprint,
+                    "model": self.model,
+                    "total": total,
+                    "embedded": embedded,
+                    "updated_at": time.time(),
+                },
+                f,
+            )
+        os.replace(tmp_path, self.checkpoint_path)
+        logger.info("Checkpoint: %d/%d texts embedded and stored", embedded, total)
+
+    def remove_checkpoint(self):
+        """Delete the build checkpoint once the index has been built"""
+        try:
+            os.remove(self.checkpoint_path)
+        except FileNotFoundError:
+            pass
+
+    def fetch_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Get OpenAI embeddings for a list of texts (batched)
+
+        Inputs spanning several batches, such as an index build, are embedded
+        by a pool of threads within the configured rate limits.
+        """
+        # OpenAI API allows up to 2048 tokens per request, batch if needed
+        batch_size = 50
+        batches = [
+            texts[i : i + batch_size] for i in range(0, len(texts), batch_size)
+        ]
+        if len(batches) > 1 and Config.EMBEDDING_BUILD_CONCURRENCY > 1:
+            return self._fetch_embeddings_parallel(batches)
+
+        all_embeddings = []
+        for batch in batches:
+            response = self.client.embeddings.create(input=batch, model=self.model)
+            record_token_usage("embedding", response.usage)
+            batch_embeddings = [d.embedding for d in response.data]
+            all_embeddings.extend(batch_embeddings)
+        return all_embeddings
+
+    def _fetch_embeddings_parallel(
+        self, batches: List[List[str]]
+    ) -> List[List[float]]:
+        """Embed batches concurrently, reporting progress and throughput"""
+        limiter = RateLimiter(
+            Config.EMBEDDING_REQUESTS_PER_MINUTE,
+            Config.EMBEDDING_TOKENS_PER_MINUTE,
+        )
+        # 429s are retried by _embed_batch_rate_limited so all threads back off
+        client = self.client.with_options(max_retries=0)
+        total = sum(len(batch) for batch in batches)
+        results: List[List[List[float]]] = [[] for _ in batches]
+        embedded = 0
+        start = last_report = time.monotonic()
+
+        with ThreadPoolExecutor(Config.EMBEDDING_BUILD_CONCURRENCY) as pool:
+            futures = {
+                pool.submit(
+                    self._embed_batch_rate_limited, client, limiter, batch
+                ): i
+                for i, batch in enumerate(batches)
+            }
+            try:
+                for future in as_completed(futures):
+                    i = futures[future]
+                    results[i] = future.result()
+                    embedded += len(batches[i])
+                    now = time.monotonic()
+                    if now - last_report >= 5 or embedded == total:
+                        last_report = now
+                        logger.info(
+                            "Embedded %d/%d texts (%.0f texts/s)",
+                            embedded,
+                            total,
+                            embedded / max(now - start, 1e-6),
+                        )
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+        return [embedding for batch in results for embedding in batch]
+
+    def _embed_batch_rate_limited(
+        self, client, limiter: RateLimiter, batch: List[str]
+    ) -> List[List[float]]:
+        """Embed one batch within the rate limits, retrying after 429 responses"""
+        # Roughly four characters per token for English text
+        tokens = sum(len(text) // 4 + 1 for text in batch)
+        retries = 0
+        while True:
+            limiter.acquire(tokens)
+            try:
+                response = client.embeddings.create(input=batch, model=self.model)
+            except openai.RateLimitError as e:
+                retries += 1
+                if retries > Config.EMBEDDING_MAX_RETRIES:
+                    raise
+                limiter.backoff(self._get_retry_after(e))
+                continue
+            limiter.record_success()
+            record_token_usage("embedding", response.usage)
+            return [d.embedding for d in response.data]
+
+    @staticmethod
+    def _get_retry_after(error: Exception) -> Optional[float]:
+        """Return the Retry-After delay of an API error in seconds, if given"""
+        response = getattr(error, "response", None)
+        try:
+            return float(response.headers.get("retry-after"))
+        except (AttributeError, TypeError, ValueError):
+            return None
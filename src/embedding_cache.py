@@ -0,0 +1,77 @@
+"""
+In-process cache for query embeddings.
+
+Embeddings are keyed by normalized query text and model, with LRU eviction and
+a time-to-live.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+
+class EmbeddingCache:
+    """Thread-safe LRU cache with TTL for query embeddings"""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: (
+            "OrderedDict[Tuple[str, str], Tuple[float, List[float]]]"
+        ) = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Normalize query text so trivial variations share a cache entry"""
+        return " ".join(text.lower().split())
+
+    def get(self, text: str, model: str) -> Optional[List[float]]:
+        """Return the cached embedding for a text, or None on a miss"""
+        key = (model, self.normalize(text))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (
+                self.ttl_seconds <= 0
+                or time.monotonic() - entry[0] < self.ttl_seconds
+            ):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            if entry is not None:
+                # Expired entry
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, text: str, model: str, embedding: List[float]):
+        """Store an embedding, evicting the least recently used entries"""
+        if self.max_size <= 0:
+            return
+
+        key = (model, self.normalize(text))
+        with self._lock:
+            self._entries[key] = (time.monotonic(), embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all cached embeddings"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
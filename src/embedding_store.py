@@ -0,0 +1,86 @@
+"""
+Persistent, content-addressed embedding store.
+
+Embeddings are stored in a SQLite database keyed by a hash of the embedding
+model and the item content, so rebuilding the knowledge base index only calls
+the embeddings API for items that are new or whose content changed.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import List, Optional
+
+import numpy as np
+
+
+class EmbeddingStore:
+    """On-disk embedding store keyed by content hash and model name"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def content_hash(text: str, model: str) -> str:
+        """Return the store key for a text embedded with a given model"""
+        return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use"""
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "hash TEXT PRIMARY KEY, model TEXT NOT NULL, vector BLOB NOT NULL)"
+            )
+        return self._connection
+
+    def get_many(self, texts: List[str], model: str) -> List[Optional[np.ndarray]]:
+        """Return stored embeddings for texts, with None for missing entries"""
+        keys = [self.content_hash(text, model) for text in texts]
+        found = {}
+        with self._lock:
+            connection = self._connect()
+            # Stay well below SQLite's bound parameter limit
+            for i in range(0, len(keys), 500):
+                batch = keys[i : i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = connection.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE hash IN ({placeholders})",
+                    batch,
+                )
+                for key, vector in rows:
+                    found[key] = np.frombuffer(vector, dtype="float32")
+        return [found.get(key) for key in keys]
+
+    def put_many(self, texts: List[str], embeddings, model: str):
+        """Store embeddings for texts, replacing any existing entries"""
+        rows = [
+            (
+                self.content_hash(text, model),
+                model,
+                np.asarray(embedding, dtype="float32").tobytes(),
+            )
+            for text, embedding in zip(texts, embeddings)
+        ]
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO embeddings (hash, model, vector) "
+                    "VALUES (?, ?, ?)",
+                    rows,
+                )
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
@@ -0,0 +1,237 @@
+"""
+End-to-end evaluation and latency benchmark for the help desk pipeline.
+
+Replays the labelled test requests (Config.TEST_REQUESTS_PATH) through
+IntelligentHelpDeskSystem and records a TestResult for each. The report has
+classification accuracy, escalation correctness, how many expected elements
+each response mentions, p50/p95/p99 latency for every pipeline stage and the
+overall throughput. Writing it to a JSON file lets releases be compared.
+
+Usage:
+    python -m src.evaluation --concurrency 4 --repeat 3 --output evaluation.json
+
+Every request calls the OpenAI API. With the response cache enabled, repeated
+passes measure cache hits rather than the full pipeline.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .config import Config
+from .local_classifier import load_labelled_requests
+from .logging_config import configure_logging
+from .models import HelpDeskRequest, HelpDeskResponse, TestResult
+from .stage_timing import collect_stage_timings
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (50, 95, 99)
+
+
+def load_test_cases(path: str) -> List[Dict]:
+    """Load test requests that have a request text and an expected category"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return [
+        entry
+        for entry in data.get("test_requests", [])
+        if entry.get("request") and entry.get("expected_classification")
+    ]
+
+
+def count_training_overlap(test_cases: List[Dict]) -> Optional[int]:
+    """Count test requests the local classifier was trained on, if it is used
+
+    Returns None when the local classifier is disabled or its training file
+    cannot be read; any overlap inflates the classification accuracy.
+    """
+    if not Config.LOCAL_CLASSIFIER_ENABLED:
+        return None
+    try:
+        training = load_labelled_requests(Config.LOCAL_CLASSIFIER_TRAINING_PATH)
+    except (OSError, ValueError):
+        return None
+    texts = {text for text, _, _ in training}
+    return sum(case["request"] in texts for case in test_cases)
+
+
+def score_response(test_case: Dict, response: HelpDeskResponse) -> TestResult:
+    """Compare a response with the expectations of its test case
+
+    An expected element counts as found when the response text mentions it,
+    ignoring case; the quality score is the fraction found.
+    """
+    expected_elements = test_case.get("expected_elements", [])
+    message = response.response_message.lower()
+    found_elements = [
+        element for element in expected_elements if element.lower() in message
+    ]
+    predicted = response.classification.category.value
+    return TestResult(
+        test_id=str(test_case.get("id", "")),
+        expected_category=test_case["expected_classification"],
+        predicted_category=predicted,
+        correct_classification=predicted == test_case["expected_classification"],
+        expected_elements=expected_elements,
+        found_elements=found_elements,
+        escalation_correct=response.classification.escalation_required
+        == bool(test_case.get("escalate", False)),
+        response_quality_score=(
+            len(found_elements) / len(expected_elements)
+            if expected_elements
+            else 1.0
+        ),
+    )
+
+
+async def run_test_case(system, test_case: Dict) -> Dict:
+    """Process one test case and return its result with stage latencies"""
+    request = HelpDeskRequest(
+        user_message=test_case["request"],
+        request_id=f"eval-{test_case.get('id', '')}",
+    )
+    with collect_stage_timings() as timings:
+        start = time.perf_counter()
+        response = await system.process_request_async(request)
+        timings["total"] = time.perf_counter() - start
+
+    record = score_response(test_case, response).model_dump()
+    record["latency_ms"] = {
+        stage: round(seconds * 1000, 3) for stage, seconds in timings.items()
+    }
+    return record
+
+
+def latency_percentiles(records: List[Dict]) -> Dict[str, Dict[str, float]]:
+    """Summarize the latency of every stage that was recorded"""
+    samples = defaultdict(list)
+    for record in records:
+        for stage, latency in record["latency_ms"].items():
+            samples[stage].append(latency)
+
+    summary = {}
+    for stage, latencies in samples.items():
+        stage_summary = {"count": len(latencies)}
+        for percentile in PERCENTILES:
+            stage_summary[f"p{percentile}_ms"] = round(
+                float(np.percentile(latencies, percentile)), 3
+            )
+        stage_summary["mean_ms"] = round(float(np.mean(latencies)), 3)
+        summary[stage] = stage_summary
+    return summary
+
+
+def summarize(records: List[Dict], elapsed: float) -> Dict:
+    """Aggregate per-request records into the evaluation summary"""
+    count = len(records)
+    per_category = defaultdict(lambda: {"count": 0, "correct": 0})
+    for record in records:
+        category = per_category[record["expected_category"]]
+        category["count"] += 1
+        category["correct"] += record["correct_classification"]
+
+    return {
+        "num_requests": count,
+        "classification_accuracy": round(
+            sum(r["correct_classification"] for r in records) / max(count, 1), 4
+        ),
+        "escalation_accuracy": round(
+            sum(r["escalation_correct"] for r in records) / max(count, 1), 4
+        ),
+        "mean_response_quality": round(
+            sum(r["response_quality_score"] for r in records) / max(count, 1), 4
+        ),
+        "category_accuracy": {
+            name: round(stats["correct"] / stats["count"], 4)
+            for name, stats in sorted(per_category.items())
+        },
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(count / max(elapsed, 1e-6), 3),
+        "latency": latency_percentiles(records),
+    }
+
+
+async def run_evaluation(
+    system, test_cases: List[Dict], concurrency: int = 1, repeat: int = 1
+) -> Dict:
+    """Replay the test cases through the system and return the report
+
+    With a concurrency of 1 the stage latencies are those of an idle system;
+    higher values measure throughput and latency under load.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_bounded(test_case: Dict) -> Dict:
+        async with semaphore:
+            return await run_test_case(system, test_case)
+
+    start = time.perf_counter()
+    records = await asyncio.gather(
+        *(run_bounded(case) for _ in range(repeat) for case in test_cases)
+    )
+    elapsed = time.perf_counter() - start
+
+    training_overlap = count_training_overlap(test_cases)
+    if training_overlap:
+        logger.warning(
+            "%d test requests are in the local classifier's training data",
+            training_overlap,
+        )
+    return {
+        "config": {
+            "model": Config.OPENAI_MODEL,
+            "embedding_model": Config.OPENAI_EMBEDDING_MODEL,
+            "vector_index_type": Config.VECTOR_INDEX_TYPE,
+            "local_classifier_enabled": Config.LOCAL_CLASSIFIER_ENABLED,
+            "local_classifier_training_path": (
+                Config.LOCAL_CLASSIFIER_TRAINING_PATH
+                if Config.LOCAL_CLASSIFIER_ENABLED
+                else None
+            ),
+            "local_classifier_training_overlap": training_overlap,
+            "concurrency": concurrency,
+            "repeat": repeat,
+        },
+        "summary": summarize(records, elapsed),
+        "results": records,
+    }
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--requests", default=Config.TEST_REQUESTS_PATH)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="Replay the test requests N times"
+    )
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    from .help_desk_system import IntelligentHelpDeskSystem
+
+    configure_logging()
+    system = IntelligentHelpDeskSystem()
+    report = asyncio.run(
+        run_evaluation(
+            system,
+            load_test_cases(args.requests),
+            max(1, args.concurrency),
+            max(1, args.repeat),
+        )
+    )
+    print(json.dumps(report["summary"], indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
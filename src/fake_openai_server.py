@@ -0,0 +1,340 @@
+"""
+Local OpenAI-compatible stand-in server for offline load testing.
+
+Serves /v1/chat/completions (including streaming) and /v1/embeddings with a
+configurable latency distribution and error rate, so the help desk service can
+be load tested without paying for or being rate limited by the real API.
+
+Embeddings are deterministic: the same text always gets the same normalized
+vector. Classification prompts are answered with valid classification JSON
+whose category is derived from the request text, and other chat completions
+with filler text of a configurable length.
+
+Usage:
+    python -m src.fake_openai_server --port 8001 --chat-latency-ms 800 --error-rate 0.01
+    OPENAI_BASE_URL=http://localhost:8001/v1 uvicorn src.app:app
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import re
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from .config import Config
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+CATEGORY_PATTERN = re.compile(r"^\s*- ([a-z_]+):", re.MULTILINE)
+USER_REQUEST_PATTERN = re.compile(r'User Request: "(.*)"', re.DOTALL)
+
+FILLER_WORDS = (
+    "please try restarting the application and check the self service portal "
+    "for step by step instructions before contacting IT support again"
+).split()
+
+
+class LatencyModel:
+    """Samples response delays in seconds from a latency distribution
+
+    "fixed" always waits mean_ms, "uniform" draws from [0, 2 * mean_ms],
+    "exponential" has mean mean_ms, and "lognormal" has median mean_ms with
+    the given sigma, which produces the long tail seen from real APIs.
+    """
+
+    def __init__(self, distribution: str, mean_ms: float, sigma: float, rng=None):
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(
+                f"Unknown latency distribution '{distribution}', expected one "
+                f"of {', '.join(LATENCY_DISTRIBUTIONS)}"
+            )
+        self.distribution = distribution
+        self.mean_ms = mean_ms
+        self.sigma = sigma
+        self.rng = rng or np.random.default_rng()
+
+    def sample(self) -> float:
+        """Return one delay in seconds"""
+        if self.mean_ms <= 0:
+            return 0.0
+        if self.distribution == "fixed":
+            delay_ms = self.mean_ms
+        elif self.distribution == "uniform":
+            delay_ms = self.rng.uniform(0, 2 * self.mean_ms)
+        elif self.distribution == "exponential":
+            delay_ms = self.rng.exponential(self.mean_ms)
+        else:
+            delay_ms = self.mean_ms * self.rng.lognormal(0, self.sigma)
+        return delay_ms / 1000
+
+
+def deterministic_embedding(text: str, dimension: int) -> np.ndarray:
+    """Return a normalized float32 vector seeded by the text's hash"""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    vector = (
+        np.random.default_rng(seed).standard_normal(dimension).astype("float32")
+    )
+    return vector / np.linalg.norm(vector)
+
+
+def count_tokens(text: str) -> int:
+    """Rough token count, about four characters per token"""
+    return max(1, len(text) // 4)
+
+
+def fake_completion_text(
+    messages: List[Dict[str, Any]], completion_words: int
+) -> str:
+    """Answer a chat prompt the way the help desk pipeline expects
+
+    Classification prompts list the categories as "- name: description" and
+    ask for JSON, so they get a classification for a category picked from the
+    hash of the user request.
+    """
+    prompt = str(messages[-1].get("content", "")) if messages else ""
+    categories = CATEGORY_PATTERN.findall(prompt)
+    if categories and '"category"' in prompt:
+        match = USER_REQUEST_PATTERN.search(prompt)
+        request_text = match.group(1) if match else prompt
+        digest = hashlib.sha256(request_text.encode("utf-8")).digest()
+        return json.dumps(
+            {
+                "category": categories[digest[0] % len(categories)],
+                "confidence": 0.9,
+                "reasoning": "Fake classification for load testing",
+                "escalate": digest[1] % 10 == 0,
+                "escalation_reason": None,
+            }
+        )
+    return " ".join(
+        FILLER_WORDS[i % len(FILLER_WORDS)] for i in range(completion_words)
+    )
+
+
+@dataclass
+class FakeServerOptions:
+    """Error injection and response shape of the fake server"""
+
+    error_rate: float = 0.0
+    error_status: int = 500
+    embedding_dimension: int = Config.OPENAI_EMBEDDING_DIMENSION
+    completion_words: int = 60
+    stream_chunk_ms: float = 20.0
+    seed: Optional[int] = None
+
+
+def create_app(
+    chat_latency: LatencyModel,
+    embedding_latency: LatencyModel,
+    options: Optional[FakeServerOptions] = None,
+) -> FastAPI:
+    """Create the fake OpenAI app with the given behaviour"""
+    options = options or FakeServerOptions()
+    fake_app = FastAPI(title="Fake OpenAI API")
+    rng = np.random.default_rng(options.seed)
+    fake_app.state.requests = {"chat": 0, "embeddings": 0, "errors": 0}
+
+    def injected_error() -> Optional[JSONResponse]:
+        """Return an error response for a fraction error_rate of calls"""
+        if options.error_rate <= 0 or rng.random() >= options.error_rate:
+            return None
+        fake_app.state.requests["errors"] += 1
+        headers = {"retry-after": "1"} if options.error_status == 429 else None
+        return JSONResponse(
+            status_code=options.error_status,
+            headers=headers,
+            content={
+                "error": {
+                    "message": "Injected error from the fake OpenAI server",
+                    "type": (
+                        "rate_limit_error"
+                        if options.error_status == 429
+                        else "server_error"
+                    ),
+                    "code": None,
+                }
+            },
+        )
+
+    @fake_app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        fake_app.state.requests["chat"] += 1
+        await asyncio.sleep(chat_latency.sample())
+        error = injected_error()
+        if error is not None:
+            return error
+
+        messages = body.get("messages", [])
+        text = fake_completion_text(messages, options.completion_words)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        model = body.get("model", Config.OPENAI_MODEL)
+        created = int(time.time())
+        prompt_tokens = sum(
+            count_tokens(str(message.get("content", ""))) for message in messages
+        )
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": count_tokens(text),
+            "total_tokens": prompt_tokens + count_tokens(text),
+        }
+
+        if body.get("stream"):
+            return StreamingResponse(
+                stream_chunks(completion_id, model, created, text, usage),
+                media_type="text/event-stream",
+            )
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": usage,
+        }
+
+    async def stream_chunks(
+        completion_id: str, model: str, created: int, text: str, usage: Dict
+    ) -> AsyncIterator[str]:
+        """Stream the completion word by word as server-sent events"""
+
+        def chunk(delta: Dict[str, Any], finish_reason=None, **extra) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [
+                    {"index": 0, "delta": delta, "finish_reason": finish_reason}
+                ],
+                **extra,
+            }
+            return f"data: {json.dumps(payload)}\n\n"
+
+        yield chunk({"role": "assistant", "content": ""})
+        for i, word in enumerate(text.split(" ")):
+            if i:
+                await asyncio.sleep(options.stream_chunk_ms / 1000)
+            yield chunk({"content": word if i == 0 else f" {word}"})
+        yield chunk({}, "stop", usage=usage)
+        yield "data: [DONE]\n\n"
+
+    @fake_app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        fake_app.state.requests["embeddings"] += 1
+        await asyncio.sleep(embedding_latency.sample())
+        error = injected_error()
+        if error is not None:
+            return error
+
+        texts = body.get("input", [])
+        if isinstance(texts, str):
+            texts = [texts]
+        dimension = int(body.get("dimensions") or options.embedding_dimension)
+        data = []
+        for index, text in enumerate(texts):
+            vector = deterministic_embedding(str(text), dimension)
+            # The OpenAI SDK asks for base64 unless a format is given
+            if body.get("encoding_format") == "base64":
+                embedding = base64.b64encode(vector.tobytes()).decode("ascii")
+            else:
+                embedding = vector.tolist()
+            data.append(
+                {"object": "embedding", "index": index, "embedding": embedding}
+            )
+
+        prompt_tokens = sum(count_tokens(str(text)) for text in texts)
+        return {
+            "object": "list",
+            "data": data,
+            "model": body.get("model", Config.OPENAI_EMBEDDING_MODEL),
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "total_tokens": prompt_tokens,
+            },
+        }
+
+    @fake_app.get("/stats")
+    async def stats():
+        return fake_app.state.requests
+
+    return fake_app
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument(
+        "--latency-distribution",
+        choices=LATENCY_DISTRIBUTIONS,
+        default="lognormal",
+    )
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--chat-latency-ms", type=float, default=800)
+    parser.add_argument("--embedding-latency-ms", type=float, default=60)
+    parser.add_argument(
+        "--stream-chunk-ms", type=float, default=20, help="Delay between tokens"
+    )
+    parser.add_argument("--completion-words", type=int, default=60)
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Fraction of calls that fail"
+    )
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument(
+        "--dim", type=int, default=Config.OPENAI_EMBEDDING_DIMENSION
+    )
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    rng = np.random.default_rng(args.seed)
+    uvicorn.run(
+        create_app(
+            LatencyModel(
+                args.latency_distribution,
+                args.chat_latency_ms,
+                args.latency_sigma,
+                rng,
+            ),
+            LatencyModel(
+                args.latency_distribution,
+                args.embedding_latency_ms,
+                args.latency_sigma,
+                rng,
+            ),
+            FakeServerOptions(
+                error_rate=args.error_rate,
+                error_status=args.error_status,
+                embedding_dimension=args.dim,
+                completion_words=args.completion_words,
+                stream_chunk_ms=args.stream_chunk_ms,
+                seed=args.seed,
+            ),
+        ),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
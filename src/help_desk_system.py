@@ -6,15 +6,32 @@ request classification, knowledge base retrieval, and response generation to
 provide comprehensive IT support responses.
 """
 
+import asyncio
+import logging
 import uuid
 from datetime import datetime
 
-from .models import HelpDeskRequest, HelpDeskResponse, SystemHealth
+from typing import Any, AsyncIterator, List, Optional, Tuple
+
+from .models import (
+    BatchItemResult,
+    ClassificationResult,
+    KnowledgeItem,
+    HelpDeskRequest,
+    HelpDeskResponse,
+    SystemHealth,
+)
 from .classifier import RequestClassifier
 from .knowledge_base import KnowledgeBaseManager
+from .local_classifier import LocalClassifier, load_labelled_requests
+from .response_cache import SemanticResponseCache
 from .response_generator import ResponseGenerator
+from .logging_config import set_request_id
+from .stage_timing import time_stage, timed
 from .config import Config
 
+logger = logging.getLogger(__name__)
+
 
 class IntelligentHelpDeskSystem:
     """Main intelligent help desk system that orchestrates all components"""
@@ -23,61 +40,419 @@ class IntelligentHelpDeskSystem:
         self.classifier = RequestClassifier()
         self.knowledge_base = KnowledgeBaseManager()
         self.response_generator = ResponseGenerator()
+        self.local_classifier = LocalClassifier(
+            Config.LOCAL_CLASSIFIER_TEMPERATURE
+        )
+        self.response_cache = SemanticResponseCache(
+            Config.RESPONSE_CACHE_SIZE, Config.RESPONSE_CACHE_MAX_DISTANCE
+        )
 
         # Initialize the system
         self._initialize_system()
 
     def _initialize_system(self):
         """Initialize the help desk system"""
-        print("Initializing Intelligent Help Desk System...")
+        logger.info("Initializing Intelligent Help Desk System...")
 
         # Load knowledge base
         self.knowledge_base.load_knowledge_base()
 
-        print("System initialization complete!")
+        # Parse the category definitions before the first request needs them
+        self.classifier.category_registry.snapshot()
+
+        if Config.LOCAL_CLASSIFIER_ENABLED:
+            self._train_local_classifier()
+
+        logger.info("System initialization complete!")
+
+    def _train_local_classifier(self):
+        """Train the local classifier from the labelled example requests"""
+        try:
+            examples = load_labelled_requests(
+                Config.LOCAL_CLASSIFIER_TRAINING_PATH
+            )
+            self.local_classifier.fit(
+                self.knowledge_base.embed_texts([text for text, _, _ in examples]),
+                [category for _, category, _ in examples],
+                [escalate for _, _, escalate in examples],
+            )
+            logger.info(
+                "Trained local classifier on %d labelled requests", len(examples)
+            )
+        except Exception as e:
+            logger.warning(
+                "Local classifier unavailable, using the LLM only: %s", e
+            )
 
     def process_request(self, request: HelpDeskRequest) -> HelpDeskResponse:
         """Process a help desk request through the complete pipeline"""
 
         # Generate request ID if not provided
-        if not request.request_id:
-            request.request_id = str(uuid.uuid4())
-
-        print(
-            f"Processing request {request.request_id}: {request.user_message[:50]}..."
-        )
+        self._ensure_request_id(request)
+        set_request_id(request.request_id)
 
         try:
             # Step 1: Classify the request
-            print("Step 1: Classifying request...")
-            classification = self.classifier.classify_request(request.user_message)
-            print(f"Classification: {classification.category.value}")
+            with time_stage("classification"):
+                classification = self.classifier.classify_request(
+                    request.user_message
+                )
+            logger.debug("Classification: %s", classification.category.value)
 
             # Step 2: Retrieve relevant knowledge
-            print("Step 2: Retrieving relevant knowledge...")
-            knowledge_items = self.knowledge_base.search_knowledge(
-                request.user_message,
-                category=classification.category.value,
+            with time_stage("retrieval"):
+                knowledge_items = self.knowledge_base.search_knowledge(
+                    request.user_message,
+                    category=classification.category.value,
+                    top_k=int(Config.MAX_RETRIEVAL_RESULTS),
+                )
+            logger.debug("Retrieved %d knowledge items", len(knowledge_items))
+
+            # Step 3: Generate response
+            with time_stage("generation"):
+                response = self.response_generator.generate_response(
+                    request.user_message,
+                    classification,
+                    knowledge_items,
+                    request.request_id,
+                )
+
+            logger.info(
+                "Request processed",
+                extra={"category": response.classification.category.value},
+            )
+            return response
+
+        except Exception as e:
+            logger.exception("Error processing request: %s", e)
+            # Return error response
+            return self._create_error_response(request.request_id, str(e))
+
+    async def process_request_async(
+        self, request: HelpDeskRequest
+    ) -> HelpDeskResponse:
+        """Process a help desk request without blocking the event loop"""
+
+        self._ensure_request_id(request)
+        set_request_id(request.request_id)
+
+        try:
+            classification, knowledge_items = (
+                await self._classify_and_retrieve_async(request)
+            )
+
+            query_embedding, cached = await self._lookup_cached_response(
+                request, classification
+            )
+            if cached is not None:
+                return cached
+
+            with time_stage("generation"):
+                response = await self.response_generator.generate_response_async(
+                    request.user_message,
+                    classification,
+                    knowledge_items,
+                    request.request_id,
+                )
+            self._cache_response(query_embedding, response, knowledge_items)
+
+            logger.info(
+                "Request processed",
+                extra={"category": response.classification.category.value},
+            )
+            return response
+
+        except Exception as e:
+            logger.exception("Error processing request: %s", e)
+            return self._create_error_response(request.request_id, str(e))
+
+    async def stream_request_async(
+        self, request: HelpDeskRequest
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Process a request, yielding events as soon as each is available
+
+        Yields ("classification", ClassificationResult) first, then
+        ("token", str) for each response chunk from the LLM, and finally
+        ("done", HelpDeskResponse) with the assembled response.
+        """
+        self._ensure_request_id(request)
+        set_request_id(request.request_id)
+
+        try:
+            classification, knowledge_items = (
+                await self._classify_and_retrieve_async(request)
+            )
+            query_embedding, cached = await self._lookup_cached_response(
+                request, classification
+            )
+        except Exception as e:
+            logger.exception("Error processing request: %s", e)
+            yield "done", self._create_error_response(request.request_id, str(e))
+            return
+
+        yield "classification", classification
+
+        if cached is not None:
+            yield "token", cached.response_message
+            yield "done", cached
+            return
+
+        chunks = []
+        with time_stage("generation"):
+            async for chunk in self.response_generator.stream_response_async(
+                request.user_message, classification, knowledge_items
+            ):
+                chunks.append(chunk)
+                yield "token", chunk
+
+        response = HelpDeskResponse(
+            request_id=request.request_id,
+            classification=classification,
+            response_message="".join(chunks).strip(),
+        )
+        self._cache_response(query_embedding, response, knowledge_items)
+        logger.info(
+            "Request streamed",
+            extra={"category": response.classification.category.value},
+        )
+        yield "done", response
+
+    async def _classify_and_retrieve_async(
+        self, request: HelpDeskRequest
+    ) -> Tuple[ClassificationResult, List[KnowledgeItem]]:
+        """Classify a request and retrieve the knowledge for its category"""
+        classification = await self._classify_locally_async(request)
+        if classification is not None:
+            knowledge_items = await timed(
+                "retrieval",
+                self.knowledge_base.search_knowledge_async(
+                    request.user_message,
+                    category=classification.category.value,
+                    top_k=int(Config.MAX_RETRIEVAL_RESULTS),
+                ),
+            )
+        elif Config.PARALLEL_RETRIEVAL and not (
+            # A strong keyword match needs no query embedding at all
+            Config.LEXICAL_SHORTCUT
+            and self.knowledge_base.can_answer_lexically(request.user_message)
+        ):
+            # Embed the query while the classification call is in flight, so
+            # only the search is left on the critical path as retrieval time
+            classification, query_embeddings = await asyncio.gather(
+                timed(
+                    "classification",
+                    self.classifier.classify_request_async(request.user_message),
+                ),
+                self.knowledge_base.embed_query_variants_async(
+                    request.user_message
+                ),
+            )
+            logger.debug("Classification: %s", classification.category.value)
+
+            with time_stage("retrieval"):
+                knowledge_items = self.knowledge_base.search_with_query_embeddings(
+                    request.user_message,
+                    query_embeddings,
+                    category=classification.category.value,
+                    top_k=int(Config.MAX_RETRIEVAL_RESULTS),
+                )
+        else:
+            classification = await timed(
+                "classification",
+                self.classifier.classify_request_async(request.user_message),
+            )
+            logger.debug("Classification: %s", classification.category.value)
+
+            knowledge_items = await timed(
+                "retrieval",
+                self.knowledge_base.search_knowledge_async(
+                    request.user_message,
+                    category=classification.category.value,
+                    top_k=int(Config.MAX_RETRIEVAL_RESULTS),
+                ),
+            )
+        logger.debug("Retrieved %d knowledge items", len(knowledge_items))
+        return classification, knowledge_items
+
+    async def _lookup_cached_response(
+        self, request: HelpDeskRequest, classification: ClassificationResult
+    ) -> Tuple[Optional[List[float]], Optional[HelpDeskResponse]]:
+        """Return the query embedding and a cached response for a paraphrase
+
+        The raw query embedding is normally already in the embedding cache from
+        retrieval, so the lookup does not add an embeddings call. Requests that
+        need escalation are neither served from nor stored in the cache, since
+        their response has to name the escalation contact.
+        """
+        if not Config.RESPONSE_CACHE_ENABLED or classification.escalation_required:
+            return None, None
+
+        with time_stage("response_cache"):
+            query_embedding = await self.knowledge_base.embed_query_async(
+                request.user_message
+            )
+        cached = self.response_cache.get(
+            classification.category.value,
+            query_embedding,
+            self.knowledge_base.index_version,
+        )
+        if cached is None:
+            return query_embedding, None
+
+        logger.debug("Serving request from the response cache")
+        return query_embedding, cached.model_copy(
+            update={
+                "request_id": request.request_id,
+                "classification": classification,
+            }
+        )
+
+    def _cache_response(
+        self,
+        query_embedding: Optional[List[float]],
+        response: HelpDeskResponse,
+        knowledge_items: List[KnowledgeItem],
+    ):
+        """Cache a generated response, skipping templated fallbacks"""
+        if (
+            query_embedding is None
+            or not knowledge_items
+            or self.response_generator.is_fallback_response(response)
+        ):
+            return
+
+        self.response_cache.put(
+            response.classification.category.value,
+            query_embedding,
+            response,
+            self.knowledge_base.index_version,
+        )
+
+    async def _classify_locally_async(
+        self, request: HelpDeskRequest
+    ) -> Optional[ClassificationResult]:
+        """Classify with the local model, or return None to fall back to the LLM
+
+        The raw query embedding is cached, so retrieval reuses it afterwards.
+        """
+        if not self.local_classifier.is_trained:
+            return None
+
+        with time_stage("local_classification"):
+            classification = self.local_classifier.classify(
+                await self.knowledge_base.embed_query_async(request.user_message),
+                Config.LOCAL_CLASSIFIER_THRESHOLD,
+            )
+        if classification is not None:
+            logger.debug(
+                "Classification (local): %s", classification.category.value
+            )
+        return classification
+
+    async def process_requests_async(
+        self, requests: List[HelpDeskRequest], max_concurrency: int = None
+    ) -> List[BatchItemResult]:
+        """Process a batch of requests, reporting errors per item and in order
+
+        All queries are embedded in one embeddings call while the requests are
+        classified, knowledge is retrieved with one multi-query search per
+        category, and the LLM calls run with bounded concurrency.
+        """
+        semaphore = asyncio.Semaphore(
+            max_concurrency or Config.BATCH_MAX_CONCURRENCY
+        )
+        for request in requests:
+            self._ensure_request_id(request)
+
+        query_embeddings, *classifications = await asyncio.gather(
+            self.knowledge_base.embed_query_variants_batch_async(
+                [request.user_message for request in requests]
+            ),
+            *(self._classify_in_batch(request, semaphore) for request in requests),
+            return_exceptions=True,
+        )
+
+        results = [BatchItemResult(index=i) for i in range(len(requests))]
+        pending = []
+        for i, classification in enumerate(classifications):
+            if isinstance(classification, Exception):
+                results[i].error = f"Classification failed: {classification}"
+            elif isinstance(query_embeddings, Exception):
+                results[i].error = (
+                    f"Knowledge retrieval failed: {query_embeddings}"
+                )
+            else:
+                pending.append(i)
+
+        try:
+            knowledge = self.knowledge_base.search_batch_with_query_embeddings(
+                [requests[i].user_message for i in pending],
+                [query_embeddings[i] for i in pending],
+                [classifications[i].category.value for i in pending],
                 top_k=int(Config.MAX_RETRIEVAL_RESULTS),
             )
-            print(f"Retrieved {len(knowledge_items)} knowledge items")
+        except Exception as e:
+            logger.exception("Batch knowledge retrieval failed: %s", e)
+            for i in pending:
+                results[i].error = f"Knowledge retrieval failed: {e}"
+            pending, knowledge = [], []
 
-            # Step 3: Generate response
-            print("Step 3: Generating response...")
-            response = self.response_generator.generate_response(
+        responses = await asyncio.gather(
+            *(
+                self._generate_in_batch(
+                    requests[i], classifications[i], items, semaphore
+                )
+                for i, items in zip(pending, knowledge)
+            ),
+            return_exceptions=True,
+        )
+        for i, response in zip(pending, responses):
+            if isinstance(response, Exception):
+                results[i].error = f"Response generation failed: {response}"
+            else:
+                results[i].response = response
+
+        logger.info("Processed batch of %d requests", len(requests))
+        return results
+
+    async def _classify_in_batch(
+        self, request: HelpDeskRequest, semaphore: asyncio.Semaphore
+    ) -> ClassificationResult:
+        """Classify one request of a batch within the batch's concurrency limit"""
+        # Each gathered task has its own context, so logs carry its ID
+        set_request_id(request.request_id)
+        async with semaphore:
+            return await self.classifier.classify_request_async(
+                request.user_message
+            )
+
+    async def _generate_in_batch(
+        self,
+        request: HelpDeskRequest,
+        classification: ClassificationResult,
+        knowledge_items: List[KnowledgeItem],
+        semaphore: asyncio.Semaphore,
+    ) -> HelpDeskResponse:
+        """Generate the response to one request of a batch"""
+        set_request_id(request.request_id)
+        async with semaphore:
+            return await self.response_generator.generate_response_async(
                 request.user_message,
                 classification,
                 knowledge_items,
                 request.request_id,
             )
 
-            print(f"Request {request.request_id} processed successfully")
-            return response
+    def _ensure_request_id(self, request: HelpDeskRequest):
+        """Assign a request ID if the caller did not provide one"""
+        if not request.request_id:
+            request.request_id = str(uuid.uuid4())
 
-        except Exception as e:
-            print(f"Error processing request: {e}")
-            # Return error response
-            return self._create_error_response(request.request_id, str(e))
+        logger.debug(
+            "Processing request %s: %s...",
+            request.request_id,
+            request.user_message[:50],
+        )
 
     def _create_error_response(
         self, request_id: str, error_message: str
@@ -0,0 +1,139 @@
+"""
+Recall and latency benchmark for the configurable vector index types.
+
+Builds every index type on synthetic, clustered knowledge bases, then reports
+recall@k against the exact flat index together with p50/p99 single-query search
+latency. Index parameters come from Config, so the same environment variables
+used by the service (IVF_NPROBE, HNSW_EF_SEARCH, ...) can be swept here.
+
+Usage:
+    python -m src.index_benchmark --sizes 10000,100000,1000000 --output bench.json
+
+Note that 1M items at 1536 dimensions need about 6GB of RAM per copy of the
+vectors; use --dim to benchmark smaller embeddings.
+"""
+
+import argparse
+import json
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from .config import Config
+from .vector_index import INDEX_TYPES, build_vector_index, create_search_params
+
+
+def generate_synthetic_kb(
+    num_items: int, dimension: int, num_queries: int, seed: int = 0
+):
+    """Generate normalized, clustered item and query embeddings
+
+    Real embeddings cluster by topic, so items are drawn around random centres
+    rather than uniformly, and queries are perturbed copies of existing items.
+    """
+    rng = np.random.default_rng(seed)
+    num_clusters = max(1, int(np.sqrt(num_items)))
+    centres = rng.standard_normal((num_clusters, dimension), dtype="float32")
+
+    items = np.empty((num_items, dimension), dtype="float32")
+    chunk = 50_000
+    for start in range(0, num_items, chunk):
+        end = min(start + chunk, num_items)
+        assignment = rng.integers(0, num_clusters, end - start)
+        items[start:end] = centres[assignment] + 0.5 * rng.standard_normal(
+            (end - start, dimension), dtype="float32"
+        )
+    items /= np.linalg.norm(items, axis=1, keepdims=True)
+
+    sources = rng.integers(0, num_items, num_queries)
+    queries = items[sources] + 0.05 * rng.standard_normal(
+        (num_queries, dimension), dtype="float32"
+    )
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return items, queries
+
+
+def benchmark_index(
+    index_type: str,
+    items: np.ndarray,
+    queries: np.ndarray,
+    ground_truth: np.ndarray,
+    k: int,
+) -> Dict[str, float]:
+    """Build one index type and measure recall@k and search latency"""
+    start = time.perf_counter()
+    index = build_vector_index(items, np.arange(len(items)), index_type)
+    build_seconds = time.perf_counter() - start
+    params = create_search_params(index)
+
+    latencies = []
+    hits = 0
+    for query, truth in zip(queries, ground_truth):
+        start = time.perf_counter()
+        _, labels = index.search(query.reshape(1, -1), k, params=params)
+        latencies.append(time.perf_counter() - start)
+        hits += len(set(labels[0].tolist()) & set(truth.tolist()))
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "index_type": index_type,
+        "num_items": len(items),
+        "build_seconds": round(build_seconds, 3),
+        f"recall_at_{k}": round(hits / (len(queries) * k), 4),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 4),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 4),
+    }
+
+
+def run_benchmark(
+    sizes: List[int],
+    index_types: List[str],
+    dimension: int,
+    num_queries: int,
+    k: int,
+) -> List[Dict[str, float]]:
+    """Run the benchmark for every KB size and index type"""
+    results = []
+    for size in sizes:
+        items, queries = generate_synthetic_kb(size, dimension, num_queries)
+
+        # Exact results from the flat index are the recall reference
+        exact = build_vector_index(items, np.arange(size), "flat")
+        _, ground_truth = exact.search(queries, k)
+        del exact
+
+        for index_type in index_types:
+            result = benchmark_index(index_type, items, queries, ground_truth, k)
+            print(json.dumps(result))
+            results.append(result)
+    return results
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--types", default=",".join(INDEX_TYPES))
+    parser.add_argument(
+        "--dim", type=int, default=Config.OPENAI_EMBEDDING_DIMENSION
+    )
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run_benchmark(
+        [int(size) for size in args.sizes.split(",")],
+        args.types.split(","),
+        args.dim,
+        args.queries,
+        args.k,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Columnar, memory-mapped storage for knowledge items.
+
+Fields are stored as flat binary columns that are mapped on open and decoded
+into KnowledgeItem objects on access.
+"""
+
+import contextlib
+import json
+import os
+import shutil
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from .models import KnowledgeItem
+
+TEXT_FIELDS = ("content", "source")
+
+
+class KnowledgeItemStore:
+    """List-like, lazily decoded view over a saved set of knowledge items
+
+    Positions are item IDs. Deleted items read as None. Items added or replaced
+    after opening live in an in-memory overlay until the store is saved again.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self._base_length = meta["length"]
+        self._category_names: List[str] = meta["categories"]
+        self._present = self._load_array("present.npy")
+        self._category_codes = self._load_array("category_codes.npy")
+        self._columns = {
+            field: (
+                self._load_array(f"{field}.offsets.npy"),
+                self._load_blob(f"{field}.bin"),
+            )
+            for field in TEXT_FIELDS
+        }
+        self._overlay: Dict[int, Optional[KnowledgeItem]] = {}
+        self._length = self._base_length
+
+    def _load_array(self, name: str) -> np.ndarray:
+        """Memory-map a saved numpy array"""
+        return np.load(os.path.join(self.path, name), mmap_mode="r")
+
+    def _load_blob(self, name: str):
+        """Memory-map a raw UTF-8 blob (empty blobs cannot be mapped)
+
+        The map stays open for the lifetime of the store and is closed when
+        the store is garbage collected; a new save never writes to it.
+        """
+        path = os.path.join(self.path, name)
+        if os.path.getsize(path) == 0:
+            return b""
+        return np.memmap(path, dtype="uint8", mode="r")
+
+    def _read_text(self, field: str, index: int) -> str:
+        """Decode one text value from a column"""
+        offsets, blob = self._columns[field]
+        return bytes(blob[offsets[index] : offsets[index + 1]]).decode("utf-8")
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: int) -> Optional[KnowledgeItem]:
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("knowledge item index out of range")
+        if index in self._overlay:
+            return self._overlay[index]
+        if not self._present[index]:
+            return None
+
+        code = int(self._category_codes[index])
+        return KnowledgeItem(
+            content=self._read_text("content", index),
+            source=self._read_text("source", index),
+            relevance_score=0.0,
+            category=self._category_names[code] if code >= 0 else None,
+            item_id=index,
+        )
+
+    def __setitem__(self, index: int, item: Optional[KnowledgeItem]):
+        if not 0 <= index < self._length:
+            raise IndexError("knowledge item index out of range")
+        self._overlay[index] = item
+
+    def __iter__(self) -> Iterator[Optional[KnowledgeItem]]:
+        for index in range(self._length):
+            yield self[index]
+
+    def append(self, item: Optional[KnowledgeItem]):
+        """Add an item at the next position"""
+        self._overlay[self._length] = item
+        self._length += 1
+
+    def ids_by_category(self) -> Dict[Optional[str], np.ndarray]:
+        """Group live item IDs by category without decoding whole records"""
+        codes = np.asarray(self._category_codes)
+        live = np.asarray(self._present, dtype=bool).copy()
+        overlaid = np.fromiter(
+            (i for i in self._overlay if i < self._base_length), dtype="int64"
+        )
+        live[overlaid] = False
+
+        groups: Dict[Optional[str], List[np.ndarray]] = {}
+        for code in np.unique(codes[live]):
+            name = self._category_names[code] if code >= 0 else None
+            groups.setdefault(name, []).append(
+                np.flatnonzero(live & (codes == code))
+            )
+        for index, item in self._overlay.items():
+            if item is not None:
+                groups.setdefault(item.category, []).append(
+                    np.array([index], dtype="int64")
+                )
+        return {
+            name: np.concatenate(parts).astype("int64")
+            for name, parts in groups.items()
+        }
+
+    @staticmethod
+    def save(path: str, items: Sequence[Optional[KnowledgeItem]]):
+        """Write items as a columnar store, replacing any existing store at path"""
+        tmp_path = f"{path}.tmp"
+        if os.path.exists(tmp_path):
+            shutil.rmtree(tmp_path)
+        os.makedirs(tmp_path)
+
+        present, category_codes, category_names, offsets = (
+            KnowledgeItemStore._write_columns(tmp_path, items)
+        )
+        np.save(os.path.join(tmp_path, "present.npy"), present)
+        np.save(os.path.join(tmp_path, "category_codes.npy"), category_codes)
+        for field in TEXT_FIELDS:
+            np.save(
+                os.path.join(tmp_path, f"{field}.offsets.npy"),
+                np.array(offsets[field], dtype="int64"),
+            )
+        with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"length": len(items), "categories": category_names}, f)
+
+        # Swap directories so readers never see a half-written store; files that
+        # are still memory-mapped stay valid after being unlinked
+        old_path = f"{path}.old"
+        if os.path.exists(path):
+            if os.path.exists(old_path):
+                shutil.rmtree(old_path)
+            os.rename(path, old_path)
+        os.rename(tmp_path, path)
+        if os.path.exists(old_path):
+            shutil.rmtree(old_path)
+
+    @staticmethod
+    def _write_columns(tmp_path: str, items: Sequence[Optional[KnowledgeItem]]):
+        """Write the text blobs and return the presence, category and offset columns"""
+        category_names: List[str] = []
+        category_lookup: Dict[str, int] = {}
+        present = np.zeros(len(items), dtype=bool)
+        category_codes = np.full(len(items), -1, dtype="int32")
+        offsets = {field: [0] for field in TEXT_FIELDS}
+        with contextlib.ExitStack() as stack:
+            blobs = {
+                field: stack.enter_context(
+                    open(os.path.join(tmp_path, f"{field}.bin"), "wb")
+                )
+                for field in TEXT_FIELDS
+            }
+            for index, item in enumerate(items):
+                if item is not None:
+                    present[index] = True
+                    if item.category is not None:
+                        if item.category not in category_lookup:
+                            category_lookup[item.category] = len(category_names)
+                            category_names.append(item.category)
+                        category_codes[index] = category_lookup[item.category]
+                for field in TEXT_FIELDS:
+                    data = (
+                        getattr(item, field).encode("utf-8")
+                        if item is not None
+                        else b""
+                    )
+                    blobs[field].write(data)
+                    offsets[field].append(offsets[field][-1] + len(data))
+        return present, category_codes, category_names, offsets
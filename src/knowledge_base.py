@@ -2,48 +2,125 @@
 
 import os
 import json
+import logging
 import re
-from typing import List
-import openai
+import threading
+from typing import Dict, List, Optional, Tuple
 import numpy as np
 import faiss
-from .models import KnowledgeItem
+from .models import KnowledgeItem, RequestCategory
+from .bm25 import BM25Index, fuse_scores
 from .config import Config
+from .metrics import record_token_usage
+from .openai_client import get_async_openai_client, get_openai_client
+from .embedding_batcher import EmbeddingBatcher
+from .embedding_builder import EmbeddingBuilder
+from .embedding_cache import EmbeddingCache
+from .embedding_store import EmbeddingStore
+from .item_store import KnowledgeItemStore
+from .stage_timing import time_stage
+from .vector_index import (
+    build_vector_index,
+    create_search_params,
+    supports_removal,
+)
+
+logger = logging.getLogger(__name__)
 
 
 class KnowledgeBaseManager:
     """Manages the knowledge base for intelligent help desk system"""
 
     def __init__(self):
-        self.client = openai.OpenAI(api_key=Config.OPENAI_API_KEY)
+        self.async_client = get_async_openai_client()
         self.knowledge_items: List[KnowledgeItem] = []
         self.vector_index = None
+        self.lexical_index: Optional[BM25Index] = None
         self.categories = {}
         self.troubleshooting_steps = {}
         self.installation_guides = {}
         self.embedding_model = Config.OPENAI_EMBEDDING_MODEL
         self.embedding_dim = Config.OPENAI_EMBEDDING_DIMENSION
+        self.embedding_cache = EmbeddingCache(
+            Config.EMBEDDING_CACHE_SIZE, Config.EMBEDDING_CACHE_TTL
+        )
+        self.embedding_batcher = EmbeddingBatcher(
+            self._get_openai_embeddings_async,
+            Config.EMBEDDING_BATCH_MAX_SIZE,
+            Config.EMBEDDING_BATCH_WINDOW_MS,
+        )
         self.index_path = os.path.join(
             Config.KNOWLEDGE_BASE_DIR, "knowledge_base_index.faiss"
         )
         self.items_path = os.path.join(
             Config.KNOWLEDGE_BASE_DIR, "knowledge_items.json"
         )
+        self.items_store_path = os.path.join(
+            Config.KNOWLEDGE_BASE_DIR, "knowledge_items"
+        )
+        self._index_mmapped = False
+        self.changes_path = os.path.join(
+            Config.KNOWLEDGE_BASE_DIR, "knowledge_changes.jsonl"
+        )
+        # Incremented whenever the indexed knowledge changes
+        self.index_version = 0
+        # Serializes live edits and snapshots; searches never wait on it
+        self._edit_lock = threading.RLock()
+        # Held by searches and by the short sections that swap or mutate the index
+        self._index_lock = threading.RLock()
+        self._request_categories = {category.value for category in RequestCategory}
+        self._category_selectors = {}
+        self._category_selectors_version = None
+        self.embedding_builder = EmbeddingBuilder(
+            get_openai_client(),
+            self.embedding_model,
+            EmbeddingStore(
+                os.path.join(Config.KNOWLEDGE_BASE_DIR, "embedding_store.sqlite3")
+            ),
+            os.path.join(Config.KNOWLEDGE_BASE_DIR, "build_checkpoint.json"),
+        )
+
+    def load_knowledge_base(self, rebuild: bool = False):
+        """Load all knowledge base documents and create or load vector embeddings
 
-    def load_knowledge_base(self):
-        """Load all knowledge base documents and create or load vector embeddings"""
-        print("Loading knowledge base...")
+        With rebuild=True the saved index is ignored and every source is parsed
+        again; only new or changed items are sent to the embeddings API. A
+        rebuild assigns fresh item IDs and discards live edits made through
+        add/update/delete_knowledge_item.
+        """
+        logger.info("Loading knowledge base...")
         # Try to load saved index and items
-        if os.path.exists(self.index_path) and os.path.exists(self.items_path):
-            print("Loading saved FAISS index and knowledge items...")
-            self.vector_index = faiss.read_index(self.index_path)
-            with open(self.items_path, "r", encoding="utf-8") as f:
-                items_data = json.load(f)
-                self.knowledge_items = [
-                    KnowledgeItem(**item) for item in items_data
-                ]
-            print(f"Loaded {len(self.knowledge_items)} items from disk.")
+        if (
+            not rebuild
+            and os.path.exists(self.index_path)
+            and (
+                os.path.isdir(self.items_store_path)
+                or os.path.exists(self.items_path)
+            )
+        ):
+            logger.info("Loading saved FAISS index and knowledge items...")
+            self.vector_index = self._read_index()
+            if os.path.isdir(self.items_store_path):
+                # Items are decoded lazily from the memory-mapped columns
+                self.knowledge_items = KnowledgeItemStore(self.items_store_path)
+            else:
+                # Knowledge bases saved before the binary item store
+                with open(self.items_path, "r", encoding="utf-8") as f:
+                    items_data = json.load(f)
+                    self.knowledge_items = [
+                        KnowledgeItem(**item) if item else None
+                        for item in items_data
+                    ]
+                for item_id, item in enumerate(self.knowledge_items):
+                    if item is not None:
+                        item.item_id = item_id
+            logger.info("Loaded %d items from disk.", len(self.knowledge_items))
+
+            # Apply live edits made since the last save
+            self._replay_changes()
         else:
+            self.knowledge_items = []
+
             # Load categories
             with open(Config.CATEGORIES_PATH, "r", encoding="utf-8") as f:
                 self.categories = json.load(f)["categories"]
@@ -72,12 +149,258 @@ class KnowledgeBaseManager:
             self._create_vector_embeddings()
 
             # Save index and items
-            faiss.write_index(self.vector_index, self.index_path)
-            with open(self.items_path, "w", encoding="utf-8") as f:
-                json.dump([item.dict() for item in self.knowledge_items], f)
-            print(
-                f"Knowledge base loaded and saved with {len(self.knowledge_items)} items."
+            self.save_knowledge_base()
+            logger.info(
+                "Knowledge base loaded and saved with %d items.",
+                len(self.knowledge_items),
             )
+        if Config.HYBRID_SEARCH or Config.LEXICAL_SHORTCUT:
+            self._build_lexical_index()
+        self.index_version += 1
+
+    def _build_lexical_index(self):
+        """Build the BM25 index over the content of every live item"""
+        index = BM25Index()
+        for item_id, item in enumerate(self.knowledge_items):
+            if item is not None:
+                index.add(
+                    item_id, item.content, self._category_group(item.category)
+                )
+        self.lexical_index = index
+        logger.info("Built lexical index over %d items", len(index))
+
+    def _update_lexical_index(self, item_id: int, item: Optional[KnowledgeItem]):
+        """Keep the BM25 index in step with a live edit"""
+        if self.lexical_index is None:
+            return
+        if item is None:
+            self.lexical_index.remove(item_id)
+        else:
+            self.lexical_index.add(
+                item_id, item.content, self._category_group(item.category)
+            )
+
+    def _read_index(self):
+        """Read the saved index, memory-mapping its vectors when enabled"""
+        self._index_mmapped = False
+        if Config.MMAP_INDEX:
+            try:
+                index = faiss.read_index(self.index_path, faiss.IO_FLAG_MMAP_IFC)
+                self._index_mmapped = True
+                return index
+            except RuntimeError as e:
+                logger.warning(
+                    "Could not memory-map index, reading it instead: %s", e
+                )
+        return faiss.read_index(self.index_path)
+
+    def save_knowledge_base(self):
+        """Write a full snapshot of the index and items and clear the change log
+
+        Edits wait for the snapshot, but searches keep running: the index and
+        items are only read while they are written out.
+        """
+        with self._edit_lock:
+            # Write to a temporary file first: the current index may be
+            # memory-mapped from index_path
+            tmp_index_path = f"{self.index_path}.tmp"
+            faiss.write_index(self.vector_index, tmp_index_path)
+            os.replace(tmp_index_path, self.index_path)
+            KnowledgeItemStore.save(self.items_store_path, self.knowledge_items)
+            items = KnowledgeItemStore(self.items_store_path)
+            with self._index_lock:
+                self.knowledge_items = items
+            if os.path.exists(self.changes_path):
+                os.remove(self.changes_path)
+
+    def add_knowledge_item(
+        self, content: str, source: str, category: str = None
+    ) -> KnowledgeItem:
+        """Add a knowledge item to the live index and return it with its ID"""
+        embedding = self.embedding_builder.get_embeddings([content])
+        with self._edit_lock:
+            item = KnowledgeItem(
+                content=content,
+                source=source,
+                relevance_score=0.0,
+                category=category,
+                item_id=len(self.knowledge_items),
+            )
+            self._ensure_mutable_index()
+            with self._index_lock:
+                self.vector_index.add_with_ids(
+                    embedding, np.array([item.item_id], dtype="int64")
+                )
+                self.knowledge_items.append(item)
+                self._update_lexical_index(item.item_id, item)
+                self.index_version += 1
+            self._record_change({"op": "upsert", "item": item.model_dump()})
+        return item
+
+    def update_knowledge_item(
+        self, item_id: int, content: str, source: str, category: str = None
+    ) -> KnowledgeItem:
+        """Replace the content and vector of a knowledge item, keeping its ID"""
+        self._get_live_item(item_id)
+        embedding = self.embedding_builder.get_embeddings([content])
+        with self._edit_lock:
+            self._get_live_item(item_id)
+            item = KnowledgeItem(
+                content=content,
+                source=source,
+                relevance_score=0.0,
+                category=category,
+                item_id=item_id,
+            )
+            self._ensure_mutable_index()
+            ids = np.array([item_id], dtype="int64")
+            with self._index_lock:
+                self._remove_vectors(ids)
+                self.vector_index.add_with_ids(embedding, ids)
+                self.knowledge_items[item_id] = item
+                self._update_lexical_index(item_id, item)
+                self.index_version += 1
+            self._record_change({"op": "upsert", "item": item.model_dump()})
+        return item
+
+    def delete_knowledge_item(self, item_id: int):
+        """Remove a knowledge item from the live index"""
+        with self._edit_lock:
+            self._get_live_item(item_id)
+            self._ensure_mutable_index()
+            with self._index_lock:
+                self._remove_vectors(np.array([item_id], dtype="int64"))
+                self.knowledge_items[item_id] = None
+                self._update_lexical_index(item_id, None)
+                self.index_version += 1
+            self._record_change({"op": "delete", "item_id": item_id})
+
+    def _get_live_item(self, item_id: int) -> KnowledgeItem:
+        """Return a knowledge item by ID, raising KeyError if it does not exist"""
+        if 0 <= item_id < len(self.knowledge_items):
+            item = self.knowledge_items[item_id]
+            if item is not None:
+                return item
+        raise KeyError(f"Knowledge item {item_id} not found")
+
+    def _ensure_mutable_index(self):
+        """Make sure the vector index supports adding and removing items by ID
+
+        Called with the edit lock held. A replacement index is built while
+        searches keep using the current one, then swapped in.
+        """
+        index = self.vector_index
+        if index is None:
+            index = faiss.IndexIDMap2(faiss.IndexFlatIP(self.embedding_dim))
+        elif not isinstance(index, (faiss.IndexIDMap2, faiss.IndexIVF)):
+            # Indexes saved before stable IDs use list positions as labels
+            index = self._create_flat_index(
+                index.reconstruct_n(0, index.ntotal),
+                np.arange(index.ntotal, dtype="int64"),
+            )
+        elif not supports_removal(index):
+            # An HNSW graph cannot drop the old vector of an updated or deleted
+            # item, so live edits switch to an exact index until the next rebuild
+            logger.warning(
+                "Vector index cannot remove vectors; using an exact flat index "
+                "for live edits until the knowledge base is rebuilt"
+            )
+            index = self._create_flat_index(
+                faiss.downcast_index(index.index).reconstruct_n(0, index.ntotal),
+                faiss.vector_to_array(index.id_map),
+            )
+        elif self._index_mmapped:
+            # Memory-mapped vectors are read-only; copy the index into memory
+            index = faiss.deserialize_index(faiss.serialize_index(index))
+        if index is self.vector_index:
+            return
+        with self._index_lock:
+            self.vector_index = index
+            self._index_mmapped = False
+
+    @staticmethod
+    def _create_flat_index(vectors: np.ndarray, ids: np.ndarray):
+        """Create an exact index holding vectors under the given IDs"""
+        index = faiss.IndexIDMap2(faiss.IndexFlatIP(vectors.shape[1]))
+        index.add_with_ids(vectors, ids)  # pylint: disable=no-value-for-parameter
+        return index
+
+    def _remove_vectors(self, ids: np.ndarray):
+        """Remove vectors by ID from the index made mutable by _ensure_mutable_index"""
+        self.vector_index.remove_ids(ids)
+
+    def _record_change(self, change: Dict):
+        """Append a change to the on-disk change log"""
+        with open(self.changes_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(change) + "\n")
+
+    def _replay_changes(self):
+        """Apply the change log written since the last full snapshot"""
+        if not os.path.exists(self.changes_path):
+            return
+
+        changes = []
+        with open(self.changes_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    change = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave a partially written last line
+                    logger.warning(
+                        "Skipping malformed knowledge base change entry"
+                    )
+                    continue
+                if isinstance(change, dict) and "op" in change:
+                    changes.append(change)
+        if not changes:
+            return
+
+        upserts = [c["item"] for c in changes if c["op"] == "upsert"]
+        embeddings = (
+            dict(
+                zip(
+                    (item["content"] for item in upserts),
+                    self.embedding_builder.get_embeddings(
+                        [item["content"] for item in upserts]
+                    ),
+                )
+            )
+            if upserts
+            else {}
+        )
+
+        self._ensure_mutable_index()
+        for change in changes:
+            if change["op"] == "upsert":
+                item = KnowledgeItem(**change["item"])
+                if item.item_id is None or item.item_id < 0:
+                    logger.warning(
+                        "Skipping change log upsert without a valid item ID"
+                    )
+                    continue
+                ids = np.array([item.item_id], dtype="int64")
+                while len(self.knowledge_items) <= item.item_id:
+                    self.knowledge_items.append(None)
+                if self.knowledge_items[item.item_id] is not None:
+                    self._remove_vectors(ids)
+                self.vector_index.add_with_ids(
+                    embeddings[item.content].reshape(1, -1), ids
+                )
+                self.knowledge_items[item.item_id] = item
+            elif change["op"] == "delete":
+                item_id = change.get("item_id")
+                try:
+                    self._get_live_item(item_id)
+                except (KeyError, TypeError):
+                    logger.warning(
+                        "Skipping change log delete of unknown item %r", item_id
+                    )
+                    continue
+                self._remove_vectors(np.array([item_id], dtype="int64"))
+                self.knowledge_items[item_id] = None
+        logger.info(
+            "Applied %d knowledge base changes from the change log.", len(changes)
+        )
 
     def _process_knowledge_base_md(self):
         """Process the knowledge base markdown file"""
@@ -211,34 +534,91 @@ class KnowledgeBaseManager:
             return "general"
 
     def _create_vector_embeddings(self):
-        """Create vector embeddings for all knowledge items using OpenAI embeddings"""
+        """Create vector embeddings for all knowledge items using OpenAI embeddings
+
+        Embeddings are committed to the embedding store in chunks, so a build
+        interrupted part way resumes from the last committed chunk.
+        """
         if not self.knowledge_items:
             return
 
         texts = [item.content for item in self.knowledge_items]
-        embeddings = self._get_openai_embeddings(texts)
-        embeddings = np.array(embeddings)
-
-        # Create FAISS index
-        dimension = embeddings.shape[1]
-        self.vector_index = faiss.IndexFlatIP(dimension)
-        self.vector_index.add(embeddings.astype("float32"))
-        print(f"Created vector index with {len(embeddings)} embeddings")
-
-    def _get_openai_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Get OpenAI embeddings for a list of texts (batched)"""
-        # OpenAI API allows up to 2048 tokens per request, batch if needed
+        embeddings = self.embedding_builder.get_embeddings(texts, checkpoint=True)
+
+        # Create FAISS index; item IDs are their positions in knowledge_items
+        for item_id, item in enumerate(self.knowledge_items):
+            item.item_id = item_id
+        self.vector_index = build_vector_index(
+            embeddings, np.arange(len(embeddings), dtype="int64")
+        )
+        self.index_version += 1
+        self.embedding_builder.remove_checkpoint()
+        logger.info("Created vector index with %d embeddings", len(embeddings))
+
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """Embed texts, reusing embeddings saved in the persistent store"""
+        return self.embedding_builder.get_embeddings(texts)
+
+    async def _get_openai_embeddings_async(
+        self, texts: List[str]
+    ) -> List[List[float]]:
+        """Get OpenAI embeddings for a list of texts without blocking the event loop"""
         batch_size = 50
         all_embeddings = []
         for i in range(0, len(texts), batch_size):
             batch = texts[i : i + batch_size]
-            response = self.client.embeddings.create(
+            response = await self.async_client.embeddings.create(
                 input=batch, model=self.embedding_model
             )
-            batch_embeddings = [d.embedding for d in response.data]
-            all_embeddings.extend(batch_embeddings)
+            record_token_usage("embedding", response.usage)
+            all_embeddings.extend(d.embedding for d in response.data)
         return all_embeddings
 
+    def _embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed queries, only calling OpenAI for those missing from the cache"""
+        embeddings = [
+            self.embedding_cache.get(query, self.embedding_model)
+            for query in queries
+        ]
+        missing = [query for query, emb in zip(queries, embeddings) if emb is None]
+        if missing:
+            with time_stage("embedding"):
+                fetched = iter(self.embedding_builder.fetch_embeddings(missing))
+            embeddings = [
+                self._cache_query(q, e, fetched)
+                for q, e in zip(queries, embeddings)
+            ]
+        return embeddings
+
+    async def _embed_queries_async(self, queries: List[str]) -> List[List[float]]:
+        """Async variant of _embed_queries"""
+        embeddings = [
+            self.embedding_cache.get(query, self.embedding_model)
+            for query in queries
+        ]
+        missing = [query for query, emb in zip(queries, embeddings) if emb is None]
+        if missing:
+            with time_stage("embedding"):
+                if Config.EMBEDDING_BATCHING:
+                    # Shares one embeddings call with other concurrent requests
+                    fetched = iter(await self.embedding_batcher.embed(missing))
+                else:
+                    fetched = iter(
+                        await self._get_openai_embeddings_async(missing)
+                    )
+            embeddings = [
+                self._cache_query(q, e, fetched)
+                for q, e in zip(queries, embeddings)
+            ]
+        return embeddings
+
+    def _cache_query(self, query: str, embedding, fetched) -> List[float]:
+        """Return a cached embedding or take the next fetched one and cache it"""
+        if embedding is None:
+            embedding = next(fetched)
+            self.embedding_cache.put(query, self.embedding_model, embedding)
+        return embedding
+
     def search_knowledge(
         self, query: str, category: str = None, top_k: int = None
     ) -> List[KnowledgeItem]:
@@ -246,44 +626,320 @@ class KnowledgeBaseManager:
         if not self.vector_index or not self.knowledge_items:
             return []
 
-        if top_k is None:
-            top_k = int(Config.MAX_RETRIEVAL_RESULTS)
-        else:
-            top_k = int(top_k)
+        shortcut = self._search_lexical_shortcut(query, category, top_k)
+        if shortcut:
+            return shortcut
+
+        # Encode query using OpenAI (repeated queries are served from the cache)
+        query_embedding = self._embed_queries(
+            [self._prepare_query(query, category)]
+        )[0]
+        results = self._search_by_embedding(query_embedding, category, top_k)
+        return self._fuse_lexical_results(query, category, results, top_k)
 
+    async def search_knowledge_async(
+        self, query: str, category: str = None, top_k: int = None
+    ) -> List[KnowledgeItem]:
+        """Search knowledge base without blocking the event loop"""
+        if not self.vector_index or not self.knowledge_items:
+            return []
+
+        shortcut = self._search_lexical_shortcut(query, category, top_k)
+        if shortcut:
+            return shortcut
+
+        query_embedding = (
+            await self._embed_queries_async([self._prepare_query(query, category)])
+        )[0]
+        results = self._search_by_embedding(query_embedding, category, top_k)
+        return self._fuse_lexical_results(query, category, results, top_k)
+
+    async def embed_query_async(self, query: str) -> List[float]:
+        """Embed a raw query, serving repeated queries from the cache"""
+        return (await self._embed_queries_async([query]))[0]
+
+    async def embed_query_variants_async(
+        self, query: str
+    ) -> Dict[str, List[float]]:
+        """Embed every category-dependent variant of a query in a single call
+
+        This lets retrieval start before the request has been classified; the
+        matching variant is picked by search_with_query_embeddings afterwards.
+        """
+        return (await self.embed_query_variants_batch_async([query]))[0]
+
+    async def embed_query_variants_batch_async(
+        self, queries: List[str]
+    ) -> List[Dict[str, List[float]]]:
+        """Embed the variants of many queries with a single embeddings call"""
+        if not self.vector_index or not self.knowledge_items:
+            return [{} for _ in queries]
+
+        variants_per_query = [
+            list(
+                dict.fromkeys(
+                    [
+                        self._prepare_query(query),
+                        self._prepare_query(query, "security_incident"),
+                    ]
+                )
+            )
+            for query in queries
+        ]
+        unique_variants = list(
+            dict.fromkeys(v for variants in variants_per_query for v in variants)
+        )
+        embeddings = dict(
+            zip(unique_variants, await self._embed_queries_async(unique_variants))
+        )
+        return [
+            {variant: embeddings[variant] for variant in variants}
+            for variants in variants_per_query
+        ]
+
+    def search_with_query_embeddings(
+        self,
+        query: str,
+        query_embeddings: Dict[str, List[float]],
+        category: str = None,
+        top_k: int = None,
+    ) -> List[KnowledgeItem]:
+        """Search using embeddings from embed_query_variants_async"""
+        if not self.vector_index or not self.knowledge_items:
+            return []
+
+        query_embedding = query_embeddings[self._prepare_query(query, category)]
+        results = self._search_by_embedding(query_embedding, category, top_k)
+        return self._fuse_lexical_results(query, category, results, top_k)
+
+    def search_batch_with_query_embeddings(
+        self,
+        queries: List[str],
+        query_embeddings: List[Dict[str, List[float]]],
+        categories: List[str],
+        top_k: int = None,
+    ) -> List[List[KnowledgeItem]]:
+        """Search many queries, running one multi-query search per category"""
+        results: List[List[KnowledgeItem]] = [[] for _ in queries]
+        if not self.vector_index or not self.knowledge_items:
+            return results
+
+        positions_by_category: Dict[str, List[int]] = {}
+        for position, category in enumerate(categories):
+            positions_by_category.setdefault(category, []).append(position)
+
+        for category, positions in positions_by_category.items():
+            matrix = np.array(
+                [
+                    query_embeddings[i][self._prepare_query(queries[i], category)]
+                    for i in positions
+                ]
+            )
+            for position, items in zip(
+                positions, self._search_by_embeddings(matrix, category, top_k)
+            ):
+                results[position] = self._fuse_lexical_results(
+                    queries[position], category, items, top_k
+                )
+        return results
+
+    def _get_category_selector(self, category: str = None):
+        """Return an ID selector for a category plus the number of candidates
+
+        Items whose category is not a request category (e.g. troubleshooting
+        entries keyed by issue) form a shared "general" pool that is searched
+        for every category. Returns (None, item count) when no filter applies.
+        """
+        if (
+            not Config.CATEGORY_FILTERING
+            or category not in self._request_categories
+        ):
+            return None, len(self.knowledge_items)
+
+        if self._category_selectors_version != self.index_version:
+            ids_by_category: Dict[str, List[int]] = {}
+            for item_category, ids in self._get_ids_by_category().items():
+                ids_by_category.setdefault(
+                    self._category_group(item_category), []
+                ).extend(ids)
+
+            general = ids_by_category.get("general", [])
+            self._category_selectors = {}
+            for request_category in self._request_categories:
+                ids = np.array(
+                    ids_by_category.get(request_category, []) + general,
+                    dtype="int64",
+                )
+                self._category_selectors[request_category] = (
+                    # pylint: disable-next=no-value-for-parameter
+                    faiss.IDSelectorBatch(ids),
+                    len(ids),
+                )
+            self._category_selectors_version = self.index_version
+
+        return self._category_selectors[category]
+
+    def _category_group(self, item_category: Optional[str]) -> str:
+        """Map an item category to its request category or the general pool"""
+        if item_category in self._request_categories:
+            return item_category
+        return "general"
+
+    def _get_ids_by_category(self) -> Dict[str, List[int]]:
+        """Group live item IDs by item category"""
+        if isinstance(self.knowledge_items, KnowledgeItemStore):
+            # Read the category column directly instead of decoding every item
+            return {
+                category: ids.tolist()
+                for category, ids in self.knowledge_items.ids_by_category().items()
+            }
+
+        ids_by_category: Dict[str, List[int]] = {}
+        for item_id, item in enumerate(self.knowledge_items):
+            if item is not None:
+                ids_by_category.setdefault(item.category, []).append(item_id)
+        return ids_by_category
+
+    def can_answer_lexically(self, query: str, category: str = None) -> bool:
+        """Whether a keyword match is strong enough to skip the embeddings API"""
+        return bool(self._search_lexical_shortcut(query, category, 1))
+
+    def _search_lexical(
+        self, query: str, category: str, top_k: int
+    ) -> List[Tuple[int, float]]:
+        """Return BM25 (item ID, normalized score) matches within the category"""
+        if self.lexical_index is None:
+            return []
+
+        groups = None
+        if Config.CATEGORY_FILTERING and category in self._request_categories:
+            groups = (category, "general")
+        with self._index_lock:
+            matches = self.lexical_index.search(query, top_k, groups)
+        return [
+            (item_id, score)
+            for item_id, score in matches
+            if score >= Config.LEXICAL_MIN_SCORE
+        ]
+
+    def _search_lexical_shortcut(
+        self, query: str, category: str = None, top_k: int = None
+    ) -> List[KnowledgeItem]:
+        """Return keyword matches if the best one is confident, else nothing"""
+        if not Config.LEXICAL_SHORTCUT:
+            return []
+
+        matches = self._search_lexical(
+            query, category, int(top_k or Config.MAX_RETRIEVAL_RESULTS)
+        )
+        if not matches or matches[0][1] < Config.LEXICAL_SHORTCUT_THRESHOLD:
+            return []
+        logger.debug("Answered query from the lexical index (%.2f)", matches[0][1])
+        return self._items_with_scores(matches, {})
+
+    def _fuse_lexical_results(
+        self,
+        query: str,
+        category: str,
+        vector_results: List[KnowledgeItem],
+        top_k: int = None,
+    ) -> List[KnowledgeItem]:
+        """Fuse vector results with BM25 matches when hybrid search is enabled
+
+        The relevance score of fused results is the fusion score.
+        """
+        if not Config.HYBRID_SEARCH or self.lexical_index is None:
+            return vector_results
+
+        top_k = int(top_k or Config.MAX_RETRIEVAL_RESULTS)
+        fused = fuse_scores(
+            [(item.item_id, item.relevance_score) for item in vector_results],
+            self._search_lexical(query, category, top_k),
+            Config.HYBRID_FUSION,
+            Config.HYBRID_RRF_K,
+            Config.HYBRID_LEXICAL_WEIGHT,
+        )
+        return self._items_with_scores(
+            fused[:top_k], {item.item_id: item for item in vector_results}
+        )
+
+    def _items_with_scores(
+        self, scored_ids: List[Tuple[int, float]], items_by_id: Dict
+    ) -> List[KnowledgeItem]:
+        """Look up knowledge items by ID and return copies with their scores"""
+        results = []
+        for item_id, score in scored_ids:
+            item = items_by_id.get(item_id) or self.knowledge_items[item_id]
+            if item is None:
+                continue
+            results.append(
+                item.model_copy(update={"relevance_score": float(score)})
+            )
+        return results
+
+    def _prepare_query(self, query: str, category: str = None) -> str:
+        """Apply category-specific context to a search query"""
         # Add security context for security incidents
         if category == "security_incident":
             query = (
                 query
                 + "This is a security incident. Follow all necessary security policy. "
             )
+        return query
 
-        # Encode query using OpenAI
-        query_embedding = self._get_openai_embeddings([query])[0]
+    def _search_by_embedding(
+        self, query_embedding, category: str = None, top_k: int = None
+    ) -> List[KnowledgeItem]:
+        """Search the vector index with an already computed query embedding"""
         query_embedding = np.array(query_embedding).reshape(1, -1)
+        return self._search_by_embeddings(query_embedding, category, top_k)[0]
 
-        # Search vector index
-        scores, indices = self.vector_index.search(
-            query_embedding.astype("float32"),
-            min(top_k, len(self.knowledge_items)),
-        )
+    def _search_by_embeddings(
+        self, query_embeddings: np.ndarray, category: str = None, top_k: int = None
+    ) -> List[List[KnowledgeItem]]:
+        """Search the vector index for a matrix of query embeddings at once"""
+        if top_k is None:
+            top_k = int(Config.MAX_RETRIEVAL_RESULTS)
+        else:
+            top_k = int(top_k)
 
-        # Filter by category and similarity threshold
+        # Search vector index, restricted to the category and the general pool
+        with time_stage("search"), self._index_lock:
+            selector, candidate_count = self._get_category_selector(category)
+            k = min(top_k, candidate_count)
+            if k <= 0:
+                return [[] for _ in range(len(query_embeddings))]
+            scores, indices = self.vector_index.search(
+                query_embeddings.astype("float32"),
+                k,
+                params=create_search_params(self.vector_index, selector),
+            )
+
+        return [
+            self._collect_results(row_scores, row_indices, top_k)
+            for row_scores, row_indices in zip(scores, indices)
+        ]
+
+    def _collect_results(self, scores, indices, top_k: int) -> List[KnowledgeItem]:
+        """Turn one row of FAISS results into knowledge items above the threshold"""
         results = []
-        for _, (score, idx) in enumerate(zip(scores[0], indices[0])):
+        for _, (score, idx) in enumerate(zip(scores, indices)):
+            # FAISS pads missing results with -1
+            if idx < 0:
+                continue
             item = self.knowledge_items[idx]
-            print(item)
+            if item is None:
+                continue
+            logger.debug("Candidate item %d scored %.3f", idx, score)
 
-            # # Apply exact category filter
-            # if category and item.category and category != item.category:
-            #     continue
-            # print("category passed")
             # Apply similarity threshold filter (ensure threshold is float)
             if float(score) < float(Config.SIMILARITY_THRESHOLD):
                 continue
 
-            item.relevance_score = float(score)
-            results.append(item)
+            # Stored items are shared by concurrent searches, so score a copy
+            results.append(
+                item.model_copy(update={"relevance_score": float(score)})
+            )
 
         # Sort by relevance score
         results.sort(key=lambda x: x.relevance_score, reverse=True)
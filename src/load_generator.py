@@ -0,0 +1,197 @@
+"""
+Open-loop load generator for the help desk API.
+
+Sends POST /process-request at a target rate for a fixed duration and reports
+the achieved throughput, status counts, latency percentiles and the peak
+number of requests in flight. Requests are started on schedule whether or not
+earlier ones have finished, so queueing in the service shows up as growing
+latency instead of silently lowering the offered load, and latency is measured
+from the scheduled start time.
+
+Combined with src.fake_openai_server this measures the service's own
+throughput ceiling without calling the real OpenAI API.
+
+Usage:
+    python -m src.load_generator --url http://localhost:8000 --rps 50 --duration 60
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from .config import Config
+
+DEFAULT_MESSAGES = [
+    "I forgot my password and I'm locked out",
+    "VPN is not connecting from home",
+    "How do I install Slack on my laptop?",
+    "My laptop screen is flickering",
+    "I clicked a suspicious link in an email",
+]
+
+
+def load_messages(path: str) -> List[str]:
+    """Load request texts from a test requests file, or use built-in ones"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return DEFAULT_MESSAGES
+    messages = [
+        entry["request"]
+        for entry in data.get("test_requests", [])
+        if entry.get("request")
+    ]
+    return messages or DEFAULT_MESSAGES
+
+
+@dataclass
+class LoadProfile:
+    """The offered load: a target rate, a duration and the arrival process"""
+
+    rps: float
+    duration: float
+    poisson: bool = False
+    seed: Optional[int] = None
+
+
+class LoadGenerator:
+    """Drives an endpoint at a fixed rate and records every request's outcome"""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        messages: List[str],
+        profile: LoadProfile,
+    ):
+        self.client = client
+        self.messages = messages
+        self.profile = profile
+        self.rng = np.random.default_rng(profile.seed)
+        self.latencies: List[float] = []
+        self.statuses: Counter = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def schedule(self) -> List[float]:
+        """Return the start offsets in seconds of every request to send
+
+        Arrivals are evenly spaced, or exponentially spaced with the same mean
+        when poisson is set, which is closer to independent users.
+        """
+        rps, duration = self.profile.rps, self.profile.duration
+        count = int(rps * duration)
+        if not self.profile.poisson:
+            return [i / rps for i in range(count)]
+        offsets = np.cumsum(self.rng.exponential(1 / rps, count))
+        return [float(offset) for offset in offsets if offset < duration]
+
+    async def send(self, index: int, scheduled: float):
+        """Send one request and record its status and latency"""
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            response = await self.client.post(
+                "/process-request",
+                json={
+                    "user_message": self.messages[index % len(self.messages)],
+                    "request_id": f"load-{index}",
+                },
+            )
+            self.statuses[str(response.status_code)] += 1
+        except httpx.HTTPError as e:
+            self.statuses[type(e).__name__] += 1
+        finally:
+            self.in_flight -= 1
+        self.latencies.append(time.perf_counter() - scheduled)
+
+    async def run(self) -> Dict:
+        """Send the whole schedule and return the report"""
+        tasks = []
+        start = time.perf_counter()
+        for index, offset in enumerate(self.schedule()):
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(self.send(index, start + offset)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+        return self.report(elapsed)
+
+    def report(self, elapsed: float) -> Dict:
+        """Summarize the outcomes of the requests sent so far"""
+        latencies_ms = np.array(self.latencies) * 1000
+        succeeded = self.statuses.get("200", 0)
+        report = {
+            "target_rps": self.profile.rps,
+            "requests": len(self.latencies),
+            "succeeded": succeeded,
+            "statuses": dict(self.statuses),
+            "elapsed_seconds": round(elapsed, 3),
+            "achieved_rps": round(succeeded / max(elapsed, 1e-6), 3),
+            "max_in_flight": self.max_in_flight,
+        }
+        if len(latencies_ms):
+            for percentile in (50, 95, 99):
+                report[f"p{percentile}_ms"] = round(
+                    float(np.percentile(latencies_ms, percentile)), 3
+                )
+            report["max_ms"] = round(float(latencies_ms.max()), 3)
+        return report
+
+
+async def run_load_test(
+    url: str,
+    messages: List[str],
+    profile: LoadProfile,
+    timeout: float = 60.0,
+) -> Dict:
+    """Run a load test against a running service"""
+    async with httpx.AsyncClient(
+        base_url=url,
+        timeout=timeout,
+        # An open-loop test must not queue requests in the client's pool
+        limits=httpx.Limits(max_connections=None, max_keepalive_connections=None),
+    ) as client:
+        generator = LoadGenerator(client, messages, profile)
+        return await generator.run()
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--rps", type=float, default=10, help="Target requests/s")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds")
+    parser.add_argument(
+        "--poisson", action="store_true", help="Randomize arrival times"
+    )
+    parser.add_argument("--requests", default=Config.TEST_REQUESTS_PATH)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(
+        run_load_test(
+            args.url,
+            load_messages(args.requests),
+            LoadProfile(args.rps, args.duration, args.poisson, args.seed),
+            args.timeout,
+        )
+    )
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
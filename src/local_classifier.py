@@ -0,0 +1,117 @@
+"""
+Local, embedding-based request classifier.
+
+A nearest-centroid model over query embeddings classifies requests it is
+confident about and leaves the rest to the LLM classifier.
+"""
+
+import json
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .models import ClassificationResult, RequestCategory
+
+
+def load_labelled_requests(path: str) -> List[Tuple[str, str, bool]]:
+    """Load (request, category, escalate) examples from a test requests file
+
+    Entries without a request text or with an unknown category are skipped.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    categories = {category.value for category in RequestCategory}
+    examples = []
+    for entry in data.get("test_requests", []):
+        text = entry.get("request")
+        category = entry.get("expected_classification")
+        if text and category in categories:
+            examples.append((text, category, bool(entry.get("escalate", False))))
+    return examples
+
+
+class LocalClassifier:
+    """Nearest-centroid classifier over normalized query embeddings"""
+
+    def __init__(self, temperature: float):
+        self.temperature = temperature
+        self.categories: List[str] = []
+        self._centroids: Optional[np.ndarray] = None
+        self._examples: Optional[np.ndarray] = None
+        self._example_categories: Optional[np.ndarray] = None
+        self._example_escalations: Optional[np.ndarray] = None
+
+    @property
+    def is_trained(self) -> bool:
+        """Whether the classifier has been fitted"""
+        return self._centroids is not None
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        """Return row vectors scaled to unit length"""
+        vectors = np.atleast_2d(np.asarray(vectors, dtype="float32"))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def fit(self, embeddings, categories: List[str], escalations: List[bool]):
+        """Compute one centroid per category from labelled example embeddings"""
+        if not categories:
+            raise ValueError("No labelled examples to train the local classifier")
+
+        self._examples = self._normalize(embeddings)
+        self._example_categories = np.array(categories)
+        self._example_escalations = np.array(escalations, dtype=bool)
+        self.categories = sorted(set(categories))
+        self._centroids = self._normalize(
+            [
+                self._examples[self._example_categories == category].mean(axis=0)
+                for category in self.categories
+            ]
+        )
+
+    def predict(self, embedding) -> Tuple[str, float, bool]:
+        """Return the category, its softmax confidence and the escalation label
+
+        Escalation is copied from the most similar example of the predicted
+        category.
+        """
+        query = self._normalize(embedding)[0]
+        logits = (self._centroids @ query) / self.temperature
+        probabilities = np.exp(logits - logits.max())
+        probabilities /= probabilities.sum()
+        best = int(np.argmax(probabilities))
+        category = self.categories[best]
+
+        in_category = np.flatnonzero(self._example_categories == category)
+        nearest = in_category[np.argmax(self._examples[in_category] @ query)]
+        return (
+            category,
+            float(probabilities[best]),
+            bool(self._example_escalations[nearest]),
+        )
+
+    def classify(
+        self, embedding, threshold: float
+    ) -> Optional[ClassificationResult]:
+        """Classify an embedding, or return None if confidence is below threshold"""
+        if not self.is_trained:
+            return None
+
+        category, confidence, escalate = self.predict(embedding)
+        if confidence < threshold:
+            return None
+
+        return ClassificationResult(
+            category=RequestCategory(category),
+            reasoning=(
+                f"Matched labelled {category} requests locally "
+                f"(confidence {confidence:.2f})"
+            ),
+            escalation_required=escalate,
+            escalation_reason=(
+                "Similar labelled requests required escalation"
+                if escalate
+                else None
+            ),
+        )
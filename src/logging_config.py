@@ -0,0 +1,157 @@
+"""
+Structured, non-blocking logging for the help desk service.
+
+Modules log through logging.getLogger(__name__). configure_logging() attaches a
+queue handler to the package logger, so a log call on the request path only
+resolves the message and enqueues the record; a background listener thread
+formats it (as JSON by default) and writes it out.
+
+Every record carries the ID of the request being processed, taken from a
+context variable that the pipeline sets per request. Sampling keeps all
+records of a fraction of requests, chosen by request ID, so sampled requests
+can still be followed end to end; warnings and errors are always kept.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import queue
+import sys
+import zlib
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, TextIO
+
+from .config import Config
+
+PACKAGE_LOGGER = __name__.rpartition(".")[0]
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRIBUTES = frozenset(
+    vars(logging.LogRecord("", 0, "", 0, "", None, None))
+) | {"message", "asctime", "request_id"}
+
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+class _LoggingState:
+    """Holds the process's queue listener while logging is configured"""
+
+    listener: Optional[QueueListener] = None
+
+
+_state = _LoggingState()
+
+
+def set_request_id(request_id: Optional[str]):
+    """Attach a request ID to the records logged from the current context"""
+    _request_id.set(request_id)
+
+
+def get_request_id() -> Optional[str]:
+    """Return the request ID of the current context, if any"""
+    return _request_id.get()
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamps records with the request ID and drops unsampled requests
+
+    Attached to the queue handler, so it runs in the caller's thread before the
+    record is enqueued, which is why the request's context variables are visible.
+    """
+
+    def __init__(self, sample_rate: float = 1.0):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def is_sampled(self, request_id: Optional[str]) -> bool:
+        """Return whether a request's records are kept, the same on every call"""
+        if request_id is None or self.sample_rate >= 1.0:
+            return True
+        return zlib.crc32(request_id.encode("utf-8")) / 2**32 < self.sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return record.levelno >= logging.WARNING or self.is_sampled(
+            record.request_id
+        )
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(
+                record.created, tz=timezone.utc
+            ).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _DeferredFormattingQueueHandler(QueueHandler):
+    """Queue handler that leaves the formatting to the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message now, as its arguments may change after the call
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def configure_logging(stream: TextIO = None) -> QueueListener:
+    """Route the package's logs through a background thread, once per process
+
+    Uses LOG_LEVEL, LOG_FORMAT ("json" or "text") and LOG_SAMPLE_RATE.
+    """
+    if _state.listener is not None:
+        return _state.listener
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    if Config.LOG_FORMAT == "text":
+        output.setFormatter(logging.Formatter(TEXT_FORMAT))
+    else:
+        output.setFormatter(JsonFormatter())
+
+    log_queue = queue.SimpleQueue()
+    handler = _DeferredFormattingQueueHandler(log_queue)
+    handler.addFilter(RequestContextFilter(Config.LOG_SAMPLE_RATE))
+
+    logger = logging.getLogger(PACKAGE_LOGGER)
+    logger.setLevel(Config.LOG_LEVEL.upper())
+    logger.addHandler(handler)
+    # The package's records are written by the listener only
+    logger.propagate = False
+
+    _state.listener = QueueListener(log_queue, output)
+    _state.listener.start()
+    atexit.register(stop_logging)
+    return _state.listener
+
+
+def stop_logging():
+    """Flush queued records and detach the queue handler"""
+    if _state.listener is None:
+        return
+    _state.listener.stop()
+    logger = logging.getLogger(PACKAGE_LOGGER)
+    for handler in list(logger.handlers):
+        if isinstance(handler, _DeferredFormattingQueueHandler):
+            logger.removeHandler(handler)
+    logger.propagate = True
+    _state.listener = None
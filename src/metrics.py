@@ -0,0 +1,137 @@
+"""
+Prometheus metrics for the help desk service.
+
+Exposes latency histograms for every pipeline stage (fed by stage_timing),
+OpenAI token usage from each response's `usage`, HTTP request counts and
+latency, the number of requests in flight, and, read at scrape time, the
+embedding and response cache hit rates and the knowledge base index size.
+
+Metrics live in the default registry of the process. With several uvicorn
+workers each worker has its own, so scrape them individually or run one
+worker per container.
+"""
+
+from typing import Iterator
+
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from .stage_timing import add_stage_observer
+
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+STAGE_DURATION = Histogram(
+    "helpdesk_stage_duration_seconds",
+    "Time spent in each pipeline stage",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+OPENAI_TOKENS = Counter(
+    "helpdesk_openai_tokens",
+    "Tokens reported by the OpenAI API",
+    ["operation", "kind"],
+)
+HTTP_REQUESTS = Counter(
+    "helpdesk_http_requests",
+    "HTTP requests by route and status code",
+    ["route", "method", "status"],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "helpdesk_http_request_duration_seconds",
+    "Time until the response starts, by route",
+    ["route", "method"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "helpdesk_http_requests_in_progress", "HTTP requests currently being served"
+)
+
+
+def observe_stage(stage: str, seconds: float):
+    """Record one stage duration in the stage histogram"""
+    STAGE_DURATION.labels(stage=stage).observe(seconds)
+
+
+add_stage_observer(observe_stage)
+
+
+def record_token_usage(operation: str, usage):
+    """Count the tokens of an OpenAI response's usage, if it reported any"""
+    if usage is None:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        tokens = getattr(usage, kind, None)
+        if isinstance(tokens, int) and tokens > 0:
+            OPENAI_TOKENS.labels(
+                operation=operation, kind=kind.replace("_tokens", "")
+            ).inc(tokens)
+
+
+class HelpDeskCollector(Collector):
+    """Reads cache and index statistics from a help desk system at scrape time"""
+
+    def __init__(self, system):
+        self.system = system
+
+    def collect(self) -> Iterator:
+        hits = CounterMetricFamily(
+            "helpdesk_cache_hits", "Cache lookups that hit", labels=["cache"]
+        )
+        misses = CounterMetricFamily(
+            "helpdesk_cache_misses", "Cache lookups that missed", labels=["cache"]
+        )
+        hit_ratio = GaugeMetricFamily(
+            "helpdesk_cache_hit_ratio",
+            "Fraction of cache lookups that hit since start",
+            labels=["cache"],
+        )
+        size = GaugeMetricFamily(
+            "helpdesk_cache_entries",
+            "Entries held by each cache",
+            labels=["cache"],
+        )
+        caches = {
+            "embedding": self.system.knowledge_base.embedding_cache,
+            "response": self.system.response_cache,
+        }
+        for name, cache in caches.items():
+            stats = cache.stats()
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+            hit_ratio.add_metric([name], stats["hit_rate"])
+            size.add_metric([name], stats["size"])
+        yield from (hits, misses, hit_ratio, size)
+
+        knowledge_base = self.system.knowledge_base
+        index_size = GaugeMetricFamily(
+            "helpdesk_index_vectors", "Vectors in the knowledge base index"
+        )
+        index = knowledge_base.vector_index
+        index_size.add_metric([], index.ntotal if index is not None else 0)
+        yield index_size
+        yield GaugeMetricFamily(
+            "helpdesk_index_version",
+            "Incremented whenever the indexed knowledge changes",
+            value=knowledge_base.index_version,
+        )
+
+
+def register_system(system, registry=REGISTRY) -> HelpDeskCollector:
+    """Export a system's cache and index statistics from the registry"""
+    collector = HelpDeskCollector(system)
+    registry.register(collector)
+    return collector
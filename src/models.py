@@ -39,6 +39,7 @@ class KnowledgeItem(BaseModel):
     source: str
     relevance_score: float
     category: Optional[str] = None
+    item_id: Optional[int] = Field(None, description="Stable vector index ID")
 
 
 class HelpDeskRequest(BaseModel):
@@ -60,6 +61,20 @@ class HelpDeskResponse(BaseModel):
     response_message: str
 
 
+class BatchItemResult(BaseModel):
+    """Model for the outcome of one request in a batch"""
+
+    index: int = Field(..., description="Position of the request in the batch")
+    response: Optional[HelpDeskResponse] = None
+    error: Optional[str] = None
+
+
+class BatchProcessResponse(BaseModel):
+    """Model for batch processing responses, in request order"""
+
+    results: List[BatchItemResult]
+
+
 class SystemHealth(BaseModel):
     """Model for system health status"""
 
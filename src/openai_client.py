@@ -0,0 +1,74 @@
+"""
+Shared, pooled OpenAI clients.
+"""
+
+import functools
+import logging
+from typing import Any, Dict
+
+import httpx
+import openai
+
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def _http2_enabled() -> bool:
+    """Return whether HTTP/2 is requested and the optional h2 package exists"""
+    if not Config.OPENAI_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401  pylint: disable=unused-import
+    except ImportError:
+        logger.warning(
+            "OPENAI_HTTP2 requires the 'h2' package, falling back to HTTP/1.1"
+        )
+        return False
+    return True
+
+
+def _client_options() -> Dict[str, Any]:
+    """Options shared by the sync and async OpenAI clients"""
+    return {
+        "api_key": Config.OPENAI_API_KEY,
+        "base_url": Config.OPENAI_BASE_URL,
+        "timeout": httpx.Timeout(
+            Config.OPENAI_TIMEOUT, connect=Config.OPENAI_CONNECT_TIMEOUT
+        ),
+        "max_retries": Config.OPENAI_MAX_RETRIES,
+    }
+
+
+def _http_client_options() -> Dict[str, Any]:
+    """Connection pool options for the underlying HTTP clients"""
+    return {
+        "limits": httpx.Limits(
+            max_connections=Config.OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=Config.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=Config.OPENAI_KEEPALIVE_EXPIRY,
+        ),
+        "http2": _http2_enabled(),
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def get_openai_client() -> openai.OpenAI:
+    """Return the process-wide synchronous OpenAI client"""
+    return openai.OpenAI(
+        **_client_options(),
+        http_client=openai.DefaultHttpxClient(**_http_client_options()),
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def get_async_openai_client() -> openai.AsyncOpenAI:
+    """Return the process-wide asynchronous OpenAI client
+
+    Its connections belong to the event loop that opened them, so use it from
+    the single loop of the API server or a CLI run.
+    """
+    return openai.AsyncOpenAI(
+        **_client_options(),
+        http_client=openai.DefaultAsyncHttpxClient(**_http_client_options()),
+    )
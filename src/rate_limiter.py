@@ -0,0 +1,89 @@
+"""
+Adaptive request and token rate limiting for bulk OpenAI calls.
+
+Two token buckets enforce the per-minute budgets, and a 429 pauses all callers
+and lowers the rates until calls succeed again.
+"""
+
+import threading
+import time
+from typing import Optional
+
+
+class RateLimiter:
+    """Thread-safe token buckets for requests and tokens per minute
+
+    A budget of 0 disables that bucket. Buckets hold one second of budget, so
+    bursts stay short, and a request larger than the bucket is let through
+    once the bucket is full, leaving it in debt.
+    """
+
+    # After a 429 the rates drop to this fraction and recover per success
+    BACKOFF_FACTOR = 0.5
+    RECOVERY_STEP = 0.05
+    MIN_RATE_SCALE = 0.1
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests_per_second = requests_per_minute / 60
+        self.tokens_per_second = tokens_per_minute / 60
+        self.rate_scale = 1.0
+        self._request_level = self.requests_per_second
+        self._token_level = self.tokens_per_second
+        self._paused_until = 0.0
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        """Add budget accrued since the last refill, capped at one second"""
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._request_level = min(
+            self.requests_per_second,
+            self._request_level
+            + elapsed * self.requests_per_second * self.rate_scale,
+        )
+        self._token_level = min(
+            self.tokens_per_second,
+            self._token_level + elapsed * self.tokens_per_second * self.rate_scale,
+        )
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        """Seconds until a request of this size fits both budgets, 0 if now"""
+        wait = max(0.0, self._paused_until - now)
+        for level, rate, needed in (
+            (self._request_level, self.requests_per_second, 1),
+            (self._token_level, self.tokens_per_second, tokens),
+        ):
+            if rate <= 0:
+                continue
+            needed = min(needed, rate)
+            if level < needed:
+                wait = max(wait, (needed - level) / (rate * self.rate_scale))
+        return wait
+
+    def acquire(self, tokens: int = 0):
+        """Block until one request using this many tokens fits the budgets"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._wait_time(tokens, now)
+                if wait <= 0:
+                    self._request_level -= 1
+                    self._token_level -= tokens
+                    return
+            time.sleep(wait)
+
+    def backoff(self, delay: Optional[float] = None):
+        """Pause every caller after a 429 and lower the rates"""
+        with self._lock:
+            self.rate_scale = max(
+                self.MIN_RATE_SCALE, self.rate_scale * self.BACKOFF_FACTOR
+            )
+            delay = delay if delay is not None else 1.0 / self.rate_scale
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+
+    def record_success(self):
+        """Gradually restore the rates after a successful call"""
+        with self._lock:
+            self.rate_scale = min(1.0, self.rate_scale + self.RECOVERY_STEP)
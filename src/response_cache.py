@@ -0,0 +1,113 @@
+"""
+Semantic cache for generated help desk responses.
+
+A query reuses a cached response of its category when its embedding is within
+a cosine distance threshold; the cache is cleared when the index version changes.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+
+from .models import HelpDeskResponse
+
+
+class SemanticResponseCache:
+    """Thread-safe, bounded cache of responses keyed by query embedding"""
+
+    def __init__(self, max_size: int, max_distance: float):
+        self.max_size = max_size
+        self.max_distance = max_distance
+        self.hits = 0
+        self.misses = 0
+        self._version = None
+        self._next_key = 0
+        # Global LRU order over (category, key) plus per-category entries
+        self._lru: "OrderedDict[tuple, None]" = OrderedDict()
+        self._entries: Dict[str, Dict[int, tuple]] = {}
+        self._matrices: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        """Return the embedding as a unit-length float32 vector"""
+        vector = np.asarray(embedding, dtype="float32").ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _reset(self, version):
+        """Drop every entry and start caching for a knowledge base version"""
+        self._lru.clear()
+        self._entries.clear()
+        self._matrices.clear()
+        self._version = version
+
+    def _check_version(self, version):
+        """Drop every entry if the knowledge base changed since they were cached"""
+        if version != self._version:
+            self._reset(version)
+
+    def _category_matrix(self, category: str):
+        """Return (keys, stacked vectors) for a category, rebuilt after changes"""
+        if category not in self._matrices:
+            entries = self._entries.get(category, {})
+            keys = list(entries)
+            vectors = np.stack([entries[key][0] for key in keys]) if keys else None
+            self._matrices[category] = (keys, vectors)
+        return self._matrices[category]
+
+    def get(self, category: str, embedding, version) -> Optional[HelpDeskResponse]:
+        """Return the cached response closest to the embedding, or None"""
+        query = self._normalize(embedding)
+        with self._lock:
+            self._check_version(version)
+            keys, vectors = self._category_matrix(category)
+            if vectors is not None:
+                similarities = vectors @ query
+                best = int(np.argmax(similarities))
+                if 1.0 - similarities[best] <= self.max_distance:
+                    self._lru.move_to_end((category, keys[best]))
+                    self.hits += 1
+                    return self._entries[category][keys[best]][1]
+
+            self.misses += 1
+            return None
+
+    def put(self, category: str, embedding, response: HelpDeskResponse, version):
+        """Cache a response, evicting the least recently used entries"""
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._check_version(version)
+            key = self._next_key
+            self._next_key += 1
+            self._entries.setdefault(category, {})[key] = (
+                self._normalize(embedding),
+                response,
+            )
+            self._lru[(category, key)] = None
+            self._matrices.pop(category, None)
+
+            while len(self._lru) > self.max_size:
+                (old_category, old_key), _ = self._lru.popitem(last=False)
+                del self._entries[old_category][old_key]
+                self._matrices.pop(old_category, None)
+
+    def clear(self):
+        """Remove all cached responses"""
+        with self._lock:
+            self._reset(self._version)
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._lru),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
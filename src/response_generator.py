@@ -6,18 +6,52 @@ OpenAI's LLM API combined with retrieved knowledge base information to
 create comprehensive and helpful IT support responses.
 """
 
-import json
-from typing import List
-import openai
+import logging
+from typing import Any, AsyncIterator, Dict, List
 from .models import ClassificationResult, KnowledgeItem, HelpDeskResponse
+from .category_registry import get_category_registry
 from .config import Config
+from .context_builder import (
+    ContextBuilder,
+    response_max_tokens,
+    trim_to_last_sentence,
+)
+from .metrics import record_token_usage
+from .openai_client import get_async_openai_client, get_openai_client
+
+logger = logging.getLogger(__name__)
+
+NO_KNOWLEDGE_MESSAGE = "No specific knowledge base information available."
+
+# Instructions shared by every request come first, then the category details,
+# and the knowledge and user request last. The shared prefix is far below the
+# ~1024 tokens provider prompt caching needs, so the order alone caches nothing.
+RESPONSE_INSTRUCTIONS = f"""You are an IT support specialist responding to the \
+help desk request at the end of this message.
+
+Please provide a helpful response that:
+1. Acknowledges the user's issue
+2. Provides clear, step-by-step solutions based on the knowledge base
+3. Mentions escalation if required
+4. Is professional and empathetic
+5. Includes specific contact information if needed
+6. Response should be in a well structured test not email
+
+Format your response as a natural, helpful message. \
+Keep it under {Config.MAX_RESPONSE_LENGTH} characters.
+
+"""
 
 
 class ResponseGenerator:
     """Generates contextual responses using LLM and retrieved knowledge"""
 
     def __init__(self):
-        self.client = openai.OpenAI(api_key=Config.OPENAI_API_KEY)
+        self.client = get_openai_client()
+        self.async_client = get_async_openai_client()
+        self.category_registry = get_category_registry()
+        self.context_builder = ContextBuilder()
+        self.max_tokens = response_max_tokens()
 
     def generate_response(
         self,
@@ -30,59 +64,176 @@ class ResponseGenerator:
 
         # Prepare knowledge context
         if not knowledge_items:
+            return self._create_no_knowledge_response(classification, request_id)
+
+        # Create response prompt
+        response_prompt = self._build_response_prompt(
+            user_message, classification, knowledge_items
+        )
+
+        try:
+            # Generate response using LLM
+            response = self.client.chat.completions.create(
+                **self._create_completion_kwargs(response_prompt)
+            )
+
             return HelpDeskResponse(
                 request_id=request_id,
                 classification=classification,
-                response_message="No specific knowledge base information available.",
+                response_message=self._extract_response_text(response),
             )
 
-        context_parts = []
-        for i, item in enumerate(knowledge_items[:5], 1):  # Limit to top 5 items
-            context_parts.append(f"{i}. {item.content} (Source: {item.source})")
+        except Exception as e:
+            logger.warning("Response generation error: %s", e)
+            # Fallback response
+            return self._generate_fallback_response(classification, request_id)
 
-        knowledge_context = "\n".join(context_parts)
+    async def generate_response_async(
+        self,
+        user_message: str,
+        classification: ClassificationResult,
+        knowledge_items: List[KnowledgeItem],
+        request_id: str,
+    ) -> HelpDeskResponse:
+        """Generate a help desk response without blocking the event loop"""
 
-        # Determine escalation details
-        escalation_contact = self._get_escalation_contact(
-            classification.category.value
-        )
+        if not knowledge_items:
+            return self._create_no_knowledge_response(classification, request_id)
 
-        # Create response prompt
-        response_prompt = self._create_response_prompt(
-            user_message, classification, knowledge_context, escalation_contact
+        response_prompt = self._build_response_prompt(
+            user_message, classification, knowledge_items
         )
 
         try:
-            # Generate response using LLM
-            response = self.client.chat.completions.create(
-                model=Config.OPENAI_MODEL,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are a helpful IT support specialist. Provide clear, "
-                            "actionable solutions based on the provided knowledge base."
-                        ),
-                    },
-                    {"role": "user", "content": response_prompt},
-                ],
-                temperature=0.3,
-                max_tokens=800,
+            response = await self.async_client.chat.completions.create(
+                **self._create_completion_kwargs(response_prompt)
             )
 
-            response_text = response.choices[0].message.content.strip()
-
             return HelpDeskResponse(
                 request_id=request_id,
                 classification=classification,
-                response_message=response_text,
+                response_message=self._extract_response_text(response),
             )
 
         except Exception as e:
-            print(f"Response generation error: {e}")
-            # Fallback response
+            logger.warning("Response generation error: %s", e)
             return self._generate_fallback_response(classification, request_id)
 
+    async def stream_response_async(
+        self,
+        user_message: str,
+        classification: ClassificationResult,
+        knowledge_items: List[KnowledgeItem],
+    ) -> AsyncIterator[str]:
+        """Stream the response text as the LLM generates it"""
+
+        if not knowledge_items:
+            yield NO_KNOWLEDGE_MESSAGE
+            return
+
+        response_prompt = self._build_response_prompt(
+            user_message, classification, knowledge_items
+        )
+
+        streamed = False
+        try:
+            stream = await self.async_client.chat.completions.create(
+                **self._create_completion_kwargs(response_prompt),
+                stream=True,
+                # The last chunk then carries the token usage
+                stream_options={"include_usage": True},
+            )
+            async for chunk in stream:
+                record_token_usage("generation", chunk.usage)
+                if not chunk.choices:
+                    continue
+                if chunk.choices[0].delta.content:
+                    streamed = True
+                    yield chunk.choices[0].delta.content
+                if chunk.choices[0].finish_reason == "length":
+                    # Already sent, so the cut-off text cannot be trimmed
+                    logger.warning(
+                        "Streamed response was cut off at %d tokens",
+                        self.max_tokens,
+                    )
+
+        except Exception as e:
+            logger.warning("Response generation error: %s", e)
+            if not streamed:
+                # Nothing reached the user yet, so send the fallback instead
+                yield self._generate_fallback_response(
+                    classification, ""
+                ).response_message
+
+    def _extract_response_text(self, response) -> str:
+        """Return the response text, trimming a sentence cut off by max_tokens"""
+        record_token_usage("generation", response.usage)
+        choice = response.choices[0]
+        response_text = choice.message.content.strip()
+        if choice.finish_reason == "length":
+            logger.warning(
+                "Response was cut off at %d tokens, trimming to the last sentence",
+                self.max_tokens,
+            )
+            response_text = trim_to_last_sentence(response_text)
+        return response_text
+
+    def is_fallback_response(self, response: HelpDeskResponse) -> bool:
+        """Return whether a response is the template used when the LLM fails"""
+        return (
+            response.response_message
+            == self._generate_fallback_response(
+                response.classification, response.request_id
+            ).response_message
+        )
+
+    def _create_no_knowledge_response(
+        self, classification: ClassificationResult, request_id: str
+    ) -> HelpDeskResponse:
+        """Create the response used when no knowledge items were retrieved"""
+        return HelpDeskResponse(
+            request_id=request_id,
+            classification=classification,
+            response_message=NO_KNOWLEDGE_MESSAGE,
+        )
+
+    def _build_response_prompt(
+        self,
+        user_message: str,
+        classification: ClassificationResult,
+        knowledge_items: List[KnowledgeItem],
+    ) -> str:
+        """Build the response prompt from the classification and knowledge items"""
+        # The most relevant items that fit the context token budget
+        knowledge_context = self.context_builder.build(knowledge_items)
+
+        # Determine escalation details
+        escalation_contact = self._get_escalation_contact(
+            classification.category.value
+        )
+
+        return self._create_response_prompt(
+            user_message, classification, knowledge_context, escalation_contact
+        )
+
+    def _create_completion_kwargs(self, response_prompt: str) -> Dict[str, Any]:
+        """Create the chat completion arguments shared by the sync and async paths"""
+        return {
+            "model": Config.OPENAI_MODEL,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": (
+                        "You are a helpful IT support specialist. Provide clear, "
+                        "actionable solutions based on the provided knowledge base."
+                    ),
+                },
+                {"role": "user", "content": response_prompt},
+            ],
+            "temperature": 0.3,
+            "max_tokens": self.max_tokens,
+        }
+
     def _create_response_prompt(
         self,
         user_message: str,
@@ -90,19 +241,13 @@ class ResponseGenerator:
         knowledge_context: str,
         escalation_contact: str,
     ) -> str:
-        """Create the response generation prompt"""
+        """Create the response generation prompt, static instructions first"""
 
         try:
-            with open(Config.CATEGORIES_PATH, "r", encoding="utf-8") as f:
-                categories = json.load(f)["categories"]
-                cat_info = categories.get(classification.category.value, {})
-                description = cat_info.get("description", "N/A")
-                resolution_time = cat_info.get("typical_resolution_time", "N/A")
-                category_info = (
-                    f"Description: {description}\n"
-                    f"Typical Resolution Time: {resolution_time}"
-                )
-        except:
+            category_info = self.category_registry.category_info(
+                classification.category.value
+            )
+        except Exception:
             category_info = "Category information not available"
 
         escalation_info = ""
@@ -111,32 +256,19 @@ class ResponseGenerator:
                 f"\nESCALATION: This request will be escalated to "
                 f"{escalation_contact}"
             )
-        prompt = f"""
-            You are an IT support specialist responding to a help desk request.
-
-            USER REQUEST: "{user_message}"
-
-            CLASSIFICATION: {classification.category.value}
-            REASONING: {classification.reasoning}
-            ESCALATION REQUIRED: {classification.escalation_required}
-            ESCALATION REASON: {classification.escalation_reason or "None"}{escalation_info}
+        prompt = f"""{RESPONSE_INSTRUCTIONS}CATEGORY INFORMATION:
+{category_info}
 
-            CATEGORY INFORMATION:
-            {category_info}
+CLASSIFICATION: {classification.category.value}
+REASONING: {classification.reasoning}
+ESCALATION REQUIRED: {classification.escalation_required}
+ESCALATION REASON: {classification.escalation_reason or "None"}{escalation_info}
 
-            RELEVANT KNOWLEDGE BASE INFORMATION:
-            {knowledge_context}
+RELEVANT KNOWLEDGE BASE INFORMATION:
+{knowledge_context}
 
-            Please provide a helpful response that:
-            1. Acknowledges the user's issue
-            2. Provides clear, step-by-step solutions based on the knowledge base
-            3. Mentions escalation if required
-            4. Is professional and empathetic
-            5. Includes specific contact information if needed
-            6. Response should be in a well structured test not email
-
-            Format your response as a natural, helpful message. Keep it under {Config.MAX_RESPONSE_LENGTH} characters.
-        """
+USER REQUEST: "{user_message}"
+"""
         return prompt
 
     def _get_escalation_contact(self, category: str) -> str:
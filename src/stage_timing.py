@@ -0,0 +1,65 @@
+"""
+Per-request timing of pipeline stages.
+
+Pipeline code wraps each stage in time_stage(); callers that want the timings
+of a request run it inside collect_stage_timings(). The collector lives in a
+context variable, so concurrent requests never mix their timings and tasks
+started with asyncio.gather report into their request's collector. Observers
+see every stage of every request, which is how the metrics are fed.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+_current_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    "stage_timings", default=None
+)
+
+# Called with (stage, seconds) for every timed stage, e.g. to export metrics
+_observers: List[Callable[[str, float], None]] = []
+
+
+def add_stage_observer(observer: Callable[[str, float], None]):
+    """Call observer(stage, seconds) whenever any request finishes a stage"""
+    if observer not in _observers:
+        _observers.append(observer)
+
+
+def record_stage(name: str, seconds: float):
+    """Report time spent in a stage to the observers and the current request"""
+    for observer in _observers:
+        observer(name, seconds)
+    timings = _current_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+@contextmanager
+def time_stage(name: str) -> Iterator[None]:
+    """Time the enclosed block as a pipeline stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+
+async def timed(name: str, awaitable: Awaitable[T]) -> T:
+    """Await a coroutine, timing it as a pipeline stage"""
+    with time_stage(name):
+        return await awaitable
+
+
+@contextmanager
+def collect_stage_timings() -> Iterator[Dict[str, float]]:
+    """Collect the stage timings (in seconds) of the code run inside the block"""
+    timings: Dict[str, float] = {}
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
@@ -0,0 +1,116 @@
+"""
+Vector index construction for the knowledge base.
+
+This module builds the FAISS index used for knowledge retrieval. The index type
+(exact flat, IVF, HNSW or IVF-PQ) and its parameters are selected through
+Config, and every index stores items under their stable knowledge item IDs.
+"""
+
+import logging
+import math
+
+import faiss
+import numpy as np
+
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("flat", "ivf", "hnsw", "ivfpq")
+
+
+def _choose_nlist(num_vectors: int) -> int:
+    """Pick the number of IVF lists, keeping enough training points per list"""
+    nlist = Config.IVF_NLIST or int(4 * math.sqrt(num_vectors))
+    # FAISS wants roughly 39 training points per centroid
+    return max(1, min(nlist, num_vectors // 39))
+
+
+def create_vector_index(
+    dimension: int, num_vectors: int, index_type: str = None
+) -> faiss.Index:
+    """Create an empty, ID-aware FAISS index of the configured type"""
+    # The pylint disables below are for faiss's SWIG signatures, which do not
+    # match the overloads and numpy wrappers faiss exposes
+    index_type = (index_type or Config.VECTOR_INDEX_TYPE).lower()
+    if index_type not in INDEX_TYPES:
+        raise ValueError(
+            f"Unknown vector index type '{index_type}', expected one of {INDEX_TYPES}"
+        )
+
+    if index_type == "hnsw":
+        # pylint: disable-next=no-value-for-parameter,unexpected-keyword-arg
+        index = faiss.IndexHNSWFlat(
+            dimension, Config.HNSW_M, faiss.METRIC_INNER_PRODUCT
+        )
+        index.hnsw.efConstruction = Config.HNSW_EF_CONSTRUCTION
+        return faiss.IndexIDMap2(index)
+
+    if index_type == "ivfpq" and (
+        num_vectors < 2**Config.PQ_NBITS or dimension % Config.PQ_M
+    ):
+        logger.warning(
+            "Not enough vectors (%d) or incompatible PQ_M for IVF-PQ, "
+            "using IVF instead",
+            num_vectors,
+        )
+        index_type = "ivf"
+
+    if index_type in ("ivf", "ivfpq"):
+        nlist = _choose_nlist(num_vectors)
+        quantizer = faiss.IndexFlatIP(dimension)
+        if index_type == "ivfpq":
+            # pylint: disable-next=no-value-for-parameter,unexpected-keyword-arg
+            return faiss.IndexIVFPQ(
+                quantizer,
+                dimension,
+                nlist,
+                Config.PQ_M,
+                Config.PQ_NBITS,
+                faiss.METRIC_INNER_PRODUCT,
+            )
+        # pylint: disable-next=no-value-for-parameter,unexpected-keyword-arg
+        return faiss.IndexIVFFlat(
+            quantizer, dimension, nlist, faiss.METRIC_INNER_PRODUCT
+        )
+
+    return faiss.IndexIDMap2(faiss.IndexFlatIP(dimension))
+
+
+def build_vector_index(
+    embeddings: np.ndarray, ids: np.ndarray, index_type: str = None
+) -> faiss.Index:
+    """Create, train if needed, and fill an index with embeddings under ids"""
+    embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+    index = create_vector_index(embeddings.shape[1], len(embeddings), index_type)
+    if not index.is_trained:
+        index.train(embeddings)  # pylint: disable=no-value-for-parameter
+    # pylint: disable-next=no-value-for-parameter
+    index.add_with_ids(embeddings, np.asarray(ids, dtype="int64"))
+    return index
+
+
+def create_search_params(index, selector=None) -> faiss.SearchParameters:
+    """Create search parameters matching the index type, with an optional filter"""
+    inner = index
+    if isinstance(index, faiss.IndexIDMap):
+        inner = faiss.downcast_index(index.index)
+
+    # The SWIG constructors take no arguments; faiss sets keywords as fields
+    if isinstance(inner, faiss.IndexIVF):
+        # pylint: disable-next=unexpected-keyword-arg
+        return faiss.SearchParametersIVF(sel=selector, nprobe=Config.IVF_NPROBE)
+    if isinstance(inner, faiss.IndexHNSW):
+        # pylint: disable-next=unexpected-keyword-arg
+        return faiss.SearchParametersHNSW(
+            sel=selector, efSearch=Config.HNSW_EF_SEARCH
+        )
+    # pylint: disable-next=unexpected-keyword-arg
+    return faiss.SearchParameters(sel=selector)
+
+
+def supports_removal(index) -> bool:
+    """Return whether vectors can be removed from the index by ID"""
+    if isinstance(index, faiss.IndexIDMap):
+        return not isinstance(faiss.downcast_index(index.index), faiss.IndexHNSW)
+    return True
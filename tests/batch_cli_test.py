@@ -0,0 +1,89 @@
+"""Unit tests for src.batch_cli."""
+
+import asyncio
+import json
+from src.batch_cli import find_resume_line, process_file
+from src.models import ClassificationResult, HelpDeskResponse, RequestCategory
+
+
+class FakeSystem:
+    """Help desk system that answers with the message, slower for short ones."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def process_request_async(self, request):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01 / len(request.user_message))
+        self.in_flight -= 1
+        return HelpDeskResponse(
+            request_id=request.request_id or request.user_message,
+            classification=ClassificationResult(
+                category=RequestCategory.POLICY_QUESTION,
+                reasoning="r",
+                escalation_required=False,
+            ),
+            response_message=request.user_message.upper(),
+        )
+
+
+def write_input(path, messages):
+    """Write one JSON request per line, with raw strings passed through."""
+    with open(path, "w", encoding="utf-8") as f:
+        for message in messages:
+            if isinstance(message, str):
+                f.write(message + "\n")
+            else:
+                f.write(json.dumps(message) + "\n")
+
+
+def read_output(path):
+    """Read the JSONL output records."""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_process_file_writes_results_in_input_order(tmp_path):
+    """Test results keep input order, errors are recorded and concurrency holds."""
+    input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    write_input(
+        input_path,
+        [{"user_message": "a"}, "not json", "", {"user_message": "bbbb"}]
+        + [{"user_message": "c" * i} for i in range(1, 6)],
+    )
+    system = FakeSystem()
+    written = asyncio.run(
+        process_file(system, str(input_path), str(output_path), concurrency=3)
+    )
+    records = read_output(output_path)
+    assert written == 8
+    assert [record["line"] for record in records] == [0, 1, 3, 4, 5, 6, 7, 8]
+    assert "error" in records[1]
+    assert records[2]["response"]["response_message"] == "BBBB"
+    assert system.max_in_flight == 3
+
+
+def test_resume_skips_written_lines_and_drops_partial_record(tmp_path):
+    """Test a resumed run continues after the last complete record."""
+    input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    write_input(input_path, [{"user_message": m} for m in ["a", "b", "c"]])
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"line": 0, "response": {}}) + "\n")
+        f.write('{"line": 1, "resp')
+
+    start_line = find_resume_line(str(output_path))
+    assert start_line == 1
+    asyncio.run(
+        process_file(
+            FakeSystem(),
+            str(input_path),
+            str(output_path),
+            2,
+            start_line=start_line,
+        )
+    )
+    assert [record["line"] for record in read_output(output_path)] == [0, 1, 2]
+    assert find_resume_line(str(output_path)) == 3
+    assert find_resume_line(str(tmp_path / "missing.jsonl")) == 0
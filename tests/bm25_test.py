@@ -0,0 +1,76 @@
+"""Unit tests for src.bm25."""
+
+import pytest
+from src.bm25 import BM25Index, fuse_scores
+
+
+def make_index() -> BM25Index:
+    """Create an index over a few help desk snippets."""
+    index = BM25Index()
+    index.add(0, "Configure IMAP on port 993 for Outlook", "email_configuration")
+    index.add(1, "Reset your password through the self-service portal", "general")
+    index.add(2, "Install the VPN client and connect to the VPN", "general")
+    return index
+
+
+def test_tokenize_lowercases_and_drops_stopwords():
+    """Test tokens are lowercase alphanumerics without stopwords."""
+    assert BM25Index.tokenize("How do I set up IMAP, port 993?") == [
+        "set",
+        "up",
+        "imap",
+        "port",
+        "993",
+    ]
+
+
+def test_search_ranks_exact_keyword_match_first():
+    """Test exact tokens rank the matching document first with a high score."""
+    results = make_index().search("imap port 993", top_k=3)
+    assert results[0][0] == 0
+    assert 0.8 <= results[0][1] <= 1.0
+    assert len(results) == 1
+
+
+def test_search_unknown_terms_lower_the_score():
+    """Test query terms missing from the index count against confidence."""
+    index = make_index()
+    full = index.search("vpn", top_k=1)[0][1]
+    partial = index.search("vpn zzzunknown", top_k=1)[0][1]
+    assert partial < full
+
+
+def test_search_restricts_to_groups():
+    """Test group filtering mirrors category filtering."""
+    index = make_index()
+    assert (
+        index.search("imap", top_k=3, groups=("password_reset", "general")) == []
+    )
+    assert (
+        index.search("imap", top_k=3, groups=("email_configuration",))[0][0] == 0
+    )
+
+
+def test_add_replaces_and_remove_deletes_documents():
+    """Test documents can be replaced and removed by ID."""
+    index = make_index()
+    index.add(0, "Printer driver installation")
+    assert index.search("imap", top_k=3) == []
+    index.remove(0)
+    index.remove(0)
+    assert len(index) == 2
+    assert index.search("printer", top_k=3) == []
+
+
+def test_fuse_scores_rrf_and_weighted():
+    """Test both fusion methods combine the two rankings."""
+    vector = [(1, 0.9), (2, 0.8)]
+    lexical = [(3, 1.0), (2, 0.5)]
+    rrf = fuse_scores(vector, lexical, "rrf", rrf_k=60)
+    assert rrf[0][0] == 2
+    assert {doc_id for doc_id, _ in rrf} == {1, 2, 3}
+
+    weighted = fuse_scores(vector, lexical, "weighted", lexical_weight=0.5)
+    assert weighted[0] == (2, pytest.approx(0.65))
+    with pytest.raises(ValueError):
+        fuse_scores(vector, lexical, "max")
@@ -0,0 +1,80 @@
+"""Unit tests for src.category_registry."""
+
+import json
+import os
+from unittest.mock import patch
+import pytest
+from src.category_registry import CategoryRegistry
+
+CATEGORIES = {
+    "password_reset": {
+        "description": "Password resets",
+        "escalation_triggers": ["account compromised"],
+        "typical_resolution_time": "5 minutes",
+    },
+    "policy_question": {"description": "IT policies"},
+}
+
+
+def write_categories(path, categories, mtime_ns=None):
+    """Write a categories file, optionally with a given modification time."""
+    path.write_text(json.dumps({"categories": categories}))
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_fragments_are_precomputed_once(tmp_path):
+    """Test the file is parsed once and both prompt fragments are built."""
+    path = tmp_path / "categories.json"
+    write_categories(path, CATEGORIES)
+    registry = CategoryRegistry(str(path), check_interval=60)
+
+    assert registry.classification_text == (
+        "- password_reset: Password resets (Escalation triggers: "
+        "account compromised)\n- policy_question: IT policies\n"
+    )
+    with patch("builtins.open", side_effect=AssertionError("file reopened")):
+        assert registry.category_info("password_reset") == (
+            "Description: Password resets\nTypical Resolution Time: 5 minutes"
+        )
+        assert registry.category_info("policy_question").endswith("Time: N/A")
+        assert registry.category_info("unknown") == (
+            "Description: N/A\nTypical Resolution Time: N/A"
+        )
+
+
+def test_reloads_when_the_file_changes(tmp_path):
+    """Test edits are picked up, and a broken edit keeps the old definitions."""
+    path = tmp_path / "categories.json"
+    write_categories(path, CATEGORIES, mtime_ns=1_000_000_000)
+    registry = CategoryRegistry(str(path))
+    first = registry.snapshot()
+    assert registry.snapshot() is first
+
+    write_categories(
+        path, {"hardware_failure": {"description": "Broken"}}, 2 * 10**9
+    )
+    assert list(registry.categories) == ["hardware_failure"]
+
+    path.write_text("{not json")
+    os.utime(path, ns=(3 * 10**9, 3 * 10**9))
+    assert list(registry.categories) == ["hardware_failure"]
+
+
+def test_checks_are_throttled(tmp_path):
+    """Test the file is not checked again within the reload interval."""
+    path = tmp_path / "categories.json"
+    write_categories(path, CATEGORIES, mtime_ns=1_000_000_000)
+    registry = CategoryRegistry(str(path), check_interval=60)
+    registry.snapshot()
+    write_categories(path, {}, mtime_ns=2_000_000_000)
+    assert "password_reset" in registry.categories
+
+
+def test_missing_file_raises_until_loaded(tmp_path):
+    """Test a registry that never loaded reports the error on every use."""
+    registry = CategoryRegistry(str(tmp_path / "categories.json"))
+    with pytest.raises(FileNotFoundError):
+        registry.snapshot()
+    write_categories(tmp_path / "categories.json", CATEGORIES)
+    assert "policy_question" in registry.categories
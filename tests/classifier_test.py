@@ -1,10 +1,12 @@
 """Unit tests for src.classifier.RequestClassifier covering all logic branches."""
 
+import asyncio
 import json
-from unittest.mock import mock_open, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from src.category_registry import CategoryRegistry
 from src.classifier import RequestClassifier
 from src.models import ClassificationResult, RequestCategory
 
@@ -15,13 +17,13 @@ def mock_categories():
 
 
 @pytest.fixture
-def classifier_fixture():
+def classifier_fixture(tmp_path):
     """Fixture to create a RequestClassifier with mocked categories file."""
-    with patch(
-        "builtins.open",
-        mock_open(read_data=json.dumps({"categories": mock_categories()})),
-    ):
-        return RequestClassifier()
+    categories_path = tmp_path / "categories.json"
+    categories_path.write_text(json.dumps({"categories": mock_categories()}))
+    classifier = RequestClassifier()
+    classifier.category_registry = CategoryRegistry(str(categories_path))
+    return classifier
 
 
 def test_classify_request_normal(classifier_fixture):
@@ -122,6 +124,16 @@ def test_create_classification_prompt(classifier_fixture):
     assert "password_reset" in prompt
 
 
+def test_classification_prompt_prefix_is_stable(classifier_fixture):
+    """Test the prompt starts with a prefix that is the same for every request."""
+    prefix = classifier_fixture.create_classification_prefix()
+    first = classifier_fixture.create_classification_prompt("reset my password")
+    second = classifier_fixture.create_classification_prompt("vpn is down")
+    assert "password_reset" in prefix
+    assert first.startswith(prefix) and second.startswith(prefix)
+    assert first[len(prefix) :] == 'User Request: "reset my password"'
+
+
 def test_parse_classification_response_valid(classifier_fixture):
     """Test parsing a valid JSON LLM response."""
     response_json = (
@@ -140,3 +152,19 @@ def test_parse_classification_response_invalid_json(classifier_fixture):
     assert resp["category"] == "general"
     assert resp["confidence"] == 0.5
     assert resp["escalate"] is False
+
+
+def test_classify_request_async(classifier_fixture):
+    """Test async classification awaits the async client."""
+    with patch.object(classifier_fixture, "async_client") as mock_client:
+        completion = MagicMock()
+        completion.choices[0].message.content = (
+            '{"category": "password_reset", "confidence": 0.95, '
+            '"reasoning": "reason", "escalate": false, "escalation_reason": null}'
+        )
+        mock_client.chat.completions.create = AsyncMock(return_value=completion)
+        result = asyncio.run(
+            classifier_fixture.classify_request_async("reset my password")
+        )
+        assert result.category == RequestCategory.PASSWORD_RESET
+        mock_client.chat.completions.create.assert_awaited_once()
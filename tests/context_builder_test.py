@@ -0,0 +1,122 @@
+"""Unit tests for src.context_builder."""
+
+from unittest.mock import patch
+
+import numpy as np
+
+from src.config import Config
+from src.context_builder import (
+    ContextBuilder,
+    count_tokens,
+    response_max_tokens,
+    trim_to_last_sentence,
+    truncate_to_tokens,
+)
+from src.knowledge_base import KnowledgeBaseManager
+from src.models import KnowledgeItem
+from src.vector_index import build_vector_index
+
+
+def make_item(content, relevance_score, source="kb"):
+    """Helper to create a KnowledgeItem."""
+    return KnowledgeItem(
+        content=content,
+        source=source,
+        relevance_score=relevance_score,
+        category="password_reset",
+    )
+
+
+def estimate_tokens():
+    """Patch the tokenizer lookup so tokens are estimated from the length."""
+    return patch("src.context_builder._get_encoding", return_value=None)
+
+
+def test_count_tokens_estimates_without_tokenizer():
+    """Test the fallback estimate of four characters per token."""
+    with estimate_tokens():
+        assert count_tokens("") == 0
+        assert count_tokens("abcd") == 1
+        assert count_tokens("abcde") == 2
+
+
+def test_truncate_to_tokens_ends_on_a_word():
+    """Test truncation stays within the budget and does not cut words."""
+    text = " ".join(["word"] * 100)
+    with estimate_tokens():
+        assert truncate_to_tokens("short text", 10) == "short text"
+        truncated = truncate_to_tokens(text, 20)
+        assert count_tokens(truncated) <= 20
+        assert truncated.endswith("word...")
+
+
+def test_select_keeps_most_relevant_items_within_budget():
+    """Test items are ranked by relevance and the one crossing the budget is cut."""
+    items = [
+        make_item("low " * 100, 0.71),
+        make_item("high " * 20, 0.95),
+        make_item("mid " * 100, 0.8),
+    ]
+    builder = ContextBuilder(token_budget=100, min_item_tokens=10)
+    with estimate_tokens():
+        selected = builder.select(items)
+        used = sum(
+            builder.count_item_tokens(item, position)
+            for position, item in enumerate(selected, 1)
+        )
+    assert [item.relevance_score for item in selected] == [0.95, 0.8]
+    assert selected[0].content == items[1].content
+    assert selected[1].content.endswith("...")
+    assert used <= 100
+
+
+def test_select_drops_items_too_small_to_be_useful():
+    """Test an item is dropped when less than min_item_tokens would remain."""
+    items = [make_item("a " * 180, 0.9), make_item("b " * 100, 0.8)]
+    builder = ContextBuilder(token_budget=100, min_item_tokens=50)
+    with estimate_tokens():
+        assert [item.relevance_score for item in builder.select(items)] == [0.9]
+
+
+def test_build_numbers_items_and_honours_max_items():
+    """Test the context lists at most max_items items with their sources."""
+    items = [make_item(f"item {i}", 0.9 - i / 100, f"src{i}") for i in range(4)]
+    builder = ContextBuilder(token_budget=1000, max_items=2)
+    with estimate_tokens():
+        context = builder.build(items)
+    assert context == "1. item 0 (Source: src0)\n2. item 1 (Source: src1)"
+
+
+def test_response_max_tokens_scales_with_response_length():
+    """Test the completion limit follows the response length budget."""
+    assert response_max_tokens(500, 1.0) == 125
+    assert response_max_tokens(500, 1.5) == 188
+    assert response_max_tokens(0, 1.5) == 1
+
+
+def test_trim_to_last_sentence():
+    """Test a cut-off sentence is dropped only when a complete one is left."""
+    assert trim_to_last_sentence("Restart it. Then open the Set") == "Restart it."
+    assert (
+        trim_to_last_sentence("Version 2.1 is out! Then") == "Version 2.1 is out!"
+    )
+    assert trim_to_last_sentence("No sentence end here") == "No sentence end here"
+
+
+def test_select_ranks_each_batched_search_row_by_its_own_scores():
+    """Test scores from one batched search row survive the search of the next."""
+    kb = KnowledgeBaseManager()
+    kb.knowledge_items = [make_item("a", 0.0), make_item("b", 0.0)]
+    for item_id, item in enumerate(kb.knowledge_items):
+        item.item_id = item_id
+    kb.vector_index = build_vector_index(np.eye(2, 3), np.arange(2, dtype="int64"))
+    kb.index_version += 1
+    with patch.object(Config, "SIMILARITY_THRESHOLD", 0.0):
+        rows = kb.search_batch_with_query_embeddings(
+            ["q1", "q2"],
+            [{"q1": [0.9, 0.1, 0.0]}, {"q2": [0.2, 0.8, 0.0]}],
+            [None, None],
+        )
+    builder = ContextBuilder(token_budget=100, min_item_tokens=1, max_items=1)
+    with estimate_tokens():
+        assert [builder.select(row)[0].content for row in rows] == ["a", "b"]
@@ -0,0 +1,89 @@
+"""Unit tests for src.embedding_batcher.EmbeddingBatcher."""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from src.embedding_batcher import EmbeddingBatcher
+
+
+def fake_embed():
+    """Return an async embeddings function mapping text to [len(text)]."""
+    return AsyncMock(side_effect=lambda texts: [[float(len(t))] for t in texts])
+
+
+def test_concurrent_callers_share_one_call():
+    """Test requests within the window are sent as one deduplicated batch."""
+    embed = fake_embed()
+    batcher = EmbeddingBatcher(embed, max_batch_size=50, max_wait_ms=10)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.embed(["a"]),
+            batcher.embed(["bb", "a"]),
+            batcher.embed(["ccc"]),
+        )
+
+    assert asyncio.run(run()) == [[[1.0]], [[2.0], [1.0]], [[3.0]]]
+    embed.assert_awaited_once_with(["a", "bb", "ccc"])
+    assert batcher.batches_sent == 1
+
+
+def test_full_batch_is_sent_without_waiting():
+    """Test reaching the batch size flushes before the window expires."""
+    embed = fake_embed()
+    batcher = EmbeddingBatcher(embed, max_batch_size=2, max_wait_ms=60_000)
+
+    async def run():
+        return await asyncio.wait_for(
+            asyncio.gather(batcher.embed(["a"]), batcher.embed(["b"])), timeout=1
+        )
+
+    assert asyncio.run(run()) == [[[1.0]], [[1.0]]]
+    assert batcher.batches_sent == 1
+
+
+def test_errors_are_raised_to_every_caller():
+    """Test a failed call fails all requests in the batch."""
+    embed = AsyncMock(side_effect=RuntimeError("rate limited"))
+    batcher = EmbeddingBatcher(embed, max_batch_size=50, max_wait_ms=1)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.embed(["a"]), batcher.embed(["b"]), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    with pytest.raises(RuntimeError):
+        asyncio.run(batcher.embed(["c"]))
+
+
+def test_missing_vectors_fail_their_callers():
+    """Test a short response fails the callers instead of leaving them waiting."""
+    embed = AsyncMock(return_value=[[1.0]])
+    batcher = EmbeddingBatcher(embed, max_batch_size=50, max_wait_ms=1)
+
+    async def run():
+        return await asyncio.wait_for(
+            asyncio.gather(
+                batcher.embed(["a"]), batcher.embed(["b"]), return_exceptions=True
+            ),
+            timeout=1,
+        )
+
+    results = asyncio.run(run())
+    assert results[0] == [[1.0]]
+    assert isinstance(results[1], KeyError)
+
+
+def test_flush_scheduled_on_a_closed_loop_is_dropped():
+    """Test a batcher keeps working after the loop that scheduled a flush closes."""
+    embed = AsyncMock(side_effect=lambda texts: [[1.0] for _ in texts])
+    batcher = EmbeddingBatcher(embed, max_batch_size=50, max_wait_ms=50)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(asyncio.wait_for(batcher.embed(["a"]), timeout=0.001))
+
+    result = asyncio.run(asyncio.wait_for(batcher.embed(["b"]), timeout=1))
+    assert result == [[1.0]]
+    embed.assert_awaited_once_with(["b"])
@@ -0,0 +1,61 @@
+"""Unit tests for src.embedding_builder.EmbeddingBuilder."""
+
+import itertools
+from unittest.mock import MagicMock
+import openai
+from src.embedding_builder import EmbeddingBuilder
+from src.embedding_store import EmbeddingStore
+
+
+def make_builder(tmp_path, client=None):
+    """Create an EmbeddingBuilder storing under tmp_path."""
+    return EmbeddingBuilder(
+        client or MagicMock(),
+        "test-model",
+        EmbeddingStore(str(tmp_path / "store.sqlite3")),
+        str(tmp_path / "build_checkpoint.json"),
+    )
+
+
+def test_fetch_embeddings_batches(tmp_path):
+    """Test batching of OpenAI embeddings call with mocked client."""
+    builder = make_builder(tmp_path)
+    builder.client.embeddings.create.return_value.data = [
+        MagicMock(embedding=[0.1, 0.2, 0.3]) for _ in range(2)
+    ]
+    result = builder.fetch_embeddings(["a", "b"])
+    assert isinstance(result, list)
+    assert result[0] == [0.1, 0.2, 0.3]
+
+
+def test_fetch_embeddings_parallel_retries_rate_limits(tmp_path):
+    """Test large inputs are embedded in parallel batches and 429s are retried."""
+    client = MagicMock()
+    attempts = itertools.count()
+
+    def create(input, model):  # pylint: disable=redefined-builtin
+        if next(attempts) == 0:
+            raise openai.RateLimitError(
+                "slow down",
+                response=MagicMock(headers={"retry-after": "0"}),
+                body=None,
+            )
+        return MagicMock(data=[MagicMock(embedding=[float(t)]) for t in input])
+
+    client.embeddings.create.side_effect = create
+    builder = make_builder(tmp_path, MagicMock(with_options=lambda **_: client))
+    texts = [str(i) for i in range(120)]
+    result = builder.fetch_embeddings(texts)
+    assert result == [[float(t)] for t in texts]
+    assert client.embeddings.create.call_count == 4
+
+
+def test_get_embeddings_stores_fetched_embeddings(tmp_path):
+    """Test duplicate and stored texts are not sent to the API again."""
+    builder = make_builder(tmp_path)
+    builder.fetch_embeddings = MagicMock(return_value=[[1.0, 0.0]])
+    first = builder.get_embeddings(["a", "a"])
+    second = builder.get_embeddings(["a"])
+    assert first.tolist() == [[1.0, 0.0], [1.0, 0.0]]
+    assert second.tolist() == [[1.0, 0.0]]
+    builder.fetch_embeddings.assert_called_once_with(["a"])
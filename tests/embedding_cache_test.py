@@ -0,0 +1,43 @@
+"""Unit tests for src.embedding_cache.EmbeddingCache."""
+
+from unittest.mock import patch
+from src.embedding_cache import EmbeddingCache
+
+
+def test_get_normalizes_query_text():
+    """Test that whitespace and case differences share a cache entry."""
+    cache = EmbeddingCache(max_size=10, ttl_seconds=60)
+    cache.put("VPN not  working", "model", [0.1, 0.2])
+    assert cache.get("  vpn not working ", "model") == [0.1, 0.2]
+    assert cache.get("vpn not working", "other-model") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_put_evicts_least_recently_used():
+    """Test LRU eviction once the cache is full."""
+    cache = EmbeddingCache(max_size=2, ttl_seconds=60)
+    cache.put("a", "m", [1.0])
+    cache.put("b", "m", [2.0])
+    cache.get("a", "m")
+    cache.put("c", "m", [3.0])
+    assert cache.get("b", "m") is None
+    assert cache.get("a", "m") == [1.0]
+    assert cache.stats()["size"] == 2
+
+
+def test_get_expires_entries_after_ttl():
+    """Test that entries older than the TTL are treated as misses."""
+    cache = EmbeddingCache(max_size=10, ttl_seconds=5)
+    with patch("src.embedding_cache.time.monotonic", return_value=100.0):
+        cache.put("a", "m", [1.0])
+    with patch("src.embedding_cache.time.monotonic", return_value=106.0):
+        assert cache.get("a", "m") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_zero_size_disables_cache():
+    """Test that a max size of zero never stores entries."""
+    cache = EmbeddingCache(max_size=0, ttl_seconds=60)
+    cache.put("a", "m", [1.0])
+    assert cache.get("a", "m") is None
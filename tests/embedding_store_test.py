@@ -0,0 +1,28 @@
+"""Unit tests for src.embedding_store.EmbeddingStore."""
+
+import numpy as np
+from src.embedding_store import EmbeddingStore
+
+
+def test_put_and_get_many_round_trip(tmp_path):
+    """Test embeddings are persisted and returned in input order."""
+    path = str(tmp_path / "store.sqlite3")
+    store = EmbeddingStore(path)
+    store.put_many(["a", "b"], [[1.0, 0.0], [0.0, 1.0]], "model")
+    store.close()
+
+    reopened = EmbeddingStore(path)
+    result = reopened.get_many(["b", "missing", "a"], "model")
+    assert result[0].tolist() == [0.0, 1.0]
+    assert result[1] is None
+    assert result[2].tolist() == [1.0, 0.0]
+
+
+def test_entries_are_keyed_by_model(tmp_path):
+    """Test the same content embedded with another model is a miss."""
+    store = EmbeddingStore(str(tmp_path / "store.sqlite3"))
+    store.put_many(["a"], [[1.0]], "model-a")
+    assert store.get_many(["a"], "model-b") == [None]
+    assert EmbeddingStore.content_hash("a", "model-a") != (
+        EmbeddingStore.content_hash("a", "model-b")
+    )
@@ -0,0 +1,113 @@
+"""Unit tests for src.evaluation."""
+
+import asyncio
+import json
+from unittest.mock import patch
+from src.config import Config
+from src.evaluation import load_test_cases, run_evaluation, score_response
+from src.models import ClassificationResult, HelpDeskResponse, RequestCategory
+from src.stage_timing import record_stage
+
+TEST_CASES = [
+    {
+        "id": "t1",
+        "request": "I forgot my password",
+        "expected_classification": "password_reset",
+        "expected_elements": ["Reset", "portal"],
+        "escalate": False,
+    },
+    {
+        "id": "t2",
+        "request": "I clicked a suspicious link",
+        "expected_classification": "security_incident",
+        "expected_elements": ["security"],
+        "escalate": True,
+    },
+]
+
+
+class FakeSystem:
+    """Help desk system that always answers with a password reset."""
+
+    async def process_request_async(self, request):
+        record_stage("classification", 0.01)
+        record_stage("retrieval", 0.02)
+        await asyncio.sleep(0)
+        return HelpDeskResponse(
+            request_id=request.request_id,
+            classification=ClassificationResult(
+                category=RequestCategory.PASSWORD_RESET,
+                reasoning="r",
+                escalation_required=False,
+            ),
+            response_message="Use the self-service reset portal.",
+        )
+
+
+def test_load_test_cases_skips_incomplete_entries(tmp_path):
+    """Test entries without a request or expected category are skipped."""
+    path = tmp_path / "test_requests.json"
+    path.write_text(
+        json.dumps(
+            {
+                "test_requests": TEST_CASES
+                + [{"id": "t3", "request": "no label"}, {"id": "t4"}]
+            }
+        )
+    )
+    assert [case["id"] for case in load_test_cases(str(path))] == ["t1", "t2"]
+
+
+def test_score_response_matches_elements_ignoring_case():
+    """Test classification, escalation and element checks of one response."""
+    response = HelpDeskResponse(
+        request_id="1",
+        classification=ClassificationResult(
+            category=RequestCategory.PASSWORD_RESET,
+            reasoning="r",
+            escalation_required=True,
+        ),
+        response_message="Please RESET it yourself.",
+    )
+    result = score_response(TEST_CASES[0], response)
+    assert result.test_id == "t1"
+    assert result.correct_classification
+    assert not result.escalation_correct
+    assert result.found_elements == ["Reset"]
+    assert result.response_quality_score == 0.5
+
+
+def test_run_evaluation_reports_accuracy_and_stage_latencies():
+    """Test the report aggregates results and per-stage percentiles."""
+    report = asyncio.run(
+        run_evaluation(FakeSystem(), TEST_CASES, concurrency=2, repeat=2)
+    )
+    summary = report["summary"]
+    assert summary["num_requests"] == 4
+    assert summary["classification_accuracy"] == 0.5
+    assert summary["escalation_accuracy"] == 0.5
+    assert summary["mean_response_quality"] == 0.5
+    assert summary["category_accuracy"] == {
+        "password_reset": 1.0,
+        "security_incident": 0.0,
+    }
+    assert summary["throughput_rps"] > 0
+    assert set(summary["latency"]) == {"classification", "retrieval", "total"}
+    assert summary["latency"]["retrieval"]["p95_ms"] == 20.0
+    assert summary["latency"]["total"]["count"] == 4
+    assert report["config"]["repeat"] == 2
+    assert len(report["results"]) == 4
+    json.dumps(report)
+
+
+def test_run_evaluation_reports_local_classifier_training_overlap(tmp_path):
+    """Test the report records the training source and its overlap."""
+    training_path = tmp_path / "training_requests.json"
+    training_path.write_text(json.dumps({"test_requests": TEST_CASES[:1]}))
+    with patch.object(Config, "LOCAL_CLASSIFIER_ENABLED", True), patch.object(
+        Config, "LOCAL_CLASSIFIER_TRAINING_PATH", str(training_path)
+    ):
+        report = asyncio.run(run_evaluation(FakeSystem(), TEST_CASES))
+    assert report["config"]["local_classifier_enabled"] is True
+    assert report["config"]["local_classifier_training_path"] == str(training_path)
+    assert report["config"]["local_classifier_training_overlap"] == 1
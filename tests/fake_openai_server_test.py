@@ -0,0 +1,95 @@
+"""Unit tests for src.fake_openai_server."""
+
+import json
+import numpy as np
+import openai
+import pytest
+from fastapi.testclient import TestClient
+from src.fake_openai_server import (
+    FakeServerOptions,
+    LatencyModel,
+    create_app,
+    deterministic_embedding,
+    fake_completion_text,
+)
+
+
+def make_client(**kwargs):
+    """Return an OpenAI SDK client talking to an instant fake server."""
+    app = create_app(
+        LatencyModel("fixed", 0, 0),
+        LatencyModel("fixed", 0, 0),
+        FakeServerOptions(embedding_dimension=8, **kwargs),
+    )
+    return app, openai.OpenAI(
+        api_key="fake",
+        base_url="http://testserver/v1",
+        http_client=TestClient(app),
+        max_retries=0,
+    )
+
+
+def test_latency_model_distributions():
+    """Test each distribution's samples and the unknown-name error."""
+    rng = np.random.default_rng(0)
+    assert LatencyModel("fixed", 250, 0).sample() == 0.25
+    uniform = [LatencyModel("uniform", 100, 0, rng).sample() for _ in range(500)]
+    assert 0 <= min(uniform) and max(uniform) <= 0.2
+    lognormal = [
+        LatencyModel("lognormal", 100, 0.5, rng).sample() for _ in range(2000)
+    ]
+    assert 0.09 < np.median(lognormal) < 0.11
+    with pytest.raises(ValueError):
+        LatencyModel("gamma", 100, 0)
+
+
+def test_embeddings_are_deterministic_through_the_sdk():
+    """Test the SDK gets the same normalized vector for the same text."""
+    _, client = make_client()
+    response = client.embeddings.create(input=["vpn", "printer", "vpn"], model="m")
+    vectors = [np.array(item.embedding) for item in response.data]
+    assert len(vectors[0]) == 8
+    np.testing.assert_allclose(vectors[0], vectors[2])
+    np.testing.assert_allclose(
+        vectors[0], deterministic_embedding("vpn", 8), rtol=1e-6
+    )
+    assert not np.allclose(vectors[0], vectors[1])
+    assert np.isclose(np.linalg.norm(vectors[1]), 1.0)
+
+
+def test_chat_completion_answers_classification_prompts_with_json():
+    """Test classification prompts get a listed category, others filler text."""
+    prompt = (
+        "- password_reset: Password issues\n- hardware_failure: Broken devices\n"
+        'User Request: "I forgot my password"\n'
+        '{"category": "category_name"}'
+    )
+    data = json.loads(fake_completion_text([{"content": prompt}], 10))
+    assert data["category"] in ("password_reset", "hardware_failure")
+    assert data == json.loads(fake_completion_text([{"content": prompt}], 10))
+    assert len(fake_completion_text([{"content": "help"}], 10).split()) == 10
+
+
+def test_chat_completion_streams_and_reports_usage():
+    """Test plain and streamed completions parse in the SDK."""
+    _, client = make_client(completion_words=5)
+    messages = [{"role": "user", "content": "my laptop is slow"}]
+    response = client.chat.completions.create(model="m", messages=messages)
+    assert len(response.choices[0].message.content.split()) == 5
+    assert response.usage.total_tokens > 0
+
+    stream = client.chat.completions.create(
+        model="m", messages=messages, stream=True
+    )
+    text = "".join(
+        chunk.choices[0].delta.content or "" for chunk in stream if chunk.choices
+    )
+    assert text == response.choices[0].message.content
+
+
+def test_injected_errors_surface_as_api_errors():
+    """Test an error rate of 1 makes every call fail with the given status."""
+    app, client = make_client(error_rate=1.0, error_status=429)
+    with pytest.raises(openai.RateLimitError):
+        client.embeddings.create(input="vpn", model="m")
+    assert app.state.requests == {"chat": 0, "embeddings": 1, "errors": 1}
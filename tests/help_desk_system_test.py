@@ -6,15 +6,22 @@ testing various scenarios including normal operation, error handling,
 and system health monitoring.
 """
 
-from unittest.mock import patch, MagicMock
+import asyncio
+from unittest.mock import patch, MagicMock, AsyncMock
+import numpy as np
+from src.config import Config
 from src.help_desk_system import IntelligentHelpDeskSystem
+from src.knowledge_base import KnowledgeBaseManager
+from src.stage_timing import collect_stage_timings
 from src.models import (
     HelpDeskRequest,
     HelpDeskResponse,
     ClassificationResult,
+    KnowledgeItem,
     RequestCategory,
     SystemHealth,
 )
+from src.vector_index import build_vector_index
 
 
 def test_process_request_normal():
@@ -41,6 +48,275 @@ def test_process_request_normal():
         assert resp.response_message == "msg"
 
 
+def test_process_request_async():
+    """Test the async pipeline awaits every component."""
+    system = IntelligentHelpDeskSystem()
+    request = HelpDeskRequest(user_message="reset my password")
+    classification = ClassificationResult(
+        category=RequestCategory.PASSWORD_RESET,
+        reasoning="reason",
+        escalation_required=False,
+    )
+    with patch.object(system, "classifier") as mock_classifier, patch.object(
+        system, "knowledge_base"
+    ) as mock_kb, patch.object(system, "response_generator") as mock_rg:
+        mock_classifier.classify_request_async = AsyncMock(
+            return_value=classification
+        )
+        mock_kb.search_knowledge_async = AsyncMock(return_value=[])
+        mock_rg.generate_response_async = AsyncMock(
+            return_value=HelpDeskResponse(
+                request_id="1",
+                classification=classification,
+                response_message="msg",
+            )
+        )
+        with patch.object(Config, "PARALLEL_RETRIEVAL", False):
+            resp = asyncio.run(system.process_request_async(request))
+        assert resp.response_message == "msg"
+        assert request.request_id is not None
+        mock_kb.search_knowledge_async.assert_awaited_once()
+
+
+def test_process_request_async_parallel_retrieval():
+    """Test parallel mode embeds the query alongside classification."""
+    system = IntelligentHelpDeskSystem()
+    request = HelpDeskRequest(user_message="reset my password")
+    classification = ClassificationResult(
+        category=RequestCategory.PASSWORD_RESET,
+        reasoning="reason",
+        escalation_required=False,
+    )
+    with patch.object(system, "classifier") as mock_classifier, patch.object(
+        system, "knowledge_base"
+    ) as mock_kb, patch.object(system, "response_generator") as mock_rg:
+        mock_classifier.classify_request_async = AsyncMock(
+            return_value=classification
+        )
+        mock_kb.embed_query_variants_async = AsyncMock(return_value={})
+        mock_kb.search_with_query_embeddings.return_value = []
+        mock_rg.generate_response_async = AsyncMock(
+            return_value=HelpDeskResponse(
+                request_id="1",
+                classification=classification,
+                response_message="msg",
+            )
+        )
+        with patch.object(
+            Config, "PARALLEL_RETRIEVAL", True
+        ), collect_stage_timings() as timings:
+            resp = asyncio.run(system.process_request_async(request))
+        assert resp.response_message == "msg"
+        assert set(timings) == {"classification", "retrieval", "generation"}
+        mock_kb.embed_query_variants_async.assert_awaited_once()
+        mock_kb.search_with_query_embeddings.assert_called_once()
+        mock_kb.search_knowledge_async.assert_not_called()
+
+
+def test_process_request_async_serves_paraphrase_from_response_cache():
+    """Test a cached response is reused with a fresh request ID."""
+    system = IntelligentHelpDeskSystem()
+    classification = ClassificationResult(
+        category=RequestCategory.PASSWORD_RESET,
+        reasoning="reason",
+        escalation_required=False,
+    )
+    with patch.object(system, "classifier") as mock_classifier, patch.object(
+        system, "knowledge_base"
+    ) as mock_kb, patch.object(
+        system, "response_generator"
+    ) as mock_rg, patch.object(
+        Config, "RESPONSE_CACHE_ENABLED", True
+    ), patch.object(
+        Config, "PARALLEL_RETRIEVAL", False
+    ):
+        mock_classifier.classify_request_async = AsyncMock(
+            return_value=classification
+        )
+        mock_kb.index_version = 1
+        mock_kb.search_knowledge_async = AsyncMock(return_value=[MagicMock()])
+        mock_kb.embed_query_async = AsyncMock(
+            side_effect=[[1.0, 0.0], [0.99, 0.1]]
+        )
+        mock_rg.is_fallback_response.return_value = False
+        mock_rg.generate_response_async = AsyncMock(
+            return_value=HelpDeskResponse(
+                request_id="first",
+                classification=classification,
+                response_message="msg",
+            )
+        )
+        asyncio.run(
+            system.process_request_async(
+                HelpDeskRequest(
+                    user_message="reset my password", request_id="first"
+                )
+            )
+        )
+        resp = asyncio.run(
+            system.process_request_async(
+                HelpDeskRequest(
+                    user_message="I forgot my password", request_id="2nd"
+                )
+            )
+        )
+        assert resp.response_message == "msg"
+        assert resp.request_id == "2nd"
+        assert resp.classification is classification
+        mock_rg.generate_response_async.assert_awaited_once()
+
+
+def test_process_request_async_skips_response_cache_for_escalations():
+    """Test a request needing escalation always gets a generated response."""
+    system = IntelligentHelpDeskSystem()
+    classification = ClassificationResult(
+        category=RequestCategory.PASSWORD_RESET,
+        reasoning="reason",
+        escalation_required=True,
+        escalation_reason="locked out",
+    )
+    with patch.object(system, "classifier") as mock_classifier, patch.object(
+        system, "knowledge_base"
+    ) as mock_kb, patch.object(
+        system, "response_generator"
+    ) as mock_rg, patch.object(
+        Config, "RESPONSE_CACHE_ENABLED", True
+    ), patch.object(
+        Config, "PARALLEL_RETRIEVAL", False
+    ):
+        mock_classifier.classify_request_async = AsyncMock(
+            return_value=classification
+        )
+        mock_kb.index_version = 1
+        mock_kb.search_knowledge_async = AsyncMock(return_value=[MagicMock()])
+        mock_kb.embed_query_async = AsyncMock(return_value=[1.0, 0.0])
+        mock_rg.is_fallback_response.return_value = False
+        mock_rg.generate_response_async = AsyncMock(
+            return_value=HelpDeskResponse(
+                request_id="1",
+                classification=classification,
+                response_message="msg",
+            )
+        )
+        for request_id in ("first", "2nd"):
+            asyncio.run(
+                system.process_request_async(
+                    HelpDeskRequest(
+                        user_message="reset my password", request_id=request_id
+                    )
+                )
+            )
+        assert mock_rg.generate_response_async.await_count == 2
+        mock_kb.embed_query_async.assert_not_called()
+
+
+def test_process_request_async_uses_confident_local_classification():
+    """Test the LLM classifier is skipped when the local model is confident."""
+    system = IntelligentHelpDeskSystem()
+    classification = ClassificationResult(
+        category=RequestCategory.PASSWORD_RESET,
+        reasoning="local",
+        escalation_required=False,
+    )
+    with patch.object(system, "classifier") as mock_classifier, patch.object(
+        system, "knowledge_base"
+    ) as mock_kb, patch.object(
+        system, "response_generator"
+    ) as mock_rg, patch.object(
+        system, "local_classifier"
+    ) as mock_local:
+        mock_local.is_trained = True
+        mock_local.classify.return_value = classification
+        mock_kb.embed_query_async = AsyncMock(return_value=[1.0, 0.0])
+        mock_kb.search_knowledge_async = AsyncMock(return_value=[])
+        mock_rg.generate_response_async = AsyncMock(
+            return_value=HelpDeskResponse(
+                request_id="1",
+                classification=classification,
+                response_message="msg",
+            )
+        )
+        resp = asyncio.run(
+            system.process_request_async(HelpDeskRequest(user_message="password"))
+        )
+        assert resp.response_message == "msg"
+        mock_classifier.classify_request_async.assert_not_called()
+        assert (
+            mock_kb.search_knowledge_async.call_args.kwargs["category"]
+            == "password_reset"
+        )
+
+
+def test_process_requests_async_reports_errors_per_item():
+    """Test batch processing keeps order and isolates per-item failures."""
+    system = IntelligentHelpDeskSystem()
+    requests = [
+        HelpDeskRequest(user_message="reset my password"),
+        HelpDeskRequest(user_message="vpn down"),
+    ]
+    classification = ClassificationResult(
+        category=RequestCategory.PASSWORD_RESET,
+        reasoning="reason",
+        escalation_required=False,
+    )
+    with patch.object(system, "classifier") as mock_classifier, patch.object(
+        system, "knowledge_base"
+    ) as mock_kb, patch.object(system, "response_generator") as mock_rg:
+        mock_classifier.classify_request_async = AsyncMock(
+            side_effect=[classification, Exception("boom")]
+        )
+        mock_kb.embed_query_variants_batch_async = AsyncMock(return_value=[{}, {}])
+        mock_kb.search_batch_with_query_embeddings.return_value = [[]]
+        mock_rg.generate_response_async = AsyncMock(
+            return_value=HelpDeskResponse(
+                request_id="1",
+                classification=classification,
+                response_message="msg",
+            )
+        )
+        results = asyncio.run(system.process_requests_async(requests))
+        assert [result.index for result in results] == [0, 1]
+        assert results[0].response.response_message == "msg"
+        assert "boom" in results[1].error
+        mock_kb.embed_query_variants_batch_async.assert_awaited_once()
+
+
+def test_stream_request_async_yields_classification_tokens_and_response():
+    """Test streaming sends the classification before the response tokens."""
+    system = IntelligentHelpDeskSystem()
+    request = HelpDeskRequest(user_message="reset my password")
+    classification = ClassificationResult(
+        category=RequestCategory.PASSWORD_RESET,
+        reasoning="reason",
+        escalation_required=False,
+    )
+
+    async def fake_stream(*_args):
+        for chunk in ["Visit ", "the portal"]:
+            yield chunk
+
+    async def collect():
+        return [event async for event in system.stream_request_async(request)]
+
+    with patch.object(system, "classifier") as mock_classifier, patch.object(
+        system, "knowledge_base"
+    ) as mock_kb, patch.object(system, "response_generator") as mock_rg:
+        mock_classifier.classify_request_async = AsyncMock(
+            return_value=classification
+        )
+        mock_kb.embed_query_variants_async = AsyncMock(return_value={})
+        mock_kb.search_with_query_embeddings.return_value = []
+        mock_rg.stream_response_async = fake_stream
+        events = asyncio.run(collect())
+    assert [name for name, _ in events] == [
+        "classification",
+        "token",
+        "token",
+        "done",
+    ]
+    assert events[-1][1].response_message == "Visit the portal"
+
+
 def test_process_request_error():
     """Test request processing when classifier raises an exception."""
     system = IntelligentHelpDeskSystem()
@@ -83,3 +359,104 @@ def test_get_system_health_degraded():
     health = system.get_system_health()
     assert health.status == "degraded"
     assert health.components["knowledge_base"] == "unhealthy"
+
+
+def test_concurrent_requests_keep_their_own_retrieval_scores():
+    """Test one request's search cannot rewrite the scores another request sees."""
+    system = IntelligentHelpDeskSystem()
+    kb = KnowledgeBaseManager()
+    kb.knowledge_items = [
+        KnowledgeItem(
+            content=content,
+            source="s",
+            relevance_score=0.0,
+            category="password_reset",
+            item_id=item_id,
+        )
+        for item_id, content in enumerate(["a", "b"])
+    ]
+    kb.vector_index = build_vector_index(np.eye(2, 3), np.arange(2, dtype="int64"))
+    kb.index_version += 1
+    vectors = {"q1": [0.9, 0.1, 0.0], "q2": [0.2, 0.8, 0.0]}
+
+    async def fake_embeddings(texts):
+        return [vectors[text[:2]] for text in texts]
+
+    classification = ClassificationResult(
+        category=RequestCategory.PASSWORD_RESET,
+        reasoning="reason",
+        escalation_required=False,
+    )
+    seen = {}
+
+    async def fake_generate(message, _classification, knowledge_items, request_id):
+        # Let the other request search before these scores are read
+        await asyncio.sleep(0)
+        seen[message] = [
+            (item.item_id, round(item.relevance_score, 3))
+            for item in knowledge_items
+        ]
+        return HelpDeskResponse(
+            request_id=request_id,
+            classification=classification,
+            response_message="m",
+        )
+
+    async def run_both():
+        return await asyncio.gather(
+            system.process_request_async(HelpDeskRequest(user_message="q1")),
+            system.process_request_async(HelpDeskRequest(user_message="q2")),
+        )
+
+    with patch.object(system, "knowledge_base", kb), patch.object(
+        system, "local_classifier"
+    ) as mock_local, patch.object(
+        system, "classifier"
+    ) as mock_classifier, patch.object(
+        system, "response_generator"
+    ) as mock_rg, patch.object(
+        kb, "_get_openai_embeddings_async", fake_embeddings
+    ), patch.object(
+        Config, "EMBEDDING_BATCHING", False
+    ), patch.object(
+        Config, "SIMILARITY_THRESHOLD", 0.0
+    ):
+        mock_local.is_trained = False
+        mock_classifier.classify_request_async = AsyncMock(
+            return_value=classification
+        )
+        mock_rg.generate_response_async = fake_generate
+        asyncio.run(run_both())
+
+    assert seen == {"q1": [(0, 0.9), (1, 0.1)], "q2": [(1, 0.8), (0, 0.2)]}
+    assert [item.relevance_score for item in kb.knowledge_items] == [0.0, 0.0]
+
+
+def test_process_requests_async_reports_search_failure_per_item():
+    """Test a failed batch search marks each pending item instead of raising."""
+    system = IntelligentHelpDeskSystem()
+    requests = [
+        HelpDeskRequest(user_message="reset my password"),
+        HelpDeskRequest(user_message="vpn down"),
+    ]
+    classification = ClassificationResult(
+        category=RequestCategory.PASSWORD_RESET,
+        reasoning="reason",
+        escalation_required=False,
+    )
+    with patch.object(system, "classifier") as mock_classifier, patch.object(
+        system, "knowledge_base"
+    ) as mock_kb, patch.object(system, "response_generator") as mock_rg:
+        mock_classifier.classify_request_async = AsyncMock(
+            side_effect=[classification, Exception("boom")]
+        )
+        mock_kb.embed_query_variants_batch_async = AsyncMock(return_value=[{}, {}])
+        mock_kb.search_batch_with_query_embeddings.side_effect = Exception(
+            "index unavailable"
+        )
+        mock_rg.generate_response_async = AsyncMock()
+        results = asyncio.run(system.process_requests_async(requests))
+        assert results[0].response is None
+        assert "index unavailable" in results[0].error
+        assert "boom" in results[1].error
+        mock_rg.generate_response_async.assert_not_awaited()
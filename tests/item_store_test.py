@@ -0,0 +1,56 @@
+"""Unit tests for src.item_store.KnowledgeItemStore."""
+
+from src.item_store import KnowledgeItemStore
+from src.models import KnowledgeItem
+
+
+def make_item(content, category=None):
+    """Helper to create a KnowledgeItem."""
+    return KnowledgeItem(
+        content=content, source="src", relevance_score=0.0, category=category
+    )
+
+
+def test_save_and_lazily_read_items(tmp_path):
+    """Test items round-trip through the columnar store, including tombstones."""
+    path = str(tmp_path / "items")
+    KnowledgeItemStore.save(
+        path, [make_item("Pässwörd", "password_reset"), None, make_item("VPN")]
+    )
+    store = KnowledgeItemStore(path)
+    assert len(store) == 3
+    assert store[0].content == "Pässwörd"
+    assert store[0].category == "password_reset"
+    assert store[0].item_id == 0
+    assert store[1] is None
+    assert store[2].category is None
+
+
+def test_overlay_edits_and_category_groups(tmp_path):
+    """Test appended and replaced items are visible and grouped by category."""
+    path = str(tmp_path / "items")
+    KnowledgeItemStore.save(path, [make_item("a", "x"), make_item("b", "y")])
+    store = KnowledgeItemStore(path)
+    store[0] = None
+    store.append(make_item("c", "y"))
+    assert [item.content for item in store if item] == ["b", "c"]
+    groups = store.ids_by_category()
+    assert groups["y"].tolist() == [1, 2]
+    assert "x" not in groups
+
+
+def test_save_replaces_existing_store(tmp_path):
+    """Test saving over an open store swaps in the new contents."""
+    path = str(tmp_path / "items")
+    KnowledgeItemStore.save(path, [make_item("old")])
+    store = KnowledgeItemStore(path)
+    KnowledgeItemStore.save(path, list(store) + [make_item("new")])
+    assert [item.content for item in KnowledgeItemStore(path)] == ["old", "new"]
+    assert store[0].content == "old"
+
+
+def test_empty_store(tmp_path):
+    """Test an empty knowledge base can be saved and opened."""
+    path = str(tmp_path / "items")
+    KnowledgeItemStore.save(path, [])
+    assert len(KnowledgeItemStore(path)) == 0
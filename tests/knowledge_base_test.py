@@ -3,13 +3,33 @@ Unit tests for src.knowledge_base.KnowledgeBaseManager covering
 category mapping, loading, searching, and edge cases.
 """
 
-from unittest.mock import patch, mock_open, MagicMock
+from unittest.mock import patch, mock_open, MagicMock, AsyncMock
+import asyncio
 import json
+import threading
+import faiss
 import numpy as np
+import pytest
+from src.config import Config
+from src.embedding_store import EmbeddingStore
+from src.item_store import KnowledgeItemStore
 from src.knowledge_base import KnowledgeBaseManager
 from src.models import KnowledgeItem
 
 
+def use_tmp_paths(kb, tmp_path):
+    """Point the files a KnowledgeBaseManager writes at tmp_path."""
+    kb.index_path = str(tmp_path / "index.faiss")
+    kb.items_path = str(tmp_path / "items.json")
+    kb.items_store_path = str(tmp_path / "items")
+    kb.changes_path = str(tmp_path / "changes.jsonl")
+    kb.embedding_builder.checkpoint_path = str(tmp_path / "build_checkpoint.json")
+    kb.embedding_builder.embedding_store = EmbeddingStore(
+        str(tmp_path / "store.sqlite3")
+    )
+    return kb
+
+
 def test_category_mapping():
     """Test category mapping from section titles to categories."""
     kb = KnowledgeBaseManager()
@@ -30,9 +50,9 @@ def test_category_mapping():
     assert kb._map_category_from_title("Policy Question") == "policy_question"
 
 
-def test_load_knowledge_base_loads_from_disk(monkeypatch):
+def test_load_knowledge_base_loads_from_disk(monkeypatch, tmp_path):
     """Test loading knowledge base from disk with mocked file and faiss."""
-    kb = KnowledgeBaseManager()
+    kb = use_tmp_paths(KnowledgeBaseManager(), tmp_path)
     # Mock os.path.exists to always return True
     monkeypatch.setattr("os.path.exists", lambda path: True)
     # Mock faiss.read_index
@@ -64,17 +84,23 @@ def test_create_vector_embeddings_handles_empty():
     assert kb.vector_index is None
 
 
-def test_get_openai_embeddings_batches():
-    """Test batching of OpenAI embeddings call with mocked client."""
-    kb = KnowledgeBaseManager()
-    # Patch client.embeddings.create to return fake embeddings
-    kb.client = MagicMock()
-    kb.client.embeddings.create.return_value.data = [
-        MagicMock(embedding=[0.1, 0.2, 0.3]) for _ in range(2)
+def test_create_vector_embeddings_only_embeds_new_content(tmp_path):
+    """Test rebuilding the index reuses stored embeddings for unchanged items."""
+    kb = use_tmp_paths(KnowledgeBaseManager(), tmp_path)
+    store = kb.embedding_builder.embedding_store
+    store.put_many(["old"], [[1.0, 0.0]], kb.embedding_model)
+    kb.knowledge_items = [
+        KnowledgeItem(content="old", source="s", relevance_score=0.0),
+        KnowledgeItem(content="new", source="s", relevance_score=0.0),
     ]
-    result = kb._get_openai_embeddings(["a", "b"])
-    assert isinstance(result, list)
-    assert result[0] == [0.1, 0.2, 0.3]
+    client = kb.embedding_builder.client = MagicMock()
+    client.embeddings.create.return_value.data = [MagicMock(embedding=[0.0, 1.0])]
+    kb._create_vector_embeddings()
+    client.embeddings.create.assert_called_once_with(
+        input=["new"], model=kb.embedding_model
+    )
+    assert kb.vector_index.ntotal == 2
+    assert store.get_many(["new"], kb.embedding_model)[0] is not None
 
 
 def test_search_knowledge_returns_empty_if_no_index():
@@ -95,7 +121,9 @@ def test_search_knowledge_filters_and_returns(monkeypatch):
     ]
     # Patch embeddings and faiss search
     monkeypatch.setattr(
-        kb, "_get_openai_embeddings", lambda texts: [np.array([1.0, 2.0, 3.0])]
+        kb.embedding_builder,
+        "fetch_embeddings",
+        lambda texts: [np.array([1.0, 2.0, 3.0])],
     )
     kb.vector_index.search.return_value = (np.array([[0.9]]), np.array([[0]]))
     result = kb.search_knowledge("query", category="cat", top_k=1)
@@ -103,4 +131,394 @@ def test_search_knowledge_filters_and_returns(monkeypatch):
     assert result[0].relevance_score == 0.9
 
 
+def test_search_knowledge_async_uses_async_embeddings():
+    """Test async search embeds the query through the async client."""
+    kb = KnowledgeBaseManager()
+    kb.vector_index = MagicMock()
+    kb.knowledge_items = [
+        KnowledgeItem(content="c", source="s", relevance_score=0.0, category="cat")
+    ]
+    kb.async_client = MagicMock()
+    kb.async_client.embeddings.create = AsyncMock(
+        return_value=MagicMock(data=[MagicMock(embedding=[1.0, 2.0, 3.0])])
+    )
+    kb.vector_index.search.return_value = (np.array([[0.9]]), np.array([[0]]))
+    result = asyncio.run(kb.search_knowledge_async("query", top_k=1))
+    assert len(result) == 1
+    kb.async_client.embeddings.create.assert_awaited_once()
+
+
+def test_embed_query_variants_selects_category_variant():
+    """Test prefetched query variants are matched to the classified category."""
+    kb = KnowledgeBaseManager()
+    kb.vector_index = MagicMock()
+    kb.knowledge_items = [
+        KnowledgeItem(content="c", source="s", relevance_score=0.0, category="cat")
+    ]
+    kb.async_client = MagicMock()
+    kb.async_client.embeddings.create = AsyncMock(
+        return_value=MagicMock(
+            data=[MagicMock(embedding=[1.0, 0.0]), MagicMock(embedding=[0.0, 1.0])]
+        )
+    )
+    embeddings = asyncio.run(kb.embed_query_variants_async("query"))
+    assert len(embeddings) == 2
+    kb.async_client.embeddings.create.assert_awaited_once()
+
+    kb.vector_index.search.return_value = (np.array([[0.9]]), np.array([[0]]))
+    kb.search_with_query_embeddings(
+        "query", embeddings, category="security_incident", top_k=1
+    )
+    searched = kb.vector_index.search.call_args[0][0]
+    assert searched.tolist() == [[0.0, 1.0]]
+
+
+def test_search_knowledge_caches_query_embeddings():
+    """Test repeated queries skip the embeddings API call."""
+    kb = KnowledgeBaseManager()
+    kb.vector_index = MagicMock()
+    kb.knowledge_items = [
+        KnowledgeItem(content="c", source="s", relevance_score=0.0, category="cat")
+    ]
+    client = kb.embedding_builder.client = MagicMock()
+    client.embeddings.create.return_value.data = [
+        MagicMock(embedding=[1.0, 2.0, 3.0])
+    ]
+    kb.vector_index.search.return_value = (np.array([[0.9]]), np.array([[0]]))
+    kb.search_knowledge("I forgot my password", top_k=1)
+    kb.search_knowledge("i forgot my  password", top_k=1)
+    assert client.embeddings.create.call_count == 1
+    assert kb.embedding_cache.stats()["hits"] == 1
+
+
+def make_live_kb(tmp_path):
+    """Create a KnowledgeBaseManager persisting to tmp_path with fake embeddings."""
+    kb = use_tmp_paths(KnowledgeBaseManager(), tmp_path)
+    vectors = {"a": [1.0, 0.0, 0.0], "b": [0.0, 1.0, 0.0], "c": [0.0, 0.0, 1.0]}
+    kb.embedding_builder.fetch_embeddings = lambda texts: [
+        vectors[t] for t in texts
+    ]
+    return kb
+
+
+def test_live_add_update_delete_persist_incrementally(tmp_path):
+    """Test live edits keep stable IDs and survive a reload via the change log."""
+    kb = make_live_kb(tmp_path)
+    kb.knowledge_items = [
+        KnowledgeItem(content="a", source="s", relevance_score=0.0)
+    ]
+    kb._create_vector_embeddings()
+    kb.save_knowledge_base()
+
+    added = kb.add_knowledge_item("b", "admin", "network_connectivity")
+    assert added.item_id == 1
+    updated = kb.update_knowledge_item(0, "c", "admin")
+    assert updated.item_id == 0
+    kb.delete_knowledge_item(1)
+    assert kb.vector_index.ntotal == 1
+
+    reloaded = make_live_kb(tmp_path)
+    reloaded.load_knowledge_base()
+    assert reloaded.knowledge_items[0].content == "c"
+    assert reloaded.knowledge_items[1] is None
+    result = reloaded.search_with_query_embeddings(
+        "q", {"q": [0.0, 0.0, 1.0]}, top_k=3
+    )
+    assert [item.item_id for item in result] == [0]
+
+
+def test_replay_skips_changes_for_unknown_item_ids(tmp_path):
+    """Test change log entries with bad IDs are skipped instead of failing the load."""
+    kb = make_live_kb(tmp_path)
+    kb.knowledge_items = [
+        KnowledgeItem(content="a", source="s", relevance_score=0.0)
+    ]
+    kb._create_vector_embeddings()
+    kb.save_knowledge_base()
+    kb.add_knowledge_item("b", "admin")
+    with open(kb.changes_path, "a", encoding="utf-8") as f:
+        for change in [
+            {"op": "delete", "item_id": 7},
+            {"op": "delete", "item_id": -1},
+            {"op": "delete"},
+            {
+                "op": "upsert",
+                "item": KnowledgeItem(
+                    content="c", source="s", relevance_score=0.0, item_id=-1
+                ).model_dump(),
+            },
+        ]:
+            f.write(json.dumps(change) + "\n")
+
+    reloaded = make_live_kb(tmp_path)
+    reloaded.load_knowledge_base()
+    assert [item.content for item in reloaded.knowledge_items] == ["a", "b"]
+    assert reloaded.vector_index.ntotal == 2
+
+
+def test_interrupted_build_resumes_from_checkpoint(tmp_path):
+    """Test embeddings committed before a failure are not requested again."""
+    kb = make_live_kb(tmp_path)
+    vectors = {"a": [1.0, 0.0, 0.0], "b": [0.0, 1.0, 0.0], "c": [0.0, 0.0, 1.0]}
+    requested = []
+
+    def flaky_embeddings(texts):
+        requested.extend(texts)
+        if "c" in texts:
+            raise ConnectionError("connection dropped")
+        return [vectors[t] for t in texts]
+
+    kb.embedding_builder.fetch_embeddings = flaky_embeddings
+    kb.knowledge_items = [
+        KnowledgeItem(content=content, source="s", relevance_score=0.0)
+        for content in "abc"
+    ]
+    with patch.object(Config, "EMBEDDING_CHECKPOINT_SIZE", 1):
+        with pytest.raises(ConnectionError):
+            kb._create_vector_embeddings()
+        with open(kb.embedding_builder.checkpoint_path, encoding="utf-8") as f:
+            assert json.load(f)["embedded"] == 2
+
+        resumed = make_live_kb(tmp_path)
+        fetch = resumed.embedding_builder.fetch_embeddings = MagicMock(
+            return_value=[vectors["c"]]
+        )
+        resumed.knowledge_items = kb.knowledge_items
+        resumed._create_vector_embeddings()
+    fetch.assert_called_once_with(["c"])
+    assert resumed.vector_index.ntotal == 3
+    assert not (tmp_path / "build_checkpoint.json").exists()
+
+
+def test_live_edit_unknown_item_raises_key_error(tmp_path):
+    """Test updating or deleting a missing item raises KeyError."""
+    kb = make_live_kb(tmp_path)
+    with pytest.raises(KeyError):
+        kb.delete_knowledge_item(5)
+    with pytest.raises(KeyError):
+        kb.update_knowledge_item(5, "a", "s")
+
+
+def test_search_filters_by_category_and_general_pool(tmp_path):
+    """Test category searches only see their category plus general items."""
+    kb = make_live_kb(tmp_path)
+    kb.knowledge_items = [
+        KnowledgeItem(
+            content="a", source="s", relevance_score=0.0, category="password_reset"
+        ),
+        KnowledgeItem(
+            content="b",
+            source="s",
+            relevance_score=0.0,
+            category="network_connectivity",
+        ),
+        KnowledgeItem(
+            content="c", source="s", relevance_score=0.0, category="slow_computer"
+        ),
+    ]
+    kb._create_vector_embeddings()
+    query = {"q": [0.6, 0.8, 0.75]}
+    with patch.object(Config, "SIMILARITY_THRESHOLD", 0.5):
+        filtered = kb.search_with_query_embeddings(
+            "q", query, category="password_reset", top_k=3
+        )
+        unfiltered = kb.search_with_query_embeddings("q", query, top_k=3)
+    assert [item.content for item in filtered] == ["c", "a"]
+    assert len(unfiltered) == 3
+
+
+def test_live_edits_on_hnsw_index_leave_no_stale_vectors(tmp_path):
+    """Test edits on a saved HNSW index, which cannot remove vectors."""
+    kb = make_live_kb(tmp_path)
+    kb.knowledge_items = [
+        KnowledgeItem(content="a", source="s", relevance_score=0.0),
+        KnowledgeItem(content="b", source="s", relevance_score=0.0),
+    ]
+    with patch.object(Config, "VECTOR_INDEX_TYPE", "hnsw"):
+        kb._create_vector_embeddings()
+    kb.save_knowledge_base()
+    reloaded = make_live_kb(tmp_path)
+    reloaded.load_knowledge_base()
+    reloaded.update_knowledge_item(0, "c", "s")
+    reloaded.delete_knowledge_item(1)
+
+    def search(vector):
+        return [
+            (item.item_id, item.content)
+            for item in reloaded.search_with_query_embeddings(
+                "q", {"q": vector}, top_k=3
+            )
+        ]
+
+    assert search([1.0, 0.0, 0.0]) == []
+    assert search([0.0, 1.0, 0.0]) == []
+    assert search([0.0, 0.0, 1.0]) == [(0, "c")]
+    assert reloaded.vector_index.ntotal == 1
+
+
+def test_saved_index_is_memory_mapped_and_copied_on_edit(tmp_path):
+    """Test reloads map the index and items lazily, and edits still work."""
+    kb = make_live_kb(tmp_path)
+    kb.knowledge_items = [
+        KnowledgeItem(
+            content="a", source="s", relevance_score=0.0, category="password_reset"
+        )
+    ]
+    kb._create_vector_embeddings()
+    kb.save_knowledge_base()
+
+    reloaded = make_live_kb(tmp_path)
+    reloaded.load_knowledge_base()
+    assert reloaded._index_mmapped
+    assert isinstance(reloaded.knowledge_items, KnowledgeItemStore)
+    reloaded.add_knowledge_item("b", "admin", "password_reset")
+    assert not reloaded._index_mmapped
+    result = reloaded.search_with_query_embeddings(
+        "q", {"q": [0.0, 1.0, 0.0]}, category="password_reset", top_k=1
+    )
+    assert result[0].content == "b"
+
+
+def search_from_another_thread(kb):
+    """Run a search on another thread, returning None if it cannot finish."""
+    results = []
+    thread = threading.Thread(
+        target=lambda: results.append(
+            kb.search_with_query_embeddings("q", {"q": [1.0, 0.0, 0.0]}, top_k=1)
+        )
+    )
+    thread.start()
+    thread.join(timeout=5)
+    return results[0] if results else None
+
+
+def test_snapshots_and_index_copies_do_not_block_searches(tmp_path):
+    """Test searches run while a snapshot is written or the index is copied."""
+    kb = make_live_kb(tmp_path)
+    kb.knowledge_items = [
+        KnowledgeItem(content="a", source="s", relevance_score=0)
+    ]
+    kb._create_vector_embeddings()
+    reloaded = make_live_kb(tmp_path)
+    write_index, serialize_index = faiss.write_index, faiss.serialize_index
+    seen = []
+
+    def searching_write_index(index, path):
+        seen.append(search_from_another_thread(kb))
+        write_index(index, path)
+
+    def searching_serialize_index(index):
+        seen.append(search_from_another_thread(reloaded))
+        return serialize_index(index)
+
+    with patch("faiss.write_index", side_effect=searching_write_index):
+        kb.save_knowledge_base()
+    reloaded.load_knowledge_base()
+    with patch("faiss.serialize_index", side_effect=searching_serialize_index):
+        reloaded.add_knowledge_item("b", "admin")
+    assert [[item.content for item in result] for result in seen] == [["a"], ["a"]]
+
+
+def test_batch_search_runs_one_search_per_category():
+    """Test batch retrieval embeds once and groups searches by category."""
+    kb = KnowledgeBaseManager()
+    kb.vector_index = MagicMock()
+    kb.knowledge_items = [
+        KnowledgeItem(content="c", source="s", relevance_score=0.0, category="cat")
+    ]
+    kb.async_client = MagicMock()
+    kb.async_client.embeddings.create = AsyncMock(
+        return_value=MagicMock(
+            data=[MagicMock(embedding=[float(i), 1.0]) for i in range(4)]
+        )
+    )
+    embeddings = asyncio.run(kb.embed_query_variants_batch_async(["q1", "q2"]))
+    kb.async_client.embeddings.create.assert_awaited_once()
+
+    kb.vector_index.search.return_value = (
+        np.array([[0.9], [0.8]]),
+        np.array([[0], [0]]),
+    )
+    results = kb.search_batch_with_query_embeddings(
+        ["q1", "q2"], embeddings, ["cat", "cat"], top_k=1
+    )
+    assert kb.vector_index.search.call_count == 1
+    assert kb.vector_index.search.call_args[0][0].shape == (2, 2)
+    assert [len(items) for items in results] == [1, 1]
+
+
+def test_batch_search_scores_each_row_independently(tmp_path):
+    """Test batched queries over the same items keep their own scores."""
+    kb = make_live_kb(tmp_path)
+    kb.knowledge_items = [
+        KnowledgeItem(content=content, source="s", relevance_score=0.0)
+        for content in "ab"
+    ]
+    kb._create_vector_embeddings()
+    query_embeddings = [{"q1": [0.9, 0.1, 0.0]}, {"q2": [0.2, 0.9, 0.0]}]
+    with patch.object(Config, "SIMILARITY_THRESHOLD", 0.0):
+        results = kb.search_batch_with_query_embeddings(
+            ["q1", "q2"], query_embeddings, [None, None], top_k=2
+        )
+    scores = [
+        [(item.item_id, round(item.relevance_score, 3)) for item in row]
+        for row in results
+    ]
+    assert scores == [[(0, 0.9), (1, 0.1)], [(1, 0.9), (0, 0.2)]]
+    assert [item.relevance_score for item in kb.knowledge_items] == [0.0, 0.0]
+
+
 # Optionally, you can add more tests for loading and searching if you mock file I/O and embeddings.
+
+
+def make_lexical_kb(tmp_path):
+    """Create a live KB whose items have distinct keywords and embeddings."""
+    kb = make_live_kb(tmp_path)
+    vectors = {
+        "Configure IMAP on port 993": [1.0, 0.0, 0.0],
+        "Reset your password through the portal": [0.0, 1.0, 0.0],
+        "VPN setup guide": [0.0, 0.0, 1.0],
+    }
+    kb.embedding_builder.fetch_embeddings = lambda texts: [
+        vectors[t] for t in texts
+    ]
+    kb.knowledge_items = [
+        KnowledgeItem(content=content, source="s", relevance_score=0.0)
+        for content in vectors
+    ]
+    kb._create_vector_embeddings()
+    kb._build_lexical_index()
+    return kb
+
+
+def test_hybrid_search_adds_keyword_matches(tmp_path):
+    """Test BM25 matches are fused into the vector results."""
+    kb = make_lexical_kb(tmp_path)
+    query = "imap port 993"
+    embeddings = {query: [0.0, 1.0, 0.0]}
+    vector_only = kb.search_with_query_embeddings(query, embeddings, top_k=2)
+    assert [item.item_id for item in vector_only] == [1]
+
+    with patch.object(Config, "HYBRID_SEARCH", True):
+        hybrid = kb.search_with_query_embeddings(query, embeddings, top_k=2)
+    assert {item.item_id for item in hybrid} == {0, 1}
+
+    kb.add_knowledge_item("VPN setup guide", "admin")
+    kb.delete_knowledge_item(0)
+    with patch.object(Config, "HYBRID_SEARCH", True):
+        hybrid = kb.search_with_query_embeddings(query, embeddings, top_k=2)
+    assert [item.item_id for item in hybrid] == [1]
+
+
+def test_lexical_shortcut_skips_embeddings_api(tmp_path):
+    """Test confident keyword matches are answered without embedding the query."""
+    kb = make_lexical_kb(tmp_path)
+    kb._embed_queries = MagicMock(return_value=[[0.0, 1.0, 0.0]])
+    with patch.object(Config, "LEXICAL_SHORTCUT", True):
+        assert kb.can_answer_lexically("IMAP port 993")
+        results = kb.search_knowledge("IMAP port 993", top_k=2)
+        assert [item.item_id for item in results] == [0]
+        kb._embed_queries.assert_not_called()
+
+        kb.search_knowledge("laptop screen flickering", top_k=2)
+        kb._embed_queries.assert_called_once()
@@ -0,0 +1,62 @@
+"""Unit tests for src.load_generator."""
+
+import asyncio
+import httpx
+from fastapi import FastAPI, HTTPException
+from src.load_generator import LoadGenerator, LoadProfile, load_messages
+
+
+def make_service():
+    """Return an app whose /process-request is slow and fails for one message."""
+    service = FastAPI()
+
+    @service.post("/process-request")
+    async def process_request(body: dict):
+        await asyncio.sleep(0.05)
+        if body["user_message"] == "fail":
+            raise HTTPException(status_code=500)
+        return {"request_id": body["request_id"]}
+
+    return service
+
+
+def test_load_messages_falls_back_to_defaults(tmp_path):
+    """Test messages come from the test requests file when it exists."""
+    path = tmp_path / "test_requests.json"
+    assert load_messages(str(path))
+    path.write_text('{"test_requests": [{"request": "vpn down"}, {"id": "t2"}]}')
+    assert load_messages(str(path)) == ["vpn down"]
+
+
+def test_schedule_matches_target_rate():
+    """Test even and Poisson schedules offer the target rate."""
+    generator = LoadGenerator(
+        None, ["a"], LoadProfile(rps=200, duration=5, seed=0)
+    )
+    assert generator.schedule()[:3] == [0.0, 0.005, 0.01]
+    assert len(generator.schedule()) == 1000
+    generator.profile.poisson = True
+    offsets = generator.schedule()
+    assert 900 < len(offsets) <= 1000
+    assert max(offsets) < 5
+
+
+def test_run_sends_open_loop_and_reports_statuses():
+    """Test requests overlap instead of waiting for earlier responses."""
+
+    async def run():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=make_service()),
+            base_url="http://testserver",
+        ) as client:
+            generator = LoadGenerator(
+                client, ["ok", "fail"], LoadProfile(rps=100, duration=0.2)
+            )
+            return await generator.run()
+
+    report = asyncio.run(run())
+    assert report["requests"] == 20
+    assert report["statuses"] == {"200": 10, "500": 10}
+    assert report["succeeded"] == 10
+    assert report["max_in_flight"] > 1
+    assert report["p50_ms"] >= 50
@@ -0,0 +1,72 @@
+"""Unit tests for src.local_classifier."""
+
+import json
+import pytest
+from src.local_classifier import LocalClassifier, load_labelled_requests
+from src.models import RequestCategory
+
+
+def make_classifier() -> LocalClassifier:
+    """Train a classifier on two well separated categories."""
+    classifier = LocalClassifier(temperature=0.05)
+    classifier.fit(
+        [[1.0, 0.0, 0.0], [0.9, 0.1, 0.0], [0.0, 1.0, 0.0], [0.0, 0.9, 0.4]],
+        [
+            "password_reset",
+            "password_reset",
+            "security_incident",
+            "security_incident",
+        ],
+        [False, False, False, True],
+    )
+    return classifier
+
+
+def test_classify_returns_confident_prediction():
+    """Test a query near one centroid is classified locally."""
+    result = make_classifier().classify([0.95, 0.05, 0.0], threshold=0.9)
+    assert result.category == RequestCategory.PASSWORD_RESET
+    assert not result.escalation_required
+
+
+def test_classify_copies_escalation_from_nearest_example():
+    """Test escalation follows the most similar example in the category."""
+    result = make_classifier().classify([0.0, 0.8, 0.5], threshold=0.9)
+    assert result.category == RequestCategory.SECURITY_INCIDENT
+    assert result.escalation_required
+
+
+def test_classify_defers_ambiguous_queries():
+    """Test low-confidence queries return None so the LLM is used."""
+    classifier = make_classifier()
+    assert classifier.classify([0.7, 0.7, 0.0], threshold=0.9) is None
+    assert LocalClassifier(temperature=0.05).classify([1.0, 0.0], 0.9) is None
+
+
+def test_fit_requires_examples():
+    """Test training without examples is rejected."""
+    with pytest.raises(ValueError):
+        LocalClassifier(temperature=0.05).fit([], [], [])
+
+
+def test_load_labelled_requests_skips_invalid_entries(tmp_path):
+    """Test unknown categories and empty requests are ignored."""
+    path = tmp_path / "test_requests.json"
+    path.write_text(
+        json.dumps(
+            {
+                "test_requests": [
+                    {
+                        "request": "I forgot my password",
+                        "expected_classification": "password_reset",
+                        "escalate": False,
+                    },
+                    {"request": "Hello", "expected_classification": "greeting"},
+                    {"request": "", "expected_classification": "policy_question"},
+                ]
+            }
+        )
+    )
+    assert load_labelled_requests(str(path)) == [
+        ("I forgot my password", "password_reset", False)
+    ]
@@ -0,0 +1,96 @@
+"""Unit tests for src.logging_config."""
+
+import asyncio
+import io
+import json
+import logging
+from unittest.mock import patch
+from src.config import Config
+from src.logging_config import (
+    JsonFormatter,
+    RequestContextFilter,
+    configure_logging,
+    get_request_id,
+    set_request_id,
+    stop_logging,
+)
+
+
+def make_record(level=logging.INFO, **extra):
+    """Create a log record as a logger call with these extras would."""
+    record = logging.LogRecord(
+        "src.test", level, __file__, 1, "hello %s", ("x",), None
+    )
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_request_id_and_extras():
+    """Test records become one JSON object with their extra fields."""
+    entry = json.loads(
+        JsonFormatter().format(make_record(request_id="r1", category="vpn"))
+    )
+    assert entry["message"] == "hello x"
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "src.test"
+    assert entry["request_id"] == "r1"
+    assert entry["category"] == "vpn"
+    assert "args" not in entry
+
+
+def test_sampling_keeps_whole_requests_and_all_warnings():
+    """Test sampling is decided per request ID and never drops warnings."""
+    sampler = RequestContextFilter(sample_rate=0.5)
+    decisions = {f"r{i}": sampler.is_sampled(f"r{i}") for i in range(200)}
+    assert 60 < sum(decisions.values()) < 140
+    assert all(sampler.is_sampled(rid) == kept for rid, kept in decisions.items())
+    assert sampler.is_sampled(None)
+
+    dropped = next(rid for rid, kept in decisions.items() if not kept)
+    set_request_id(dropped)
+    try:
+        assert not sampler.filter(make_record())
+        assert sampler.filter(make_record(level=logging.WARNING))
+    finally:
+        set_request_id(None)
+
+
+def test_request_ids_are_isolated_between_tasks():
+    """Test concurrent requests each see their own request ID."""
+
+    async def request(request_id):
+        set_request_id(request_id)
+        await asyncio.sleep(0)
+        return get_request_id()
+
+    async def run():
+        return await asyncio.gather(request("a"), request("b"))
+
+    assert asyncio.run(run()) == ["a", "b"]
+    assert get_request_id() is None
+
+
+def test_configure_logging_writes_json_from_a_background_thread():
+    """Test package logs go through the queue and carry the request ID."""
+    stream = io.StringIO()
+    with patch.object(Config, "LOG_FORMAT", "json"), patch.object(
+        Config, "LOG_LEVEL", "INFO"
+    ):
+        listener = configure_logging(stream)
+    try:
+        assert configure_logging() is listener
+        logger = logging.getLogger("src.some_module")
+        set_request_id("req-1")
+        logger.debug("not written")
+        logger.info("Request processed", extra={"category": "vpn"})
+        set_request_id(None)
+    finally:
+        stop_logging()
+
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 1
+    entry = json.loads(lines[0])
+    assert entry["message"] == "Request processed"
+    assert entry["request_id"] == "req-1"
+    assert entry["category"] == "vpn"
+    assert logging.getLogger("src").propagate
@@ -0,0 +1,67 @@
+"""Unit tests for src.metrics."""
+
+from unittest.mock import MagicMock
+from prometheus_client import REGISTRY, CollectorRegistry
+from src.embedding_cache import EmbeddingCache
+from src.metrics import HelpDeskCollector, record_token_usage, register_system
+from src.response_cache import SemanticResponseCache
+from src.stage_timing import time_stage
+
+
+def sample(name, labels, registry=REGISTRY):
+    """Return a sample value, counting a missing series as 0."""
+    return registry.get_sample_value(name, labels) or 0.0
+
+
+def test_stage_timings_feed_the_histogram():
+    """Test every timed stage is observed, with or without a collector."""
+    labels = {"stage": "search"}
+    before = sample("helpdesk_stage_duration_seconds_count", labels)
+    with time_stage("search"):
+        pass
+    assert sample("helpdesk_stage_duration_seconds_count", labels) == before + 1
+
+
+def test_record_token_usage_counts_reported_tokens():
+    """Test prompt and completion tokens are counted and missing usage ignored."""
+    labels = {"operation": "generation", "kind": "prompt"}
+    before = sample("helpdesk_openai_tokens_total", labels)
+    record_token_usage(
+        "generation", MagicMock(prompt_tokens=12, completion_tokens=0)
+    )
+    record_token_usage("generation", None)
+    record_token_usage("generation", MagicMock())
+    assert sample("helpdesk_openai_tokens_total", labels) == before + 12
+    assert (
+        sample(
+            "helpdesk_openai_tokens_total",
+            {"operation": "generation", "kind": "completion"},
+        )
+        == 0.0
+    )
+
+
+def test_collector_reports_cache_and_index_statistics():
+    """Test cache hit rates and the index size are read at scrape time."""
+    system = MagicMock()
+    system.knowledge_base.embedding_cache = EmbeddingCache(10, 60)
+    system.knowledge_base.embedding_cache.put("vpn", "m", [1.0])
+    system.knowledge_base.embedding_cache.get("vpn", "m")
+    system.knowledge_base.embedding_cache.get("printer", "m")
+    system.knowledge_base.vector_index.ntotal = 42
+    system.knowledge_base.index_version = 3
+    system.response_cache = SemanticResponseCache(10, 0.05)
+    registry = CollectorRegistry()
+    assert isinstance(register_system(system, registry), HelpDeskCollector)
+
+    embedding = {"cache": "embedding"}
+    assert sample("helpdesk_cache_hits_total", embedding, registry) == 1
+    assert sample("helpdesk_cache_misses_total", embedding, registry) == 1
+    assert sample("helpdesk_cache_hit_ratio", embedding, registry) == 0.5
+    assert sample("helpdesk_cache_entries", embedding, registry) == 1
+    assert sample("helpdesk_cache_hit_ratio", {"cache": "response"}, registry) == 0
+    assert sample("helpdesk_index_vectors", {}, registry) == 42
+    assert sample("helpdesk_index_version", {}, registry) == 3
+
+    system.knowledge_base.vector_index = None
+    assert sample("helpdesk_index_vectors", {}, registry) == 0
@@ -0,0 +1,50 @@
+"""Unit tests for src.openai_client."""
+
+from unittest.mock import patch
+from src.config import Config
+from src.openai_client import (
+    _http2_enabled,
+    _http_client_options,
+    get_async_openai_client,
+    get_openai_client,
+)
+
+
+def test_clients_are_shared():
+    """Test every caller gets the same pooled client."""
+    assert get_openai_client() is get_openai_client()
+    assert get_async_openai_client() is get_async_openai_client()
+
+
+def test_client_uses_configured_timeouts_and_retries():
+    """Test timeout and retry settings come from Config."""
+    get_openai_client.cache_clear()
+    try:
+        with patch.object(Config, "OPENAI_TIMEOUT", 12.0), patch.object(
+            Config, "OPENAI_MAX_RETRIES", 5
+        ):
+            client = get_openai_client()
+        assert client.max_retries == 5
+        assert client.timeout.read == 12.0
+        assert client.timeout.connect == Config.OPENAI_CONNECT_TIMEOUT
+    finally:
+        get_openai_client.cache_clear()
+
+
+def test_http_client_options_use_configured_limits():
+    """Test connection pool limits come from Config."""
+    with patch.object(Config, "OPENAI_MAX_CONNECTIONS", 7):
+        limits = _http_client_options()["limits"]
+    assert limits.max_connections == 7
+    assert (
+        limits.max_keepalive_connections == Config.OPENAI_MAX_KEEPALIVE_CONNECTIONS
+    )
+
+
+def test_http2_falls_back_without_h2_package():
+    """Test HTTP/2 is only enabled when requested and h2 is importable."""
+    assert not _http2_enabled()
+    with patch.object(Config, "OPENAI_HTTP2", True), patch.dict(
+        "sys.modules", {"h2": None}
+    ):
+        assert not _http2_enabled()
@@ -0,0 +1,66 @@
+"""Unit tests for src.rate_limiter.RateLimiter."""
+
+from unittest.mock import patch
+from src.rate_limiter import RateLimiter
+
+
+class FakeClock:
+    """Monotonic clock advanced by sleep calls."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def run_with_fake_clock(callback):
+    """Run callback with time.monotonic/time.sleep replaced by a fake clock."""
+    clock = FakeClock()
+    with patch("src.rate_limiter.time", clock):
+        callback(clock)
+    return clock
+
+
+def test_acquire_spaces_requests_to_requests_per_minute():
+    """Test requests beyond the one-second burst wait for the budget."""
+
+    def run(clock):
+        limiter = RateLimiter(requests_per_minute=120, tokens_per_minute=0)
+        for _ in range(6):
+            limiter.acquire()
+        assert clock.now == 2.0
+
+    run_with_fake_clock(run)
+
+
+def test_acquire_lets_large_requests_through_when_bucket_is_full():
+    """Test a request above the token bucket size does not block forever."""
+
+    def run(clock):
+        limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=600)
+        limiter.acquire(tokens=50)
+        assert clock.now == 0.0
+        limiter.acquire(tokens=50)
+        assert clock.now == 5.0
+
+    run_with_fake_clock(run)
+
+
+def test_backoff_pauses_callers_and_lowers_rate_until_successes():
+    """Test a 429 pauses everyone, halves the rate, and successes restore it."""
+
+    def run(clock):
+        limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=0)
+        limiter.backoff(delay=3.0)
+        assert limiter.rate_scale == 0.5
+        limiter.acquire()
+        assert clock.now == 3.0
+        for _ in range(20):
+            limiter.record_success()
+        assert limiter.rate_scale == 1.0
+
+    run_with_fake_clock(run)
@@ -0,0 +1,57 @@
+"""Unit tests for src.response_cache.SemanticResponseCache."""
+
+from src.models import ClassificationResult, HelpDeskResponse, RequestCategory
+from src.response_cache import SemanticResponseCache
+
+
+def make_response(message: str) -> HelpDeskResponse:
+    """Create a response for the password reset category."""
+    return HelpDeskResponse(
+        request_id="1",
+        classification=ClassificationResult(
+            category=RequestCategory.PASSWORD_RESET,
+            reasoning="reason",
+            escalation_required=False,
+        ),
+        response_message=message,
+    )
+
+
+def test_get_returns_response_for_similar_embedding():
+    """Test that a nearby embedding in the same category is a hit."""
+    cache = SemanticResponseCache(max_size=10, max_distance=0.05)
+    cache.put("password_reset", [1.0, 0.0], make_response("reset"), version=1)
+    assert cache.get("password_reset", [0.99, 0.05], 1).response_message == "reset"
+    assert cache.get("password_reset", [0.0, 1.0], 1) is None
+    assert cache.get("hardware_failure", [1.0, 0.0], 1) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_put_evicts_least_recently_used():
+    """Test LRU eviction across categories once the cache is full."""
+    cache = SemanticResponseCache(max_size=2, max_distance=0.01)
+    cache.put("password_reset", [1.0, 0.0], make_response("a"), 1)
+    cache.put("hardware_failure", [0.0, 1.0], make_response("b"), 1)
+    cache.get("password_reset", [1.0, 0.0], 1)
+    cache.put("password_reset", [0.6, 0.8], make_response("c"), 1)
+    assert cache.get("hardware_failure", [0.0, 1.0], 1) is None
+    assert cache.get("password_reset", [1.0, 0.0], 1).response_message == "a"
+    assert cache.get("password_reset", [0.6, 0.8], 1).response_message == "c"
+    assert cache.stats()["size"] == 2
+
+
+def test_get_invalidates_entries_when_index_version_changes():
+    """Test that a new knowledge base version drops every cached response."""
+    cache = SemanticResponseCache(max_size=10, max_distance=0.05)
+    cache.put("password_reset", [1.0, 0.0], make_response("reset"), version=1)
+    assert cache.get("password_reset", [1.0, 0.0], 2) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_clear_removes_entries():
+    """Test that clear empties the cache."""
+    cache = SemanticResponseCache(max_size=10, max_distance=0.05)
+    cache.put("password_reset", [1.0, 0.0], make_response("reset"), version=None)
+    cache.clear()
+    assert cache.get("password_reset", [1.0, 0.0], None) is None
@@ -1,8 +1,11 @@
 """Unit tests for src.response_generator.ResponseGenerator covering all logic branches."""
 
-from unittest.mock import patch
+import asyncio
+import os
+from unittest.mock import AsyncMock, MagicMock, patch
 import pytest
-from src.response_generator import ResponseGenerator
+from src.category_registry import CategoryRegistry
+from src.response_generator import RESPONSE_INSTRUCTIONS, ResponseGenerator
 from src.models import (
     ClassificationResult,
     RequestCategory,
@@ -55,9 +58,40 @@ def test_generate_response_exception_fallback():
         assert "password" in resp.response_message.lower()
 
 
-def test_create_response_prompt_exception():
+def test_response_prompt_keeps_variable_parts_last():
+    """Test prompts of a category share a prefix ending before the request data."""
+    rg = ResponseGenerator()
+    prompts = [
+        rg._build_response_prompt(
+            message,
+            make_classification(),
+            [
+                KnowledgeItem(
+                    content=content,
+                    source="kb",
+                    relevance_score=1.0,
+                    category="password_reset",
+                )
+            ],
+        )
+        for message, content in (("msg one", "alpha"), ("msg two", "beta"))
+    ]
+    shared = len(os.path.commonprefix(prompts))
+    for prompt in prompts:
+        assert prompt.startswith(RESPONSE_INSTRUCTIONS)
+        assert prompt.index("CLASSIFICATION:") < shared
+    # The prompts only differ from the retrieved knowledge on
+    assert prompts[0][shared:].startswith("alpha")
+    assert prompts[1][shared:].startswith("beta")
+    assert prompts[0].endswith('USER REQUEST: "msg one"\n')
+
+
+def test_create_response_prompt_exception(tmp_path):
     """Test prompt creation when category info file read fails."""
     rg = ResponseGenerator()
+    categories_path = tmp_path / "categories.json"
+    categories_path.write_text('{"categories": {}}')
+    rg.category_registry = CategoryRegistry(str(categories_path))
     classification = make_classification()
     with patch("builtins.open", side_effect=Exception("fail")):
         prompt = rg._create_response_prompt(
@@ -110,7 +144,8 @@ def test_generate_response_returns_helpdeskresponse():
                 {
                     "message": type(
                         "obj", (object,), {"content": "Test response"}
-                    )()
+                    )(),
+                    "finish_reason": "stop",
                 },
             )
         ]
@@ -119,3 +154,96 @@ def test_generate_response_returns_helpdeskresponse():
         )
         assert isinstance(resp, HelpDeskResponse)
         assert resp.response_message == "Test response"
+
+
+def test_generate_response_async():
+    """Test async response generation awaits the async client."""
+    rg = ResponseGenerator()
+    knowledge_items = [
+        KnowledgeItem(
+            content="info",
+            source="src",
+            relevance_score=1.0,
+            category="password_reset",
+        )
+    ]
+    completion = MagicMock()
+    completion.choices[0].message.content = "Async response"
+    with patch.object(rg, "async_client") as mock_client:
+        mock_client.chat.completions.create = AsyncMock(return_value=completion)
+        resp = asyncio.run(
+            rg.generate_response_async(
+                "test", make_classification(), knowledge_items, "reqid"
+            )
+        )
+        assert resp.response_message == "Async response"
+
+
+def test_generate_response_async_trims_a_cut_off_response():
+    """Test a response stopped by max_tokens ends on its last full sentence."""
+    rg = ResponseGenerator()
+    knowledge_items = [
+        KnowledgeItem(content="info", source="src", relevance_score=1.0)
+    ]
+    completion = MagicMock()
+    completion.choices[0].message.content = "Open the portal. Then click Re"
+    completion.choices[0].finish_reason = "length"
+    with patch.object(rg, "async_client") as mock_client:
+        mock_client.chat.completions.create = AsyncMock(return_value=completion)
+        resp = asyncio.run(
+            rg.generate_response_async(
+                "test", make_classification(), knowledge_items, "reqid"
+            )
+        )
+        assert resp.response_message == "Open the portal."
+
+
+def test_stream_response_async_yields_chunks():
+    """Test streaming yields each content delta from the LLM."""
+    rg = ResponseGenerator()
+    knowledge_items = [
+        KnowledgeItem(content="info", source="src", relevance_score=1.0)
+    ]
+
+    async def fake_stream():
+        for text in ["Hello", None, " world"]:
+            chunk = MagicMock()
+            chunk.choices[0].delta.content = text
+            chunk.choices[0].finish_reason = None
+            yield chunk
+
+    async def collect():
+        return [
+            chunk
+            async for chunk in rg.stream_response_async(
+                "msg", make_classification(), knowledge_items
+            )
+        ]
+
+    with patch.object(rg, "async_client") as mock_client:
+        mock_client.chat.completions.create = AsyncMock(return_value=fake_stream())
+        chunks = asyncio.run(collect())
+        assert chunks == ["Hello", " world"]
+        assert mock_client.chat.completions.create.call_args.kwargs["stream"]
+
+
+def test_stream_response_async_falls_back_on_error():
+    """Test streaming sends the fallback response if the LLM call fails."""
+    rg = ResponseGenerator()
+    knowledge_items = [
+        KnowledgeItem(content="info", source="src", relevance_score=1.0)
+    ]
+
+    async def collect():
+        return [
+            chunk
+            async for chunk in rg.stream_response_async(
+                "msg", make_classification(), knowledge_items
+            )
+        ]
+
+    with patch.object(rg, "async_client") as mock_client:
+        mock_client.chat.completions.create = AsyncMock(side_effect=Exception("x"))
+        chunks = asyncio.run(collect())
+        assert len(chunks) == 1
+        assert "password" in chunks[0].lower()
@@ -0,0 +1,37 @@
+"""Unit tests for src.stage_timing."""
+
+import asyncio
+from src.stage_timing import collect_stage_timings, record_stage, time_stage, timed
+
+
+def test_time_stage_accumulates_only_inside_collector():
+    """Test stages add up per name and are ignored without a collector."""
+    record_stage("ignored", 1.0)
+    with collect_stage_timings() as timings:
+        record_stage("retrieval", 0.25)
+        record_stage("retrieval", 0.5)
+        with time_stage("generation"):
+            pass
+    assert timings["retrieval"] == 0.75
+    assert timings["generation"] >= 0
+    assert "ignored" not in timings
+
+
+def test_concurrent_requests_keep_separate_timings():
+    """Test gathered tasks report into their own request's collector."""
+
+    async def request(delay):
+        with collect_stage_timings() as timings:
+            await asyncio.gather(
+                timed("classification", asyncio.sleep(delay)),
+                timed("retrieval", asyncio.sleep(0)),
+            )
+        return timings
+
+    async def run():
+        return await asyncio.gather(request(0.05), request(0))
+
+    slow, fast = asyncio.run(run())
+    assert set(slow) == set(fast) == {"classification", "retrieval"}
+    assert slow["classification"] >= 0.05
+    assert fast["classification"] < 0.05
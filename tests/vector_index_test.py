@@ -0,0 +1,56 @@
+"""Unit tests for src.vector_index and the src.index_benchmark runner."""
+
+from unittest.mock import patch
+import faiss
+import numpy as np
+import pytest
+from src.config import Config
+from src.index_benchmark import generate_synthetic_kb, run_benchmark
+from src.vector_index import (
+    build_vector_index,
+    create_search_params,
+    supports_removal,
+)
+
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf", "hnsw", "ivfpq"])
+def test_build_vector_index_finds_stored_ids(index_type):
+    """Test every index type returns items under their stable IDs."""
+    items, _ = generate_synthetic_kb(2000, 16, 1)
+    ids = np.arange(100, 2100)
+    with patch.object(Config, "PQ_M", 4):
+        index = build_vector_index(items, ids, index_type)
+    params = create_search_params(index)
+    _, labels = index.search(items[:1], 10, params=params)
+    assert 100 in labels[0]
+
+
+def test_create_vector_index_rejects_unknown_type():
+    """Test an unknown index type raises a clear error."""
+    with pytest.raises(ValueError):
+        build_vector_index(np.ones((2, 4), dtype="float32"), [0, 1], "annoy")
+
+
+def test_ivfpq_falls_back_to_ivf_for_small_kbs():
+    """Test IVF-PQ falls back to IVF when there is too little training data."""
+    items, _ = generate_synthetic_kb(100, 16, 1)
+    index = build_vector_index(items, np.arange(100), "ivfpq")
+    assert isinstance(index, faiss.IndexIVFFlat)
+
+
+def test_search_params_match_index_type():
+    """Test search parameters carry the type-specific knobs."""
+    items, _ = generate_synthetic_kb(200, 8, 1)
+    hnsw = build_vector_index(items, np.arange(200), "hnsw")
+    ivf = build_vector_index(items, np.arange(200), "ivf")
+    assert isinstance(create_search_params(hnsw), faiss.SearchParametersHNSW)
+    assert isinstance(create_search_params(ivf), faiss.SearchParametersIVF)
+    assert not supports_removal(hnsw)
+    assert supports_removal(ivf)
+
+
+def test_run_benchmark_reports_recall_and_latency():
+    """Test the benchmark reports perfect recall for the exact index."""
+    results = run_benchmark([500], ["flat", "hnsw"], 8, 20, 5)
+    assert results[0]["recall_at_5"] == 1.0
+    assert {"p50_ms", "p99_ms", "build_seconds"} <= set(results[1])